@@ -0,0 +1,111 @@
+"""
+Bytes on the wire against CPU time for compressed uploads, per codec and level, for JSON log lines and for
+random (incompressible) data. Each case reports the compression ratio, compression throughput on one and on
+--workers threads, decompression throughput, and the time to upload the data raw and compressed to a
+FakeTonicServer limited to --bandwidth-mbps.
+
+    python -m benchmarks.compression_bench [--size-mb 64] [--workers 4] [--bandwidth-mbps 200] [--latency-ms 2]
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.compression import *
+from tonic.testing import FakeTonicServer
+
+LEVELS = {
+    OBJECT_COMPRESSION.GZIP: (1, 6, 9),
+    OBJECT_COMPRESSION.ZSTD: (1, 3, 9, 19)
+}
+
+def log_lines(size: int) -> bytes:
+    # structured logs repeat their keys and most of their values, like the ones we store
+    rng = random.Random(0)
+    lines = []
+    total = 0
+    while total < size:
+        line = json.dumps({
+            "timestamp": f"2026-01-01T00:{rng.randrange(60):02d}:{rng.randrange(60):02d}.{rng.randrange(1000):03d}Z",
+            "level": rng.choice(("info", "info", "info", "warning", "error")),
+            "service": rng.choice(("api", "worker", "scheduler")),
+            "request_id": "%016x" % rng.getrandbits(64),
+            "path": rng.choice(("/buckets", "/objects/stream/read", "/objects/stream/write/part")),
+            "status": rng.choice((200, 200, 200, 206, 404, 503)),
+            "duration_ms": round(rng.expovariate(1 / 20), 3)
+        }).encode() + b"\n"
+        lines.append(line)
+        total += len(line)
+    return b"".join(lines)[:size]
+
+def upload_seconds(tonic: Tonic, key: str, data: bytes, **kwargs) -> float:
+    started = time.perf_counter()
+    result = tonic.put_object("bench", key, data, max_concurrency=8, **kwargs)
+    assert result["status_code"] == 200, result
+    return time.perf_counter() - started
+
+def measure(tonic: Tonic, dataset: str, data: bytes, codec: OBJECT_COMPRESSION, level: int, workers: int, raw_upload: float) -> dict:
+    timings = {}
+    for label, max_workers in (("compress_1", 1), (f"compress_{workers}", workers)):
+        compressed = io.BytesIO()
+        started = time.perf_counter()
+        compress_stream(io.BytesIO(data), compressed, codec, level=level, max_workers=max_workers)
+        timings[label] = time.perf_counter() - started
+    compressed = compressed.getvalue()
+
+    started = time.perf_counter()
+    decompressor = Decompressor(codec)
+    for start in range(0, len(compressed), STREAM_CHUNK_SIZE):
+        decompressor.decompress(compressed[start:start + STREAM_CHUNK_SIZE])
+    decompressor.flush()
+    decompress_seconds = time.perf_counter() - started
+
+    upload = upload_seconds(tonic, f"{dataset}-{codec.value}-{level}", data, compression=codec, compression_level=level, compression_workers=workers)
+    return {
+        "dataset": dataset,
+        "codec": codec.value,
+        "level": level,
+        "bytes": len(data),
+        "wire_bytes": len(compressed),
+        "ratio": round(len(data) / len(compressed), 3),
+        "compress_mb_per_second": round(len(data) / timings["compress_1"] / MB_SIZE, 1),
+        f"compress_mb_per_second_{workers}_workers": round(len(data) / timings[f"compress_{workers}"] / MB_SIZE, 1),
+        "decompress_mb_per_second": round(len(data) / decompress_seconds / MB_SIZE, 1),
+        "upload_seconds": round(upload, 3),
+        "raw_upload_seconds": round(raw_upload, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bandwidth-mbps", type=float, default=200.0)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    size = args.size_mb * MB_SIZE
+    datasets = {"json_logs": log_lines(size), "random": os.urandom(size)}
+    codecs = [codec for codec in OBJECT_COMPRESSION if codec != OBJECT_COMPRESSION.ZSTD or zstandard is not None]
+
+    results = []
+    with FakeTonicServer(latency=args.latency_ms / 1000, bandwidth=int(args.bandwidth_mbps * MB_SIZE / 8) or None, allow_overwrite=True) as server:
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+        tonic.create_bucket("bench")
+        for dataset, data in datasets.items():
+            raw_upload = upload_seconds(tonic, f"{dataset}-raw", data)
+            for codec in codecs:
+                for level in LEVELS[codec]:
+                    results.append(measure(tonic, dataset, data, codec, level, args.workers, raw_upload))
+                    # the server keeps every object in memory
+                    server.buckets["bench"].clear()
+
+    json.dump({"size_mb": args.size_mb, "workers": args.workers, "bandwidth_mbps": args.bandwidth_mbps, "latency_ms": args.latency_ms, "results": results}, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
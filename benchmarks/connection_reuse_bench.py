@@ -0,0 +1,95 @@
+"""
+Connections opened per request when one Tonic is shared by several threads, for a few pool sizes.
+A small pool drops connections after use under concurrency and opens (and for https, handshakes) them again.
+
+    python -m benchmarks.connection_reuse_bench [--threads 16] [--requests 2000] [--pool-sizes 1,4,16,32] [--latency-ms 5] [--work-ms 5]
+"""
+import sys
+import socket
+import json
+import time
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from tonic import Tonic
+
+class CountingHandler(BaseHTTPRequestHandler):
+    # answers every request with a small json body and keeps the connection open
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # headers and body go out as separate writes, don't let them wait on each other
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        # stands in for the time the server and network take, so requests overlap
+        time.sleep(self.server.latency)
+        body = b'{"status": "success", "status_code": 200, "result": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def measure(endpoint: str, server, threads: int, requests: int, pool_maxsize: int, work: float) -> dict:
+    tonic = Tonic(endpoint=endpoint, access_id="id", secret_key="secret", pool_maxsize=pool_maxsize)
+
+    def request(_):
+        tonic.list_buckets()
+        # whatever the caller does with the response, the connection sits in the pool meanwhile
+        time.sleep(work)
+
+    server.connections = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(request, range(requests)))
+    seconds = time.perf_counter() - started
+    tonic.http_client.clear()
+    return {
+        "pool_maxsize": pool_maxsize,
+        "connections": server.connections,
+        "reuse_rate": round(1 - server.connections / requests, 4),
+        "requests_per_second": round(requests / seconds, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pool-sizes", default="1,4,16,32")
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--work-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    # a full pool logs every connection it drops
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 1024
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.latency = args.latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        results = [measure(endpoint, server, args.threads, args.requests, int(size), args.work_ms / 1000) for size in args.pool_sizes.split(",")]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    json.dump({"threads": args.threads, "requests": args.requests, "latency_ms": args.latency_ms, "work_ms": args.work_ms, "results": results}, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
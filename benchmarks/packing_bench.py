@@ -0,0 +1,73 @@
+"""
+Tiny writes one object each against packed, and member reads against reading a whole small object, on a
+FakeTonicServer with --latency-ms added to every request. Reports records per second for both ways in,
+requests sent, and read latency percentiles.
+
+    python -m benchmarks.packing_bench [--records 2000] [--record-size 2048] [--pack-mb 8] [--latency-ms 2]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.packing import *
+from tonic.testing import FakeTonicServer
+
+def percentiles(samples: list[float]) -> dict:
+    cuts = statistics.quantiles(samples, n=100)
+    return {"p50_ms": round(cuts[49] * 1000, 3), "p99_ms": round(cuts[98] * 1000, 3)}
+
+def timed_reads(read, keys: list[str]) -> list[float]:
+    samples = []
+    for key in keys:
+        started = time.perf_counter()
+        read(key)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--record-size", type=int, default=2 * KB_SIZE)
+    parser.add_argument("--pack-mb", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    records = {f"records/{which:08d}": os.urandom(args.record_size) for which in range(args.records)}
+    results = {}
+    with FakeTonicServer(latency=args.latency_ms / 1000) as server:
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+        tonic.create_bucket("objects")
+        tonic.create_bucket("packed")
+
+        started = time.perf_counter()
+        requests = server.requests
+        for key, data in records.items():
+            tonic.put_object("objects", key, data)
+        seconds = time.perf_counter() - started
+        results["objects_write"] = {"records_per_second": round(args.records / seconds, 1), "requests": server.requests - requests}
+
+        started = time.perf_counter()
+        requests = server.requests
+        with PackWriter(tonic, "packed", max_pack_size=args.pack_mb * MB_SIZE, flush_interval=None) as writer:
+            for key, data in records.items():
+                writer.add(key, data)
+        seconds = time.perf_counter() - started
+        results["packed_write"] = {"records_per_second": round(args.records / seconds, 1), "requests": server.requests - requests}
+
+        keys = list(records)[::max(1, args.records // 500)]
+        results["object_read"] = percentiles(timed_reads(lambda key: tonic.get_object_bytes("objects", key), keys))
+        reader = PackReader(tonic, "packed")
+        results["member_read"] = percentiles(timed_reads(reader.get, keys))
+        cached = PackReader(tonic, "packed", cache_size=2 * args.pack_mb * MB_SIZE)
+        results["cached_member_read"] = percentiles(timed_reads(cached.get, keys))
+
+    json.dump({"records": args.records, "record_size": args.record_size, "pack_mb": args.pack_mb, "latency_ms": args.latency_ms, "results": results}, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
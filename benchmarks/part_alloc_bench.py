@@ -0,0 +1,61 @@
+"""
+Bytes allocated per multipart part when reading a file with read() versus the memory-mapped BufferReader.
+
+    python -m benchmarks.part_alloc_bench [--size-mb 256] [--part-mb 5]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+from tonic.types import *
+from tonic.streams import open_file_reader
+
+def measure(reader, part_size: int) -> dict:
+    parts = 0
+    allocated = 0
+    started = time.perf_counter()
+    tracemalloc.start()
+    while True:
+        before = tracemalloc.get_traced_memory()[0]
+        part_data = reader.read(part_size)
+        # the part is still alive here, so whatever it cost is counted
+        allocated += tracemalloc.get_traced_memory()[0] - before
+        if not len(part_data):
+            break
+        parts += 1
+        del part_data
+    tracemalloc.stop()
+    return {
+        "parts": parts,
+        "bytes_allocated_per_part": allocated // max(1, parts),
+        "seconds": round(time.perf_counter() - started, 4)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--part-mb", type=int, default=MULTIPART_OBJECT_SIZE // MB_SIZE)
+    args = parser.parse_args()
+
+    part_size = args.part_mb * MB_SIZE
+    with tempfile.NamedTemporaryFile() as file:
+        # write the test file a block at a time
+        block = os.urandom(MB_SIZE)
+        for _ in range(args.size_mb):
+            file.write(block)
+        file.flush()
+
+        with open(file.name, "rb") as reader:
+            copied = measure(reader, part_size)
+        with open_file_reader(file.name) as reader:
+            mapped = measure(reader, part_size)
+
+    json.dump({"size_mb": args.size_mb, "part_mb": args.part_mb, "read": copied, "mmap": mapped}, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Upload and download throughput, per-request p50/p99 latency and peak RSS across object sizes and concurrency
+levels, against the in-process FakeTonicServer with the given latency and bandwidth. Every case runs in its own
+process so the peak RSS is the client's alone. Results are written as JSON, and --compare reports the cases
+whose throughput dropped by more than --threshold against an earlier run, exiting with 1 if there are any.
+
+    python -m benchmarks.throughput_bench [--sizes-kb 64,1024,8192] [--concurrency 1,8,32] [--total-mb 64]
+        [--latency-ms 2] [--bandwidth-mbps 0] [--output results.json] [--compare baseline.json] [--threshold 0.1]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.metrics import RequestObserver, RequestInfo, PartInfo
+from tonic.testing import FakeTonicServer
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+class LatencyRecorder(RequestObserver):
+    # every request's latency by operation, kept whole so the percentiles are exact
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+
+    def on_request_end(self, request: RequestInfo):
+        with self._lock:
+            self.latencies.setdefault(request.operation, []).append(request.seconds)
+
+    def on_part_complete(self, part: PartInfo):
+        with self._lock:
+            self.latencies.setdefault("upload_part", []).append(part.seconds)
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    # kilobytes on linux, bytes on macos
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * KB_SIZE
+
+def run_case(endpoint: str, size: int, concurrency: int, objects: int) -> list[dict]:
+    recorder = LatencyRecorder()
+    tonic = Tonic(endpoint=endpoint, access_id="id", secret_key="secret", pool_maxsize=max(32, concurrency), observers=[recorder])
+    bucket = f"bench-{uuid.uuid4().hex[:12]}"
+    tonic.create_bucket(bucket)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source = os.path.join(temp_dir, "source")
+        with open(source, "wb") as file:
+            file.write(os.urandom(size))
+
+        def upload(n: int):
+            result = tonic.put_object(bucket, f"object-{n}", source)
+            assert result["status_code"] == 200, result
+
+        def download(n: int):
+            result = tonic.get_object(bucket, f"object-{n}", os.path.join(temp_dir, f"object-{n}"))
+            assert result["status_code"] == 200, result
+            os.remove(os.path.join(temp_dir, f"object-{n}"))
+
+        results = []
+        for operation, fn, request_operation in (("upload", upload, "put_part"), ("download", download, "get_object")):
+            recorder.latencies.clear()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(fn, range(objects)))
+            seconds = time.perf_counter() - started
+
+            latencies = recorder.latencies.get(request_operation, [])
+            results.append({
+                "operation": operation,
+                "object_size": size,
+                "concurrency": concurrency,
+                "objects": objects,
+                "seconds": round(seconds, 4),
+                "objects_per_second": round(objects / seconds, 2),
+                "mb_per_second": round(objects * size / seconds / MB_SIZE, 2),
+                "requests": len(latencies),
+                "p50_ms": round(percentile(latencies, 0.5) * 1000, 3) if latencies else None,
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None
+            })
+
+    tonic.delete_bucket(bucket)
+    peak_rss = peak_rss_bytes()
+    for result in results:
+        # one process runs both halves, so they share its peak
+        result["peak_rss_bytes"] = peak_rss
+    return results
+
+def run_case_process(endpoint: str, size: int, concurrency: int, objects: int) -> list[dict]:
+    case = json.dumps({"endpoint": endpoint, "size": size, "concurrency": concurrency, "objects": objects})
+    output = subprocess.run([sys.executable, "-m", "benchmarks.throughput_bench", "--case", case], check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[dict]:
+    # cases present in both runs whose throughput fell by more than the threshold
+    key = lambda result: (result["operation"], result["object_size"], result["concurrency"])
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in results:
+        before = previous.get(key(result))
+        if before is None or not before["mb_per_second"]:
+            continue
+        result["baseline_mb_per_second"] = before["mb_per_second"]
+        result["change"] = round(result["mb_per_second"] / before["mb_per_second"] - 1, 4)
+        if result["change"] < -threshold:
+            regressions.append(result)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes-kb", default="64,1024,8192")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--total-mb", type=float, default=64.0)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--bandwidth-mbps", type=float, default=0.0)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # a full pool logs every connection it drops
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+    if args.case:
+        case = json.loads(args.case)
+        json.dump(run_case(case["endpoint"], case["size"], case["concurrency"], case["objects"]), sys.stdout)
+        return
+
+    bandwidth = int(args.bandwidth_mbps * MB_SIZE / 8) or None
+    results = []
+    with FakeTonicServer(latency=args.latency_ms / 1000, bandwidth=bandwidth) as server:
+        for size in (int(size) * KB_SIZE for size in args.sizes_kb.split(",")):
+            for concurrency in (int(concurrency) for concurrency in args.concurrency.split(",")):
+                # enough objects to keep every thread busy, and at least the total
+                objects = max(concurrency, int(args.total_mb * MB_SIZE) // size)
+                results.extend(run_case_process(server.endpoint, size, concurrency, objects))
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "latency_ms": args.latency_ms,
+        "bandwidth_mbps": args.bandwidth_mbps or None,
+        "results": results
+    }
+
+    regressions = []
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        report["regressions"] = len(regressions)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    for result in regressions:
+        print(f"{result['operation']} {result['object_size']} bytes x{result['concurrency']}: {result['baseline_mb_per_second']} -> {result['mb_per_second']} MB/s", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
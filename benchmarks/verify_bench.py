@@ -0,0 +1,78 @@
+"""
+Bulk verification against the disk it reads from. Writes --files files totalling --size-mb into a temporary
+directory and the same bytes into a FakeTonicServer with --latency-ms added to every request, then reports
+raw sequential read throughput, hashing throughput per algorithm for chunked reads and mmap, and the time
+verify_bucket takes with --max-requests checksum requests in flight. The page cache is warm for every pass.
+
+    python -m benchmarks.verify_bench [--size-mb 512] [--files 64] [--max-requests 32] [--latency-ms 2]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.checksum import *
+from tonic.testing import FakeTonicServer
+
+def mb_per_second(size: int, seconds: float) -> float:
+    return round(size / seconds / MB_SIZE, 1)
+
+def timed(function, paths: list[str]) -> float:
+    started = time.perf_counter()
+    for path in paths:
+        function(path)
+    return time.perf_counter() - started
+
+def read_file(path: str, chunk_size: int = 16 * MB_SIZE):
+    with open(path, "rb", buffering=0) as file:
+        buffer = bytearray(chunk_size)
+        while file.readinto(buffer):
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--max-requests", type=int, default=32)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    file_size = args.size_mb * MB_SIZE // args.files
+    size = file_size * args.files
+    results = {}
+    with tempfile.TemporaryDirectory() as local_dir, FakeTonicServer(latency=args.latency_ms / 1000) as server:
+        server.buckets["bench"] = {}
+        paths = []
+        for which in range(args.files):
+            data = os.urandom(file_size)
+            path = os.path.join(local_dir, f"file-{which}.bin")
+            with open(path, "wb") as file:
+                file.write(data)
+            server.buckets["bench"][f"file-{which}.bin"] = data
+            paths.append(path)
+
+        read_file(paths[0])
+        results["read_mb_per_second"] = mb_per_second(size, timed(read_file, paths))
+        for algorithm in OBJECT_CHECKSUM_ALGORITHMS:
+            if algorithm == OBJECT_CHECKSUM_ALGORITHMS.CRC32C and crc32c is None:
+                continue
+            results[f"{algorithm.value}_read_mb_per_second"] = mb_per_second(size, timed(lambda path: file_checksum(path, algorithm), paths))
+            results[f"{algorithm.value}_mmap_mb_per_second"] = mb_per_second(size, timed(lambda path: mapped_file_checksum(path, algorithm), paths))
+
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret", pool_maxsize=args.max_requests)
+        started = time.perf_counter()
+        mismatches = list(tonic.verify_bucket("bench", local_dir, max_requests=args.max_requests))
+        seconds = time.perf_counter() - started
+        assert not mismatches, mismatches
+        results["verify_seconds"] = round(seconds, 3)
+        results["verify_mb_per_second"] = mb_per_second(size, seconds)
+
+    json.dump({"size_mb": args.size_mb, "files": args.files, "max_requests": args.max_requests, "latency_ms": args.latency_ms, "results": results}, sys.stdout, indent=2)
+    print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import pytest
+import io
+import asyncio
+import random
+import hashlib
+
+from tonic import AsyncTonic
+from tonic.classes import *
+from tonic.exceptions import *
+from tests.config import Config
+
+pytest.importorskip("aiohttp")
+
+@pytest.fixture
+def tonic():
+    config_data = Config.get()["testing"]
+    tonic = AsyncTonic(endpoint=config_data["api_endpoint"], access_id=config_data["auth_token_id"], secret_key=config_data["auth_token_secret"])
+    return tonic
+
+def test_async_put_get_object(tonic, tmp_path):
+    with open("tests/random_files/medblob1.bin", "rb") as f:
+        local_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+    async def run():
+        async with tonic:
+            # create bucket using a random name
+            bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+            res = await tonic.create_bucket(bucket_name)
+            assert res["status_code"] == 200
+            # put object
+            res = await tonic.put_object(
+                bucket=bucket_name,
+                key="med-blob1.bin",
+                file="tests/random_files/medblob1.bin",
+                verify_sha256=True,
+                max_concurrency=4)
+            assert res["status_code"] == 200
+            assert res["result"]["sha256"] == local_sha256
+            # get object
+            res = await tonic.get_object(bucket_name, "med-blob1.bin", str(tmp_path / "medblob1.bin"))
+            assert res["status_code"] == 200
+            # stream it
+            async with await tonic.get_object_stream(bucket_name, "med-blob1.bin") as stream:
+                data = b"".join([chunk async for chunk in stream])
+            assert hashlib.sha256(data).hexdigest() == local_sha256
+
+    asyncio.run(run())
+    assert hashlib.sha256((tmp_path / "medblob1.bin").read_bytes()).hexdigest() == local_sha256
+
+def test_async_many_small_objects(tonic):
+    async def run():
+        async with tonic:
+            # create bucket using a random name
+            bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+            res = await tonic.create_bucket(bucket_name)
+            assert res["status_code"] == 200
+            # put many small objects at once on the one loop
+            with open("tests/random_files/text1.txt", "rb") as f:
+                text = f.read()
+            results = await asyncio.gather(*[
+                tonic.put_object(bucket=bucket_name, key=f"text-{i}.txt", file=io.BytesIO(text), content_type="text/plain")
+                for i in range(200)
+            ])
+            for res in results:
+                assert res["status_code"] == 200
+
+    asyncio.run(run())
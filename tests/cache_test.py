@@ -0,0 +1,134 @@
+import os
+import time
+import pytest
+import random
+
+from tonic import Tonic
+from tonic.cache import *
+from tests.config import Config
+
+def test_metadata_cache_ttl():
+    cache = MetadataCache(ttl=0.05)
+    cache.set(("buckets",), {"status_code": 200})
+    assert cache.get(("buckets",)) == {"status_code": 200}
+    time.sleep(0.1)
+    # expired entries are misses
+    assert cache.get(("buckets",)) is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.stats()["entries"] == 0
+
+def test_metadata_cache_lru():
+    cache = MetadataCache(max_entries=2)
+    cache.set(("objects", "a"), 1)
+    cache.set(("objects", "b"), 2)
+    # touching a keeps it, so b is the one dropped
+    assert cache.get(("objects", "a")) == 1
+    cache.set(("objects", "c"), 3)
+    assert cache.get(("objects", "b")) is None
+    assert cache.get(("objects", "a")) == 1
+    assert cache.get(("objects", "c")) == 3
+
+def test_metadata_cache_invalidate():
+    cache = MetadataCache()
+    cache.set(("buckets",), 1)
+    cache.set(("objects", "a"), 2)
+    cache.set(("object_names", "a"), {"x"})
+    cache.set(("objects", "b"), 3)
+    # updates change the value in place and skip missing entries
+    cache.update(("object_names", "a"), lambda names: names.add("y"))
+    cache.update(("object_names", "b"), lambda names: names.add("y"))
+    assert cache.get(("object_names", "a")) == {"x", "y"}
+    assert cache.get(("object_names", "b")) is None
+    # dropping a bucket leaves the others
+    cache.invalidate_bucket("a")
+    assert cache.get(("objects", "a")) is None
+    assert cache.get(("object_names", "a")) is None
+    assert cache.get(("objects", "b")) == 3
+    cache.invalidate(("buckets",))
+    assert cache.get(("buckets",)) is None
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+def test_metadata_cache_client():
+    config_data = Config.get()["testing"]
+    cache = MetadataCache()
+    tonic = Tonic(endpoint=config_data["api_endpoint"], access_id=config_data["auth_token_id"], secret_key=config_data["auth_token_secret"], metadata_cache=cache)
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    assert tonic.bucket_exists(bucket_name)
+    # a second lookup is served from the cache
+    misses = cache.misses
+    assert tonic.bucket_exists(bucket_name)
+    assert cache.misses == misses
+    # writes are seen without waiting for the cache to expire
+    assert not tonic.object_exists(bucket_name, "test-file.txt")
+    res = tonic.put_object(bucket=bucket_name, key="test-file.txt", file=b"cached")
+    assert res["status_code"] == 200
+    assert tonic.object_exists(bucket_name, "test-file.txt")
+    assert any(obj["name"] == "test-file.txt" for obj in tonic.list_objects(bucket_name)["result"])
+    # delete bucket
+    res = tonic.delete_bucket(bucket_name)
+    assert res["status_code"] == 200
+    assert not tonic.bucket_exists(bucket_name)
+
+def test_object_cache_evict(tmp_path):
+    cache = ObjectCache(str(tmp_path / "cache"), max_size=250)
+    out_path = str(tmp_path / "out")
+    paths = []
+    for which in range(3):
+        temp_path = cache.temp_path()
+        with open(temp_path, "wb") as file:
+            file.write(bytes([which]) * 100)
+        cache.commit("bucket", f"key-{which}", f"{which:08x}", temp_path, out_path)
+        paths.append(cache.path("bucket", f"key-{which}", f"{which:08x}"))
+    # the least recently used object goes to make room
+    assert cache.lookup("bucket", "key-0") is None
+    assert cache.lookup("bucket", "key-2") == paths[2]
+    assert cache.size() == 200
+    # a new version of an object replaces the old one
+    cache.deliver(paths[1], out_path)
+    temp_path = cache.temp_path()
+    with open(temp_path, "wb") as file:
+        file.write(b"new")
+    cache.commit("bucket", "key-2", "0000000f", temp_path, out_path)
+    assert cache.lookup("bucket", "key-2") == cache.path("bucket", "key-2", "0000000f")
+    assert cache.lookup("bucket", "key-1") == paths[1]
+    # objects bigger than the cache aren't kept
+    temp_path = cache.temp_path()
+    with open(temp_path, "wb") as file:
+        file.write(b"x" * 300)
+    cache.commit("bucket", "key-3", "00000003", temp_path, out_path)
+    assert cache.lookup("bucket", "key-3") is None
+    assert os.path.getsize(out_path) == 300
+    cache.invalidate("bucket", "key-1")
+    assert cache.lookup("bucket", "key-1") is None
+
+@pytest.mark.parametrize("link", [False, True])
+def test_object_cache_client(tmp_path, link):
+    config_data = Config.get()["testing"]
+    cache = ObjectCache(str(tmp_path / "cache"), max_size=10 * 1024 * 1024, link=link)
+    tonic = Tonic(endpoint=config_data["api_endpoint"], access_id=config_data["auth_token_id"], secret_key=config_data["auth_token_secret"], object_cache=cache)
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    res = tonic.put_object(bucket=bucket_name, key="test-file.bin", file=b"first" * 1000)
+    assert res["status_code"] == 200
+    # the first download fills the cache, the second is served from it
+    for expected_misses in (1, 1):
+        res = tonic.get_object(bucket_name, "test-file.bin", str(tmp_path / "out.bin"))
+        assert res["status_code"] == 200
+        assert cache.misses == expected_misses
+        with open(tmp_path / "out.bin", "rb") as file:
+            assert file.read() == b"first" * 1000
+    assert cache.hits == 1
+    # an entry dropped by another process is downloaded again
+    cache.invalidate(bucket_name, "test-file.bin")
+    res = tonic.get_object(bucket_name, "test-file.bin", str(tmp_path / "out.bin"))
+    assert res["status_code"] == 200
+    assert cache.misses == 2
+    with open(tmp_path / "out.bin", "rb") as file:
+        assert file.read() == b"first" * 1000
@@ -0,0 +1,104 @@
+import pytest
+import os
+import zlib
+import hashlib
+import crc32c
+
+from tonic import Tonic
+from tonic.checksum import *
+from tonic.types import *
+from tonic.transfer import TransferManager
+from tonic.metrics import RequestObserver
+from tonic.testing import FakeTonicServer
+
+DATA = os.urandom((MB_SIZE * 3) + 555)
+PART_SIZE = MB_SIZE
+
+def parts():
+    return [DATA[offset:offset + PART_SIZE] for offset in range(0, len(DATA), PART_SIZE)]
+
+def test_crc_combine():
+    first, second = DATA[:1000], DATA[1000:]
+    assert crc_combine(zlib.crc32(first), zlib.crc32(second), len(second)) == zlib.crc32(DATA)
+    assert crc_combine(crc32c.crc32c(first), crc32c.crc32c(second), len(second), CRC32C_POLYNOMIAL) == crc32c.crc32c(DATA)
+    assert crc_combine(zlib.crc32(DATA), 0, 0) == zlib.crc32(DATA)
+
+@pytest.mark.parametrize("algorithm", list(OBJECT_CHECKSUM_ALGORITHMS))
+def test_object_checksum(algorithm):
+    expected = {
+        OBJECT_CHECKSUM_ALGORITHMS.CRC32: f"{zlib.crc32(DATA):08x}",
+        OBJECT_CHECKSUM_ALGORITHMS.CRC32C: f"{crc32c.crc32c(DATA):08x}",
+        OBJECT_CHECKSUM_ALGORITHMS.SHA1: hashlib.sha1(DATA).hexdigest(),
+        OBJECT_CHECKSUM_ALGORITHMS.SHA256: hashlib.sha256(DATA).hexdigest()
+    }[algorithm]
+    checksum = ObjectChecksum(algorithm)
+    order = list(enumerate(parts()))
+    # crcs can be added in any order, hashes only in order
+    if checksum.combinable:
+        order.reverse()
+    for which_part, part_data in order:
+        checksum.update_part(which_part, part_data)
+    assert checksum.hexdigest() == expected
+
+def test_object_checksum_hash_order():
+    checksum = ObjectChecksum(OBJECT_CHECKSUM_ALGORITHMS.SHA256)
+    with pytest.raises(ValueError):
+        checksum.update_part(1, DATA)
+
+class PartBytes(RequestObserver):
+    def __init__(self):
+        self.total = 0
+
+    def on_part_complete(self, part):
+        self.total += part.size
+
+def test_put_object_if_changed(tmp_path):
+    with FakeTonicServer() as server:
+        server.buckets["bucket"] = {}
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+        file_path = tmp_path / "artifact"
+        file_path.write_bytes(DATA)
+
+        # missing objects go up, matching ones cost a checksum call
+        assert "unchanged" not in tonic.put_object("bucket", "artifact", str(file_path), if_changed=True)["result"]
+        requests = server.requests
+        result = tonic.put_object("bucket", "artifact", str(file_path), if_changed=True)
+        assert result["result"] == {"unchanged": True, "crc32c": f"{crc32c.crc32c(DATA):08x}"}
+        assert server.requests == requests + 1
+
+        # changed data replaces the object, sent once, compressed data is compared as it would be stored
+        changed = DATA[:-1] + b"!"
+        observer = PartBytes()
+        tonic.add_observer(observer)
+        assert "unchanged" not in tonic.put_object("bucket", "artifact", changed, if_changed=True)["result"]
+        assert server.buckets["bucket"] == {"artifact": changed}
+        assert observer.total == len(changed)
+        tonic.remove_observer(observer)
+        tonic.put_object("bucket", "compressed", DATA, compression=OBJECT_COMPRESSION.GZIP, if_changed=True)
+        assert tonic.put_object("bucket", "compressed", DATA, compression=OBJECT_COMPRESSION.GZIP, if_changed=True)["result"]["unchanged"]
+        assert tonic.put_object("bucket", "compressed", changed, compression=OBJECT_COMPRESSION.GZIP, if_changed=True)["status_code"] == 200
+        assert sorted(server.buckets["bucket"]) == ["artifact", "compressed"]
+
+        with pytest.raises(ValueError):
+            tonic.put_object("bucket", "stream", iter([DATA]), if_changed=True)
+
+def test_upload_many_if_changed():
+    with FakeTonicServer() as server:
+        artifacts = {f"artifact-{which}": os.urandom(KB_SIZE) for which in range(50)}
+        server.buckets["bucket"] = dict(artifacts)
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+
+        # publishing nothing new sends nothing but the checksum calls
+        with TransferManager(tonic, max_requests=8) as manager:
+            futures = manager.upload_many("bucket", artifacts.items(), if_changed=True)
+            assert all(future.result()["result"]["unchanged"] for future in futures)
+        assert server.requests == len(artifacts)
+
+        # a few changed ones are replaced, the rest left alone
+        changed = {key: os.urandom(KB_SIZE) for key in list(artifacts)[:5]}
+        with TransferManager(tonic, max_requests=8) as manager:
+            futures = manager.upload_many("bucket", {**artifacts, **changed}.items(), if_changed=True)
+            results = [future.result() for future in futures]
+        assert all(result["status_code"] == 200 for result in results)
+        assert sum("unchanged" not in result["result"] for result in results) == 5
+        assert server.buckets["bucket"] == {**artifacts, **changed}
@@ -0,0 +1,72 @@
+import io
+import gzip
+import json
+import pytest
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.compression import *
+from tonic.testing import FakeTonicServer
+
+PART_SIZE = 64 * KB_SIZE
+LOG_DATA = "".join(json.dumps({"line": n, "level": "info", "message": f"request {n % 97} served"}) + "\n" for n in range(20000)).encode()
+
+@pytest.fixture
+def server():
+    with FakeTonicServer() as server:
+        server.buckets["bucket"] = {}
+        yield server
+
+@pytest.fixture
+def tonic(server):
+    return Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+
+def decompress_in_chunks(data: bytes, codec: OBJECT_COMPRESSION, chunk_size: int) -> bytes:
+    decompressor = Decompressor(codec)
+    output = b"".join(decompressor.decompress(data[start:start + chunk_size]) for start in range(0, len(data), chunk_size))
+    decompressor.flush()
+    return output
+
+@pytest.mark.parametrize("codec", list(OBJECT_COMPRESSION))
+def test_compress_stream_round_trip(codec):
+    if codec == OBJECT_COMPRESSION.ZSTD:
+        pytest.importorskip("zstandard")
+    compressed = io.BytesIO()
+    read, written = compress_stream(io.BytesIO(LOG_DATA), compressed, codec, part_size=PART_SIZE, max_workers=4)
+    assert read == len(LOG_DATA)
+    assert written == len(compressed.getvalue()) < len(LOG_DATA) / 4
+    assert detect_compression(compressed.getvalue()) == codec
+
+    # chunks that straddle the joins between parts
+    for chunk_size in (1000, 7 * KB_SIZE, len(compressed.getvalue())):
+        assert decompress_in_chunks(compressed.getvalue(), codec, chunk_size) == LOG_DATA
+
+def test_decompressor_truncated():
+    compressed = gzip.compress(LOG_DATA)
+    with pytest.raises(ValueError):
+        decompress_in_chunks(compressed[:-10], OBJECT_COMPRESSION.GZIP, 4096)
+
+def test_put_object_compressed(server, tonic, tmp_path):
+    result = tonic.put_object("bucket", "logs", LOG_DATA, part_size=PART_SIZE, max_concurrency=4, compression=OBJECT_COMPRESSION.GZIP, checksum=OBJECT_CHECKSUM_ALGORITHMS.CRC32)
+    assert result["status_code"] == 200
+    assert len(server.buckets["bucket"]["logs"]) < len(LOG_DATA) / 4
+    assert server.encodings[("bucket", "logs")] == "gzip"
+
+    # decompressed by default, ranges or not
+    for max_concurrency in (1, 4):
+        file_path = tmp_path / f"logs-{max_concurrency}"
+        result = tonic.get_object("bucket", "logs", str(file_path), max_concurrency=max_concurrency, range_size=PART_SIZE)
+        assert result == {"status_code": 200, "content_encoding": "gzip"}
+        assert file_path.read_bytes() == LOG_DATA
+
+    # or kept as stored
+    assert tonic.get_object("bucket", "logs", str(tmp_path / "raw"), decompress=False)["status_code"] == 200
+    assert (tmp_path / "raw").read_bytes() == server.buckets["bucket"]["logs"]
+
+def test_get_object_detects_compression(server, tonic, tmp_path):
+    # objects compressed before upload aren't marked, they're only unpacked when asked
+    server.buckets["bucket"]["logs.gz"] = gzip.compress(LOG_DATA) + gzip.compress(LOG_DATA)
+    tonic.get_object("bucket", "logs.gz", str(tmp_path / "raw"))
+    assert (tmp_path / "raw").read_bytes() == server.buckets["bucket"]["logs.gz"]
+    tonic.get_object("bucket", "logs.gz", str(tmp_path / "logs"), decompress=True, max_concurrency=4)
+    assert (tmp_path / "logs").read_bytes() == LOG_DATA + LOG_DATA
@@ -0,0 +1,88 @@
+import socket
+import pytest
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.endpoints import *
+from tonic.testing import FakeTonicServer
+
+def dead_endpoint() -> str:
+    # a port nothing is listening on
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+@pytest.fixture
+def server():
+    with FakeTonicServer() as server:
+        server.buckets["bucket"] = {"object": b"data"}
+        yield server
+
+def test_region_endpoint():
+    assert region_endpoint("https://api.example.com", None) == "https://api.example.com"
+    assert region_endpoint("https://api.example.com/", "eu-west") == "https://eu-west-api.example.com/"
+    assert Endpoint("http://host:8000/", "/api/v1").request_url("/buckets") == "http://host:8000/api/v1/buckets"
+
+    selector = EndpointSelector(["https://api.example.com"], ["us-east", "eu-west"])
+    assert [endpoint.region for endpoint in selector.endpoints] == ["us-east", "eu-west"]
+    assert selector.endpoints[1].url == "https://eu-west-api.example.com"
+
+def test_circuit_breaker(monkeypatch):
+    selector = EndpointSelector(["http://a", "http://b"], failure_threshold=2, reset_timeout=10.0, explore=0.0)
+    a, b = selector.endpoints
+    selector.record(a, 0.01, True)
+    selector.record(b, 0.05, True)
+    assert selector.choose() is a
+
+    # failures in a row open the circuit and requests go elsewhere
+    selector.record(a, 0.01, False)
+    selector.record(a, 0.01, False)
+    assert a.state == Endpoint.OPEN
+    assert selector.choose() is b
+
+    # after the reset timeout one probe goes through, and closes the circuit when it succeeds
+    monkeypatch.setattr("tonic.endpoints.time.monotonic", lambda: a.opened_at + 10.0)
+    assert selector.choose() is a
+    assert a.state == Endpoint.HALF_OPEN
+    assert selector.choose() is b
+    selector.record(a, 0.01, True)
+    assert a.state == Endpoint.CLOSED
+    assert a.failures == 0
+
+def test_read_failover(server):
+    selector = EndpointSelector([dead_endpoint(), server.endpoint], explore=0.0)
+    tonic = Tonic(endpoint=selector, access_id="id", secret_key="secret", connect_timeout=1.0)
+    dead, live = selector.endpoints
+
+    # reads carry on from the live endpoint without an error surfacing, and the dead one is avoided after
+    for _ in range(3):
+        assert tonic.list_buckets()["status_code"] == 200
+    assert dead.requests == 1
+    assert dead.failures == 1
+    assert live.requests == 3
+
+def test_prefers_faster_endpoint(server):
+    with FakeTonicServer(latency=0.05) as slow:
+        slow.buckets["bucket"] = {"object": b"data"}
+        selector = EndpointSelector([slow.endpoint, server.endpoint], explore=0.0)
+        tonic = Tonic(endpoint=selector, access_id="id", secret_key="secret")
+        slow_endpoint, fast_endpoint = selector.endpoints
+
+        for _ in range(10):
+            assert tonic.list_buckets()["status_code"] == 200
+        assert slow_endpoint.requests == 1
+        assert fast_endpoint.requests == 9
+        assert tonic._get_region() is None
+
+def test_upload_pinned_to_one_endpoint(server):
+    with FakeTonicServer() as other:
+        other.buckets["bucket"] = {}
+        tonic = Tonic(endpoint=[server.endpoint, other.endpoint], access_id="id", secret_key="secret")
+        data = bytes(range(256)) * 1024
+
+        # parts only make sense to the server that started the upload
+        for which in range(4):
+            result = tonic.put_object("bucket", f"object-{which}", data, part_size=64 * KB_SIZE, max_concurrency=4)
+            assert result["status_code"] == 200
+        stored = {**server.buckets["bucket"], **other.buckets["bucket"]}
+        assert all(stored[f"object-{which}"] == data for which in range(4))
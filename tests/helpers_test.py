@@ -1,4 +1,6 @@
 import pytest
+import json
+import random
 from tests.config import Config
 from tonic.helpers import *
 from tonic.types import *
@@ -20,3 +22,69 @@ def test_calc_parts():
     part_size, part_count = calc_object_parts(size)
     assert part_size == MULTIPART_OBJECT_SIZE
     assert part_count == 6
+
+def test_parse_content_range():
+    assert parse_content_range("bytes 0-99/1000") == (0, 99, 1000)
+    assert parse_content_range("bytes 100-100/101") == (100, 100, 101)
+    assert parse_content_range("bytes 0-99/*") is None
+    assert parse_content_range("items 0-99/1000") is None
+    assert parse_content_range(None) is None
+
+def test_calc_parts_properties():
+    # sweep sizes from empty to multi TB, with a fixed seed so failures reproduce
+    rng = random.Random(5)
+    sizes = [0, 1, MB_SIZE, MULTIPART_OBJECT_SIZE - 1, MULTIPART_OBJECT_SIZE, MULTIPART_OBJECT_SIZE + 1,
+        MULTIPART_OBJECT_SIZE * MAX_MULTIPART_COUNT, (MULTIPART_OBJECT_SIZE * MAX_MULTIPART_COUNT) + 1, 5 * TB_SIZE]
+    sizes += [rng.randint(1, 1 << rng.randint(1, 43)) for _ in range(2000)]
+    last_part_size = 0
+    for size in sorted(sizes):
+        part_size, part_count = calc_object_parts(size)
+        if size == 0:
+            assert (part_size, part_count) == (0, 0)
+            continue
+        # within the part limit and covering the object exactly
+        assert 1 <= part_count <= MAX_MULTIPART_COUNT
+        assert part_size * part_count >= size
+        assert part_size * (part_count - 1) < size
+        # never smaller than the target unless the object is
+        assert part_size >= min(size, MULTIPART_OBJECT_SIZE)
+        # grows with the object
+        assert part_size >= last_part_size or part_count == 1
+        last_part_size = part_size
+
+def test_calc_parts_tuning():
+    # a larger target gives fewer parts
+    part_size, part_count = calc_object_parts(100 * MB_SIZE, part_size=25 * MB_SIZE)
+    assert (part_size, part_count) == (25 * MB_SIZE, 4)
+    # large objects get larger parts than the target
+    part_size, part_count = calc_object_parts(100 * GB_SIZE)
+    assert part_size > MULTIPART_OBJECT_SIZE
+    assert part_count <= PREFERRED_MULTIPART_COUNT
+    # the memory budget caps the part size for the concurrency asked for
+    part_size, part_count = calc_object_parts(100 * GB_SIZE, memory_budget=256 * MB_SIZE, concurrency=16)
+    assert part_size * 16 <= 256 * MB_SIZE
+    assert part_count <= MAX_MULTIPART_COUNT
+    # unless the part limit makes it impossible
+    with pytest.raises(ValueError):
+        calc_object_parts(TB_SIZE, memory_budget=64 * MB_SIZE, concurrency=16)
+    with pytest.raises(ValueError):
+        calc_object_parts(MB_SIZE, part_size=0)
+
+def test_iter_json_array():
+    document = {
+        "status": "success",
+        "status_code": 200,
+        "message": "result [1]",
+        "result": [{"name": f"object-{i}", "size": i, "tags": ["a", {"b": "]"}]} for i in range(200)],
+        "result2": {"count": 200}
+    }
+    raw = json.dumps(document, indent=2).encode()
+    # any chunking gives the same items
+    for chunk_size in (1, 7, 4096, len(raw)):
+        chunks = (raw[offset:offset + chunk_size] for offset in range(0, len(raw), chunk_size))
+        assert list(iter_json_array(chunks, "result")) == document["result"]
+    # no array, no items
+    assert list(iter_json_array([b'{"status_code": 404, "message": "not found"}'])) == []
+    # a cut off document is an error
+    with pytest.raises(ValueError):
+        list(iter_json_array([raw[:len(raw) // 2]]))
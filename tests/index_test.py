@@ -0,0 +1,78 @@
+import pytest
+
+from tonic import Tonic
+from tonic.index import *
+from tonic.testing import FakeTonicServer
+
+NAMES = [
+    "logs/2026/09/30.log",
+    "logs/2026/10/01.log",
+    "logs/2026/10/02.log",
+    "logs/2026/10/03.log",
+    "logs/2026/11/01.log",
+    "logs/readme.txt",
+    "logs-old/2025.tar",
+    "metrics/cpu.json"
+]
+
+def names(objects) -> list[str]:
+    return [obj.name for obj in objects]
+
+def test_prefix_end():
+    assert prefix_end("logs/") == "logs0"
+    assert prefix_end("a\U0010ffff") == "b"
+    assert prefix_end("") is None
+
+def test_object_index_queries():
+    index = ObjectIndex(reversed(NAMES))
+    assert len(index) == len(NAMES)
+
+    objects, common_prefixes = index.list(prefix="logs/2026/10/")
+    assert names(objects) == NAMES[1:4]
+    assert common_prefixes == []
+
+    # directories come back once, in place of everything beneath them
+    objects, common_prefixes = index.list(prefix="logs/", delimiter="/")
+    assert names(objects) == ["logs/readme.txt"]
+    assert common_prefixes == ["logs/2026/"]
+    assert index.list(prefix="logs/2026/", delimiter="/") == ([], ["logs/2026/09/", "logs/2026/10/", "logs/2026/11/"])
+    assert index.list(delimiter="/") == ([], ["logs-old/", "logs/", "metrics/"])
+
+    # pages carry on after the last name or common prefix returned
+    assert index.list(prefix="logs/2026/", delimiter="/", limit=2) == ([], ["logs/2026/09/", "logs/2026/10/"])
+    assert index.list(prefix="logs/2026/", delimiter="/", start_after="logs/2026/10/") == ([], ["logs/2026/11/"])
+    assert names(index.list(prefix="logs/", start_after="logs/2026/10/02.log", limit=2)[0]) == ["logs/2026/10/03.log", "logs/2026/11/01.log"]
+
+    assert names(index.range("logs/2026/10/", "logs/2026/11/")) == NAMES[1:4]
+    assert names(index.range(start_after="logs/readme.txt")) == ["metrics/cpu.json"]
+
+    index.add("logs/2026/10/04.log")
+    assert index.remove("logs/2026/10/01.log")
+    assert not index.remove("logs/2026/10/01.log")
+    assert names(index.list(prefix="logs/2026/10/")[0]) == ["logs/2026/10/02.log", "logs/2026/10/03.log", "logs/2026/10/04.log"]
+
+@pytest.mark.parametrize("prefix_listing", [False, True])
+def test_object_index_kept_current(prefix_listing):
+    with FakeTonicServer(prefix_listing=prefix_listing) as server:
+        server.buckets["bucket"] = {name: b"data" for name in NAMES}
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+
+        # listings under a prefix are the same whether the server filters them or not
+        assert names(tonic.iter_objects("bucket", prefix="logs/2026/", page_size=2)) == NAMES[:5]
+        assert names(ObjectIndex.load(tonic, "bucket", prefix="logs/")) == NAMES[:6]
+
+        # the client's own writes show up without listing again
+        index = tonic.object_index("bucket")
+        requests = server.requests
+        assert tonic.put_object("bucket", "logs/2026/10/04.log", b"data")["status_code"] == 200
+        assert tonic.delete_object("bucket", "logs/2026/10/01.log")["status_code"] == 200
+        assert tonic.object_index("bucket") is index
+        assert names(index.list(prefix="logs/2026/10/")[0]) == ["logs/2026/10/02.log", "logs/2026/10/03.log", "logs/2026/10/04.log"]
+        assert index.get("logs/2026/10/04.log").size == 4
+        assert server.requests == requests + 3
+
+        # a bucket deleted and made again starts with a new index
+        server.buckets["bucket"] = {}
+        assert tonic.delete_bucket("bucket")["status_code"] == 200
+        assert tonic.create_bucket("bucket")["status_code"] == 200
+        assert len(tonic.object_index("bucket")) == 0
@@ -0,0 +1,38 @@
+import pytest
+
+from tonic.journal import *
+
+def test_journal_round_trip(tmp_path):
+    path = str(tmp_path / "upload.tonic-upload")
+    # a missing journal is an empty one
+    journal = UploadJournal.load(path)
+    assert journal.upload_id is None
+    assert not journal.matches("bucket", "key", 100, 10)
+    # record an upload and some parts
+    journal.start("bucket", "key", "upload-1", 100, 10, mtime=1.5)
+    journal.complete_part(0)
+    journal.complete_part(3)
+    # load it back
+    journal = UploadJournal.load(path)
+    assert journal.upload_id == "upload-1"
+    assert journal.completed == {0, 3}
+    assert journal.matches("bucket", "key", 100, 10, mtime=1.5)
+    assert not journal.matches("bucket", "key", 100, 10, mtime=2.5)
+    assert not journal.matches("bucket", "other", 100, 10, mtime=1.5)
+    # remove it
+    journal.remove()
+    assert UploadJournal.load(path).upload_id is None
+
+def test_journal_torn_write(tmp_path):
+    path = str(tmp_path / "upload.tonic-upload")
+    journal = UploadJournal(path)
+    journal.start("bucket", "key", "upload-1", 100, 10)
+    journal.complete_part(1)
+    # a crash mid-write leaves a partial line behind
+    with open(path, "a") as file:
+        file.write("2")
+    journal = UploadJournal.load(path)
+    assert journal.completed == {1}
+    with open(path, "a") as file:
+        file.write("\n{")
+    assert UploadJournal.load(path).completed == {1, 2}
@@ -0,0 +1,71 @@
+import os
+import pytest
+import random
+
+from tonic import Tonic
+from tonic.metrics import *
+from tests.config import Config
+
+@pytest.fixture
+def tonic():
+    config_data = Config.get()["testing"]
+    tonic = Tonic(endpoint=config_data["api_endpoint"], access_id=config_data["auth_token_id"], secret_key=config_data["auth_token_secret"])
+    return tonic
+
+def test_request_operation():
+    assert request_operation("PUT", "/objects/stream/write/part/abc/0/10") == "put_part"
+    assert request_operation("GET", "/objects/bucket/name/bucket?offset=0&limit=10") == "list_objects"
+    assert request_operation("GET", "buckets") == "list_buckets"
+    assert request_operation("POST", "buckets") == "create_bucket"
+    assert request_operation("DELETE", "/buckets/name/bucket") == "delete_bucket"
+    assert request_operation("GET", "/status?node_only=true") == "other"
+
+def test_metrics_collector_prometheus():
+    collector = MetricsCollector()
+    for seconds in (0.003, 0.02, 0.2):
+        request = RequestInfo("GET", "buckets", 0)
+        request.finish()
+        request.seconds = seconds
+        request.status = 200
+        request.response_bytes = 100
+        collector.on_request_end(request)
+    collector.on_part_complete(PartInfo("upload", 0, 1000, 0.5, 2, 200))
+    snapshot = collector.snapshot()
+    assert snapshot["list_buckets"]["requests"] == 3
+    assert snapshot["list_buckets"]["response_bytes"] == 300
+    assert snapshot["list_buckets"]["p50_seconds"] == 0.025
+    assert snapshot["upload_part"]["retries"] == 1
+    text = collector.to_prometheus()
+    assert 'tonic_requests_total{operation="list_buckets",status="200"} 3' in text
+    assert 'tonic_request_duration_seconds_bucket{operation="list_buckets",le="0.005"} 1' in text
+    assert 'tonic_request_duration_seconds_bucket{operation="list_buckets",le="+Inf"} 3' in text
+    assert 'tonic_request_bytes_total{operation="upload_part",direction="sent"} 1000' in text
+
+def test_observers(tonic):
+    collector = MetricsCollector()
+    exported = []
+    spans = SpanRecorder(exporter=exported.append)
+    tonic.add_observer(collector)
+    tonic.add_observer(spans)
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    res = tonic.put_object(bucket=bucket_name, key="test-file.bin", file=os.urandom(1024 * 1024 + 1), part_size=256 * 1024, max_concurrency=2)
+    assert res["status_code"] == 200
+    snapshot = collector.snapshot()
+    assert snapshot["create_bucket"]["requests"] == 1
+    assert snapshot["create_upload"]["requests"] == 1
+    assert snapshot["put_part"]["requests"] == 5
+    assert snapshot["upload_part"]["request_bytes"] == 1024 * 1024 + 1
+    # every request is a span
+    assert len(spans.spans()) == 7
+    assert exported == spans.spans()
+    assert exported[0]["attributes"]["http.response.status_code"] == 200
+    assert exported[0]["end_time_unix_nano"] >= exported[0]["start_time_unix_nano"]
+    # nothing is recorded once the observers are gone
+    tonic.remove_observer(collector)
+    tonic.remove_observer(spans)
+    tonic.list_buckets()
+    assert "list_buckets" not in collector.snapshot()
+    assert len(spans.spans()) == 7
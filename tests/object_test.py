@@ -8,7 +8,7 @@ from tonic import Tonic
 from tonic.classes import *
 from tonic.exceptions import *
 from tests.config import Config
-from tonic.types import OBJECT_CHECKSUM_ALGORITHMS
+from tonic.types import OBJECT_CHECKSUM_ALGORITHMS, MULTIPART_OBJECT_SIZE
 
 @pytest.fixture
 def tonic():
@@ -192,3 +192,139 @@ def test_get_object(tonic):
         if folder.startswith("s3-bucket-"):
             # remove dir even if not empty
             os.system(f"rm -rf tests/random_files/{folder}")
+
+def test_put_large_object_concurrent(tonic):
+    # calc local sha256
+    sha256 = hashlib.sha256()
+    with open("tests/random_files/medblob1.bin", "rb") as f:
+        while True:
+            data = f.read(65536)
+            if not data:
+                break
+            sha256.update(data)
+    local_sha256 = sha256.hexdigest()
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    # put object with several parts in flight
+    res = tonic.put_object(
+        bucket=bucket_name,
+        key="med-blob1.bin",
+        file="tests/random_files/medblob1.bin",
+        verify_sha256=True,
+        max_concurrency=4)
+    assert res["status_code"] == 200
+    assert res["result"]["sha256"] == local_sha256
+
+def test_get_object_stream(tonic):
+    with open("tests/random_files/medblob1.bin", "rb") as f:
+        local_data = f.read()
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    # put object
+    res = tonic.put_object(
+        bucket=bucket_name,
+        key="med-blob1.bin",
+        file="tests/random_files/medblob1.bin")
+    assert res["status_code"] == 200
+    # read it back in small chunks with read-ahead
+    with tonic.get_object_stream(bucket_name, "med-blob1.bin", chunk_size=65536, read_ahead=4) as stream:
+        data = stream.read()
+    assert data == local_data
+    # missing objects raise
+    with pytest.raises(PopBadResponse):
+        tonic.get_object_stream(bucket_name, "missing.bin")
+
+def test_put_object_resume(tonic, tmp_path):
+    class InterruptedFile:
+        # reads a couple of parts then fails like a dropped network
+        def __init__(self, path):
+            self._file = open(path, "rb")
+            self._reads = 0
+        def read(self, size=-1):
+            self._reads += 1
+            if self._reads > 2:
+                raise IOError("interrupted")
+            return self._file.read(size)
+        def seek(self, offset, whence=os.SEEK_SET):
+            return self._file.seek(offset, whence)
+        def tell(self):
+            return self._file.tell()
+
+    # build a file of a few parts
+    file_path = tmp_path / "blob.bin"
+    file_path.write_bytes(os.urandom((MULTIPART_OBJECT_SIZE * 3) + 555))
+    journal_path = str(tmp_path / "blob.journal")
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    # start the upload and have it fail part way
+    with pytest.raises(IOError):
+        tonic.put_object(bucket=bucket_name, key="blob.bin", file=InterruptedFile(str(file_path)), resume=True, journal_path=journal_path)
+    assert os.path.exists(journal_path)
+    # resume it
+    with open(file_path, "rb") as file_data:
+        res = tonic.put_object(bucket=bucket_name, key="blob.bin", file=file_data, resume=True, journal_path=journal_path, verify_sha256=True)
+    assert res["status_code"] == 200
+    assert res["result"]["sha256"] == hashlib.sha256(file_path.read_bytes()).hexdigest()
+    assert not os.path.exists(journal_path)
+
+def test_put_object_checksum(tonic):
+    # calc local crc32c
+    with open("tests/random_files/medblob1.bin", "rb") as f:
+        local_crc32c = f"{crc32c.crc32c(f.read()) & 0xFFFFFFFF:08x}"
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    # put object, the crc32c is worked out while uploading and checked against the server
+    res = tonic.put_object(
+        bucket=bucket_name,
+        key="med-blob1.bin",
+        file="tests/random_files/medblob1.bin",
+        checksum=OBJECT_CHECKSUM_ALGORITHMS.CRC32C,
+        part_size=65536,
+        max_concurrency=4)
+    assert res["status_code"] == 200
+    assert res["result"]["crc32c"] == local_crc32c
+
+def test_put_object_stream(tonic):
+    with open("tests/random_files/medblob1.bin", "rb") as f:
+        local_data = f.read()
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    # a generator has no size and can't seek
+    def chunks():
+        for offset in range(0, len(local_data), 100000):
+            yield local_data[offset:offset + 100000]
+    res = tonic.put_object(bucket=bucket_name, key="gen.bin", file=chunks(), part_size=262144, verify_sha256=True)
+    assert res["status_code"] == 200
+    assert res["result"]["sha256"] == hashlib.sha256(local_data).hexdigest()
+    # with the length given it's uploaded as it's read
+    res = tonic.put_object(bucket=bucket_name, key="gen-length.bin", file=chunks(), length=len(local_data), part_size=262144, max_concurrency=2, verify_sha256=True)
+    assert res["status_code"] == 200
+    assert res["result"]["sha256"] == hashlib.sha256(local_data).hexdigest()
+
+def test_iter_objects(tonic):
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    # put a few objects under two prefixes
+    for i in range(6):
+        res = tonic.put_object(bucket=bucket_name, key=f"{'logs' if i % 2 else 'data'}/{i}.txt", file=b"tonic" * i, content_type="text/plain")
+        assert res["status_code"] == 200
+    # iterate them as objects
+    objects = list(tonic.iter_objects(bucket_name))
+    assert len(objects) == 6
+    assert all(isinstance(obj, Object) for obj in objects)
+    assert sorted(obj.size for obj in objects) == [0, 5, 10, 15, 20, 25]
+    # filter by prefix, a page at a time
+    logs = list(tonic.iter_objects(bucket_name, prefix="logs/", page_size=2))
+    assert sorted(obj.name for obj in logs) == ["logs/1.txt", "logs/3.txt", "logs/5.txt"]
@@ -0,0 +1,92 @@
+import os
+import time
+import pytest
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.packing import *
+from tonic.metrics import RequestObserver
+from tonic.exceptions import ChecksumMismatch
+from tonic.testing import FakeTonicServer
+
+RECORDS = {f"records/{which:05d}": os.urandom(2 * KB_SIZE - which % 7) for which in range(500)}
+
+class ResponseBytes(RequestObserver):
+    def __init__(self):
+        self.total = 0
+
+    def on_request_end(self, request):
+        self.total += request.response_bytes or 0
+
+@pytest.fixture
+def server():
+    with FakeTonicServer() as server:
+        server.buckets["bucket"] = {}
+        yield server
+
+@pytest.fixture
+def tonic(server):
+    return Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+
+def test_pack_round_trip(server, tonic):
+    with PackWriter(tonic, "bucket", max_pack_size=256 * KB_SIZE, flush_interval=None) as writer:
+        for key, data in RECORDS.items():
+            writer.add(key, data)
+
+    # a handful of packs and indexes instead of a pair of requests per record
+    packs = [name for name in server.buckets["bucket"] if name.endswith(PACK_SUFFIX)]
+    assert len(packs) == 4
+    assert server.requests == 4 * len(packs)
+
+    reader = PackReader(tonic, "bucket")
+    assert len(reader) == len(RECORDS)
+    requests = server.requests
+    assert reader.get("records/00042") == RECORDS["records/00042"]
+    assert server.requests == requests + 1
+    assert all(reader.get(key) == data for key, data in RECORDS.items())
+    with pytest.raises(KeyError):
+        reader.get("records/missing")
+
+def test_pack_cache(server, tonic):
+    with PackWriter(tonic, "bucket", flush_interval=None) as writer:
+        for key, data in RECORDS.items():
+            writer.add(key, data)
+
+    # the whole pack comes once and its members are read from memory after
+    reader = PackReader(tonic, "bucket", cache_size=4 * MB_SIZE)
+    requests = server.requests
+    assert all(reader.get(key) == data for key, data in RECORDS.items())
+    assert server.requests == requests + 1
+
+    # packs too big for the cache aren't fetched whole, only the member read
+    observer = ResponseBytes()
+    tonic.add_observer(observer)
+    reader = PackReader(tonic, "bucket", cache_size=KB_SIZE)
+    observer.total = 0
+    assert reader.get("records/00042") == RECORDS["records/00042"]
+    assert observer.total == len(RECORDS["records/00042"])
+
+def test_pack_flush_on_time(server, tonic):
+    writer = PackWriter(tonic, "bucket", flush_interval=0.2)
+    writer.add("record", b"first")
+    reader = PackReader(tonic, "bucket")
+    assert "record" not in reader
+
+    time.sleep(1.0)
+    assert reader.refresh() == 1
+    assert reader.get("record") == b"first"
+
+    # later writes of a key win
+    writer.add("record", b"second")
+    writer.add("record", b"third")
+    writer.close()
+    assert reader.refresh() == 2
+    assert reader.get("record") == b"third"
+
+def test_pack_damaged(server, tonic):
+    with PackWriter(tonic, "bucket", flush_interval=None) as writer:
+        writer.add("record", b"data")
+    pack = next(name for name in server.buckets["bucket"] if name.endswith(PACK_SUFFIX))
+    server.buckets["bucket"][pack] = b"date"
+    with pytest.raises(ChecksumMismatch):
+        PackReader(tonic, "bucket").get("record")
@@ -0,0 +1,85 @@
+import pytest
+import time
+import socket
+import urllib3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from tonic import Tonic
+
+class CountingHandler(BaseHTTPRequestHandler):
+    # answers every request with an empty listing, counting connections and what was asked
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self.server.headers.append(dict(self.headers))
+        time.sleep(self.server.latency)
+        body = b'{"status": "success", "status_code": 200, "result": []}'
+        try:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client gave up waiting
+            self.close_connection = True
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.latency = 0.0
+    server.headers = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def endpoint(server) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_injected_http_client(server):
+    http_client = urllib3.PoolManager(maxsize=2)
+    tonic = Tonic(endpoint=endpoint(server), access_id="id", secret_key="secret", http_client=http_client)
+    assert tonic.http_client is http_client
+    assert tonic.list_buckets()["status_code"] == 200
+    # the request went through the injected pool, with the client's headers
+    assert len(http_client.pools) == 1
+    assert server.headers[0]["auth-token"] == '{"id": "id", "token": "secret"}'
+
+def test_connection_reuse(server):
+    server.latency = 0.002
+    tonic = Tonic(endpoint=endpoint(server), access_id="id", secret_key="secret", pool_maxsize=8)
+    def request(_):
+        assert tonic.list_buckets()["status_code"] == 200
+        time.sleep(0.002)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(request, range(200)))
+    # every thread keeps reusing a connection from the pool
+    assert server.connections <= 8
+
+def test_no_keep_alive(server):
+    tonic = Tonic(endpoint=endpoint(server), access_id="id", secret_key="secret", keep_alive=False)
+    for _ in range(3):
+        assert tonic.list_buckets()["status_code"] == 200
+    assert server.headers[0]["Connection"] == "close"
+    assert server.connections == 3
+
+def test_read_timeout(server):
+    server.latency = 0.5
+    tonic = Tonic(endpoint=endpoint(server), access_id="id", secret_key="secret", read_timeout=0.05)
+    with pytest.raises(urllib3.exceptions.MaxRetryError):
+        tonic.list_buckets()
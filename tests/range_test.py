@@ -0,0 +1,83 @@
+import pytest
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from tonic import Tonic
+from tonic.helpers import *
+from tonic.types import *
+
+OBJECT_DATA = os.urandom((MULTIPART_OBJECT_SIZE * 3) + 555)
+
+class RangeHandler(BaseHTTPRequestHandler):
+    # serves OBJECT_DATA for any read, honouring Range unless the server says otherwise
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(self.headers.get("Range"))
+        if "/objects/stream/read/name/" not in self.path:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        # "first" honours only the range a download starts with, like one endpoint of several that doesn't
+        range_header = self.headers.get("Range")
+        honor_range = self.server.honor_range is True or (self.server.honor_range == "first" and range_header and range_header.startswith("bytes=0-"))
+        if range_header is None or not honor_range:
+            body = OBJECT_DATA
+            self.send_response(200)
+        else:
+            start, end = range_header.split("=")[1].split("-")
+            start, end = int(start), min(int(end), len(OBJECT_DATA) - 1)
+            body = OBJECT_DATA[start:end + 1]
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(OBJECT_DATA)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture(params=[True, False], ids=["ranges", "no-ranges"])
+def server(request):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    server.daemon_threads = True
+    server.honor_range = request.param
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def tonic(server):
+    return Tonic(endpoint=f"http://127.0.0.1:{server.server_address[1]}", access_id="id", secret_key="secret")
+
+def test_get_object_parallel(tonic, server, tmp_path):
+    file_path = tmp_path / "object.bin"
+    res = tonic.get_object("bucket", "object.bin", str(file_path), max_concurrency=4)
+    assert res["status_code"] == 200
+    assert file_path.read_bytes() == OBJECT_DATA
+    if server.honor_range:
+        # one request per range
+        assert len(server.requests) == 4
+    else:
+        # the first response was the whole object, nothing else was asked for
+        assert len(server.requests) == 1
+
+def test_get_object_single_stream(tonic, server, tmp_path):
+    file_path = tmp_path / "object.bin"
+    res = tonic.get_object("bucket", "object.bin", str(file_path))
+    assert res["status_code"] == 200
+    assert file_path.read_bytes() == OBJECT_DATA
+    assert server.requests == [None]
+
+def test_get_object_range_ignored(tonic, server, tmp_path):
+    # a later range answered with the whole object fails the download without leaving a file with holes
+    server.honor_range = "first"
+    file_path = tmp_path / "object.bin"
+    res = tonic.get_object("bucket", "object.bin", str(file_path), max_concurrency=4)
+    assert res["status_code"] == 502
+    assert not file_path.exists()
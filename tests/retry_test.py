@@ -0,0 +1,107 @@
+import os
+import time
+import pytest
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from tonic import Tonic, AsyncTonic
+from tonic.types import *
+from tonic.retry import *
+from tonic.testing import FakeTonicServer
+
+PART_SIZE = 64 * KB_SIZE
+OBJECT_DATA = os.urandom(PART_SIZE * 8)
+
+class FakeResponse:
+    def __init__(self, status: int, headers: dict):
+        self.status = status
+        self.headers = headers
+
+@pytest.fixture
+def server():
+    with FakeTonicServer() as server:
+        server.buckets["bucket"] = {}
+        yield server
+
+def test_retry_policy_delay():
+    policy = RetryPolicy(backoff=0.5, max_backoff=3.0, jitter=False, max_retry_after=5.0)
+    assert [policy.delay(attempt) for attempt in (1, 2, 3, 4)] == [0.5, 1.0, 2.0, 3.0]
+    assert policy.delay(1, FakeResponse(503, {"Retry-After": "2"})) == 2
+    assert policy.delay(1, FakeResponse(429, {"Retry-After": "120"})) == 5
+    assert policy.delay(1, FakeResponse(500, {"Retry-After": "2"})) == 0.5
+
+    jittered = RetryPolicy(backoff=0.5, max_backoff=3.0)
+    assert all(0 <= jittered.delay(3) <= 2.0 for _ in range(100))
+
+def test_retry_policy_idempotency():
+    policy = RetryPolicy()
+    assert policy.retryable("PUT", 503)
+    assert policy.retryable("GET", None)
+    assert not policy.retryable("PUT", 404)
+    assert not policy.retryable("POST", 503)
+    assert RetryPolicy(retry_non_idempotent=True).retryable("POST", 503)
+    assert policy.urllib3_retry().is_retry("GET", 503)
+    assert not policy.urllib3_retry().is_retry("POST", 503)
+
+def test_part_retry_honours_retry_after(server):
+    tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+    server.fail_parts[2] = 1
+    server.retry_after = 1
+
+    started = time.perf_counter()
+    result = tonic.put_object("bucket", "object", OBJECT_DATA, part_size=PART_SIZE, max_concurrency=4)
+    assert result["status_code"] == 200
+    assert time.perf_counter() - started >= 1
+    assert server.buckets["bucket"]["object"] == OBJECT_DATA
+
+def test_async_part_retry_honours_retry_after(server):
+    pytest.importorskip("aiohttp")
+    server.fail_parts[2] = 1
+    server.retry_after = 1
+
+    async def run():
+        async with AsyncTonic(endpoint=server.endpoint, access_id="id", secret_key="secret") as tonic:
+            return await tonic.put_object("bucket", "object", OBJECT_DATA, part_size=PART_SIZE, max_concurrency=4)
+
+    started = time.perf_counter()
+    assert asyncio.run(run())["status_code"] == 200
+    assert time.perf_counter() - started >= 1
+    assert server.buckets["bucket"]["object"] == OBJECT_DATA
+
+def test_hedged_part_upload(server):
+    hedge_policy = HedgePolicy(min_samples=8, max_ratio=1.0)
+    tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret", hedge_policy=hedge_policy)
+
+    # the first upload gives the policy its latencies, the second has a straggler
+    assert tonic.put_object("bucket", "warm", OBJECT_DATA, part_size=PART_SIZE)["status_code"] == 200
+    assert hedge_policy.hedges == 0
+    server.stall_parts[3] = 5.0
+
+    started = time.perf_counter()
+    assert tonic.put_object("bucket", "object", OBJECT_DATA, part_size=PART_SIZE, max_concurrency=2)["status_code"] == 200
+    assert time.perf_counter() - started < 2.5
+    assert hedge_policy.hedges >= 1
+    assert server.buckets["bucket"]["object"] == OBJECT_DATA
+
+    # parts of a stream sent a part at a time don't share buffers with a copy that's still going
+    server.stall_parts[1] = 5.0
+    stream = iter([OBJECT_DATA[start:start + 1000] for start in range(0, len(OBJECT_DATA), 1000)])
+    assert tonic.put_object("bucket", "stream", stream, part_size=PART_SIZE, length=len(OBJECT_DATA), max_concurrency=2)["status_code"] == 200
+    assert server.buckets["bucket"]["stream"] == OBJECT_DATA
+    hedge_policy.shutdown()
+
+def test_hedging_keeps_concurrency():
+    # first copies don't wait for the few threads kept for hedges
+    with FakeTonicServer(latency=0.2) as server:
+        server.buckets["bucket"] = {"object": b"data"}
+        hedge_policy = HedgePolicy(min_samples=4, max_ratio=0, max_workers=4)
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret", hedge_policy=hedge_policy)
+        for _ in range(4):
+            tonic.get_object_bytes("bucket", "object")
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            assert list(executor.map(lambda _: tonic.get_object_bytes("bucket", "object"), range(16))) == [b"data"] * 16
+        assert time.perf_counter() - started < 0.6
+        assert hedge_policy.hedges == 0
+        hedge_policy.shutdown()
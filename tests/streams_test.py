@@ -0,0 +1,63 @@
+import pytest
+import io
+
+from tonic.streams import *
+
+def test_buffer_reader():
+    data = bytes(range(256)) * 10
+    reader = BufferReader(data)
+    assert len(reader) == len(data)
+    # reads are views, not copies
+    part = reader.read(100)
+    assert isinstance(part, memoryview)
+    assert part == data[:100]
+    assert reader.tell() == 100
+    reader.seek(2000)
+    assert reader.read(1000) == data[2000:]
+    assert len(reader.read(1000)) == 0
+    reader.seek(-10, io.SEEK_END)
+    assert reader.read() == data[-10:]
+
+def test_open_file_reader(tmp_path):
+    file_path = tmp_path / "data.bin"
+    file_path.write_bytes(b"tonic" * 1000)
+    with open_file_reader(str(file_path)) as reader:
+        assert isinstance(reader, BufferReader)
+        assert bytes(reader.read(5)) == b"tonic"
+    # empty files can't be mapped and are read as usual
+    empty_path = tmp_path / "empty.bin"
+    empty_path.write_bytes(b"")
+    with open_file_reader(str(empty_path)) as reader:
+        assert reader.read(5) == b""
+    # files that may change while they're read aren't mapped
+    with open_file_reader(str(file_path), zero_copy=False) as reader:
+        assert not isinstance(reader, BufferReader)
+        assert reader.read(5) == b"tonic"
+
+def test_iterable_reader():
+    reader = IterableReader(iter([b"ab", b"", bytearray(b"cde"), memoryview(b"f")]))
+    assert reader.read() == b"abcdef"
+    assert reader.read() == b""
+
+def test_part_buffer_pool():
+    class ShortReads(io.RawIOBase):
+        # hands back at most 3 bytes a read, like a pipe
+        def __init__(self, data):
+            self._data = io.BytesIO(data)
+        def readable(self):
+            return True
+        def readinto(self, buffer):
+            return self._data.readinto(buffer[:3])
+
+    data = bytes(range(100))
+    pool = PartBufferPool(ShortReads(data))
+    first = pool.read(40)
+    assert first == data[:40]
+    second = pool.read(40)
+    assert second == data[40:80]
+    # a released buffer is reused for the next part
+    buffer = first.obj
+    pool.release(first)
+    third = pool.read(40)
+    assert third.obj is buffer
+    assert third == data[80:]
@@ -0,0 +1,97 @@
+import os
+import time
+import pytest
+import random
+
+from tonic import Tonic
+from tonic.sync import *
+from tonic.__main__ import main
+from tonic.testing import FakeTonicServer
+from tests.config import Config
+
+@pytest.fixture
+def tonic():
+    config_data = Config.get()["testing"]
+    tonic = Tonic(endpoint=config_data["api_endpoint"], access_id=config_data["auth_token_id"], secret_key=config_data["auth_token_secret"])
+    return tonic
+
+def write_file(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(data)
+
+def test_sync(tonic, tmp_path):
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    local_dir = str(tmp_path)
+    for which in range(20):
+        write_file(os.path.join(local_dir, f"dir-{which % 3}", f"file-{which}.bin"), os.urandom(random.randint(0, 4096)))
+    # everything goes up the first time
+    result = tonic.sync(local_dir, bucket_name, prefix="backup/")
+    assert len(result.uploaded) == 20
+    assert not result.failed
+    assert "backup/dir-1/file-1.bin" in result.uploaded
+    assert not any(SYNC_INDEX_NAME in key for key in result.uploaded)
+    # nothing changed, nothing is hashed or sent
+    with SyncIndex(os.path.join(local_dir, SYNC_INDEX_NAME)) as index:
+        assert len(index.files(OBJECT_CHECKSUM_ALGORITHMS.CRC32)) == 20
+    result = tonic.sync(local_dir, bucket_name, prefix="backup/")
+    assert result.uploaded == []
+    assert result.unchanged == 20
+    # touching a file rehashes it without sending it, changing one sends it
+    os.utime(os.path.join(local_dir, "dir-0", "file-0.bin"), ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+    write_file(os.path.join(local_dir, "dir-1", "file-1.bin"), b"changed")
+    os.remove(os.path.join(local_dir, "dir-2", "file-2.bin"))
+    result = tonic.sync(local_dir, bucket_name, prefix="backup/", delete=True, hash_processes=1)
+    assert result.uploaded == ["backup/dir-1/file-1.bin"]
+    assert result.deleted == ["backup/dir-2/file-2.bin"]
+    assert result.unchanged == 18
+    tonic.get_object(bucket_name, "backup/dir-1/file-1.bin", str(tmp_path / "out.bin"))
+    with open(tmp_path / "out.bin", "rb") as file:
+        assert file.read() == b"changed"
+    os.remove(tmp_path / "out.bin")
+
+def test_sync_command(tonic, tmp_path, capsys):
+    config_data = Config.get()["testing"]
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    write_file(str(tmp_path / "data" / "file.txt"), b"hello")
+    arguments = ["--endpoint", config_data["api_endpoint"], "--access-id", config_data["auth_token_id"], "--secret-key", config_data["auth_token_secret"], "sync", str(tmp_path / "data"), bucket_name]
+    # a dry run reports without sending
+    assert main(arguments + ["--dry-run"]) == 0
+    assert "upload file.txt" in capsys.readouterr().out
+    assert tonic.list_objects(bucket_name)["result"] == []
+    assert main(arguments) == 0
+    assert "1 uploaded" in capsys.readouterr().out
+    assert main(arguments) == 0
+    assert "1 unchanged" in capsys.readouterr().out
+
+def test_sync_replace(tmp_path):
+    with FakeTonicServer() as server:
+        server.buckets["bucket"] = {}
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+        local_dir = str(tmp_path / "data")
+        for which in range(5):
+            write_file(os.path.join(local_dir, f"file-{which}.bin"), os.urandom(1000))
+        assert len(tonic.sync(local_dir, "bucket").uploaded) == 5
+
+        # a changed file whose upload fails is missing until the next sync puts it back
+        write_file(os.path.join(local_dir, "file-0.bin"), b"changed")
+        server.fail_parts = {0: 100}
+        result = tonic.sync(local_dir, "bucket")
+        assert list(result.failed) == ["file-0.bin"]
+        assert "file-0.bin" not in server.buckets["bucket"]
+        server.fail_parts = {}
+        assert tonic.sync(local_dir, "bucket").uploaded == ["file-0.bin"]
+        assert sorted(server.buckets["bucket"]) == [f"file-{which}.bin" for which in range(5)]
+        assert server.buckets["bucket"]["file-0.bin"] == b"changed"
+
+        # without the index, objects that already hold the files are checked rather than sent again
+        os.remove(os.path.join(local_dir, SYNC_INDEX_NAME))
+        result = tonic.sync(local_dir, "bucket")
+        assert result.uploaded == []
+        assert result.unchanged == 5
@@ -0,0 +1,50 @@
+import os
+import time
+import pytest
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.testing import FakeTonicServer
+
+OBJECT_DATA = os.urandom((MULTIPART_OBJECT_SIZE * 2) + 555)
+
+@pytest.fixture
+def server():
+    with FakeTonicServer() as server:
+        yield server
+
+@pytest.fixture
+def tonic(server):
+    tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+    tonic.create_bucket("bucket")
+    return tonic
+
+def test_fake_server_round_trip(server, tonic, tmp_path):
+    assert tonic.put_object("bucket", "object", OBJECT_DATA, max_concurrency=4, checksum=OBJECT_CHECKSUM_ALGORITHMS.CRC32)["status_code"] == 200
+    assert server.buckets["bucket"]["object"] == OBJECT_DATA
+    assert [obj["size"] for obj in tonic.list_objects("bucket")["result"]] == [len(OBJECT_DATA)]
+
+    file_path = str(tmp_path / "object")
+    assert tonic.get_object("bucket", "object", file_path, max_concurrency=3)["status_code"] == 200
+    with open(file_path, "rb") as file:
+        assert file.read() == OBJECT_DATA
+
+    assert tonic.delete_object("bucket", "object")["status_code"] == 200
+    assert not tonic.object_exists("bucket", "object")
+
+def test_fake_server_retries_failed_parts(server, tonic):
+    server.fail_parts[1] = 2
+    assert tonic.put_object("bucket", "object", OBJECT_DATA, part_retries=3)["status_code"] == 200
+    assert server.fail_parts[1] == 0
+    assert server.buckets["bucket"]["object"] == OBJECT_DATA
+
+def test_fake_server_latency_and_bandwidth(tmp_path):
+    with FakeTonicServer(latency=0.05, bandwidth=10 * MB_SIZE) as server:
+        tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+        tonic.create_bucket("bucket")
+        server.buckets["bucket"]["object"] = OBJECT_DATA
+
+        started = time.perf_counter()
+        tonic.get_object("bucket", "object", str(tmp_path / "object"))
+        # one request's latency plus the body at 10MB a second
+        assert time.perf_counter() - started >= 0.05 + len(OBJECT_DATA) / (10 * MB_SIZE)
@@ -0,0 +1,93 @@
+import os
+import time
+import threading
+import pytest
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.throttle import *
+from tonic.testing import FakeTonicServer
+
+OBJECT_DATA = os.urandom(256 * KB_SIZE)
+
+@pytest.fixture
+def server():
+    with FakeTonicServer() as server:
+        server.buckets["bucket"] = {}
+        yield server
+
+def test_throttle_rate():
+    throttle = Throttle(rate=512 * KB_SIZE, burst=64 * KB_SIZE)
+    started = time.perf_counter()
+    # the burst goes straight away, the rest at the rate
+    for _ in range(9):
+        throttle.acquire(64 * KB_SIZE)
+    assert 0.9 <= time.perf_counter() - started < 1.5
+
+    # without a limit nothing waits
+    assert Throttle().rate() is None
+    started = time.perf_counter()
+    Throttle().acquire(GB_SIZE)
+    assert time.perf_counter() - started < 0.1
+
+def test_throttle_set_rate():
+    throttle = Throttle(rate=KB_SIZE, burst=KB_SIZE)
+    throttle.acquire(KB_SIZE)
+    waiter = threading.Thread(target=throttle.acquire, args=(100 * KB_SIZE,))
+    waiter.start()
+    time.sleep(0.1)
+    assert waiter.is_alive()
+
+    # lifting the limit lets the waiting transfer go
+    throttle.set_rate(None)
+    waiter.join(1.0)
+    assert not waiter.is_alive()
+
+    throttle.set_rate(KB_SIZE, operation="put_part")
+    assert throttle.rate("put_part") == KB_SIZE
+    assert throttle.rate("get_object") is None
+
+def test_throttle_priority():
+    throttle = Throttle(rate=100 * KB_SIZE, burst=100 * KB_SIZE)
+    throttle.acquire(100 * KB_SIZE)
+    order = []
+    def acquire(priority):
+        throttle.acquire(100 * KB_SIZE, priority=priority)
+        order.append(priority)
+
+    # the bulk transfer was waiting first, the interactive one still goes ahead
+    bulk = threading.Thread(target=acquire, args=(TRANSFER_PRIORITY.BULK,))
+    bulk.start()
+    time.sleep(0.1)
+    interactive = threading.Thread(target=acquire, args=(TRANSFER_PRIORITY.INTERACTIVE,))
+    interactive.start()
+    bulk.join()
+    interactive.join()
+    assert order == [TRANSFER_PRIORITY.INTERACTIVE, TRANSFER_PRIORITY.BULK]
+
+def test_throttled_transfers(server, tmp_path):
+    throttle = Throttle(operation_rates={"put_part": 256 * KB_SIZE})
+    throttle.set_rate(256 * KB_SIZE, burst=32 * KB_SIZE, operation="put_part")
+    tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret", throttle=throttle)
+
+    # parts go at the upload rate
+    started = time.perf_counter()
+    result = tonic.put_object("bucket", "object", OBJECT_DATA, part_size=64 * KB_SIZE, max_concurrency=4)
+    assert result["status_code"] == 200
+    assert time.perf_counter() - started >= 0.6
+
+    # downloads aren't limited until told to be
+    started = time.perf_counter()
+    assert tonic.get_object("bucket", "object", str(tmp_path / "fast"))["status_code"] == 200
+    assert time.perf_counter() - started < 0.5
+
+    throttle.set_rate(256 * KB_SIZE, burst=32 * KB_SIZE)
+    started = time.perf_counter()
+    assert tonic.get_object("bucket", "object", str(tmp_path / "object"), chunk_size=32 * KB_SIZE, max_concurrency=4, range_size=64 * KB_SIZE)["status_code"] == 200
+    assert time.perf_counter() - started >= 0.6
+    assert (tmp_path / "object").read_bytes() == OBJECT_DATA
+
+    with tonic.get_object_stream("bucket", "object", chunk_size=32 * KB_SIZE, priority=TRANSFER_PRIORITY.INTERACTIVE) as stream:
+        started = time.perf_counter()
+        assert stream.read() == OBJECT_DATA
+        assert time.perf_counter() - started >= 0.6
@@ -0,0 +1,110 @@
+import os
+import time
+import pytest
+import random
+import threading
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.transfer import *
+from tests.config import Config
+
+@pytest.fixture
+def tonic():
+    config_data = Config.get()["testing"]
+    tonic = Tonic(endpoint=config_data["api_endpoint"], access_id=config_data["auth_token_id"], secret_key=config_data["auth_token_secret"])
+    return tonic
+
+def test_scheduler_takes_turns():
+    scheduler = TransferScheduler(max_requests=1)
+    order = []
+    # hold the only worker while the queues fill up
+    gate = threading.Event()
+    scheduler.submit("gate", 0, gate.wait)
+    futures = [scheduler.submit("large", 0, order.append, f"part-{which}") for which in range(3)]
+    futures += [scheduler.submit(f"small-{which}", 0, order.append, f"small-{which}") for which in range(2)]
+    gate.set()
+    for future in futures:
+        future.result()
+    scheduler.shutdown()
+    # the large object's parts don't all go before the small objects
+    assert order == ["part-0", "small-0", "small-1", "part-1", "part-2"]
+
+def test_scheduler_priority():
+    scheduler = TransferScheduler(max_requests=1)
+    order = []
+    gate = threading.Event()
+    scheduler.submit("gate", 0, gate.wait)
+    bulk = scheduler.executor("bulk", TRANSFER_PRIORITY.BULK)
+    interactive = scheduler.executor("interactive", TRANSFER_PRIORITY.INTERACTIVE)
+    futures = [bulk.submit(order.append, f"bulk-{which}") for which in range(2)]
+    futures += [scheduler.submit("normal", 0, order.append, "normal")]
+    futures += [interactive.submit(order.append, "interactive")]
+    gate.set()
+    for future in futures:
+        future.result()
+    scheduler.shutdown()
+    # queued bulk parts wait for everything more urgent
+    assert order == ["interactive", "normal", "bulk-0", "bulk-1"]
+
+def test_scheduler_byte_budget():
+    scheduler = TransferScheduler(max_requests=4, max_bytes=100)
+    peak = 0
+    lock = threading.Lock()
+    def work(data):
+        nonlocal peak
+        with lock:
+            if len(data) < 100:
+                peak = max(peak, scheduler.in_flight_bytes)
+        time.sleep(0.01)
+    executor = scheduler.executor("object")
+    futures = [executor.submit(work, bytes(40)) for _ in range(8)]
+    # bigger than the budget on its own, it still runs
+    futures.append(executor.submit(work, bytes(200)))
+    for future in futures:
+        future.result()
+    scheduler.shutdown()
+    assert 0 < peak <= 100
+
+def test_scheduler_cancel():
+    scheduler = TransferScheduler(max_requests=1)
+    gate = threading.Event()
+    scheduler.submit("gate", 0, gate.wait)
+    future = scheduler.submit("object", 0, lambda: "ran")
+    assert future.cancel()
+    gate.set()
+    scheduler.shutdown()
+    assert future.cancelled()
+    with pytest.raises(RuntimeError):
+        scheduler.submit("object", 0, lambda: None)
+
+def test_transfer_manager(tonic, tmp_path):
+    # create bucket using a random name
+    bucket_name = "s3-bucket-" + str(random.randint(1000, 9999))
+    res = tonic.create_bucket(bucket_name)
+    assert res["status_code"] == 200
+    # lots of small objects and one large one, sharing the scheduler
+    files = [(f"small-{which}.bin", os.urandom(random.randint(0, 4096))) for which in range(50)]
+    large = os.urandom(3 * 1024 * 1024 + 123)
+    progress = []
+    with TransferManager(tonic, max_requests=4, max_bytes=2 * 1024 * 1024) as manager:
+        large_future = manager.upload(bucket_name, "large.bin", large, part_size=512 * 1024, progress=lambda done, total: progress.append((done, total)))
+        futures = manager.upload_many(bucket_name, files)
+        for future in futures + [large_future]:
+            assert future.result()["status_code"] == 200
+        assert progress[-1] == (len(large), len(large))
+        # download them all back
+        downloads = manager.download_many(bucket_name, [(key, str(tmp_path / key)) for key, _ in files + [("large.bin", large)]])
+        for future in downloads:
+            assert future.result()["status_code"] == 200
+        for key, data in files + [("large.bin", large)]:
+            with open(tmp_path / key, "rb") as file:
+                assert file.read() == data
+        # and delete them
+        for future in manager.delete_many(bucket_name, [key for key, _ in files] + ["large.bin"]):
+            assert future.result()["status_code"] == 200
+    res = tonic.list_objects(bucket_name)
+    assert res["result"] == []
+    # delete bucket
+    res = tonic.delete_bucket(bucket_name)
+    assert res["status_code"] == 200
@@ -0,0 +1,66 @@
+import os
+import pytest
+
+from tonic import Tonic
+from tonic.types import *
+from tonic.verify import *
+from tonic.__main__ import main
+from tonic.testing import FakeTonicServer
+
+@pytest.fixture
+def server():
+    with FakeTonicServer() as server:
+        server.buckets["bucket"] = {}
+        yield server
+
+@pytest.fixture
+def local_dir(server, tmp_path):
+    # every file is in the bucket as it is on disk, then a few are made to disagree
+    for which in range(40):
+        data = os.urandom(which * 1000)
+        path = tmp_path / f"dir-{which % 4}" / f"file-{which}.bin"
+        path.parent.mkdir(exist_ok=True)
+        path.write_bytes(data)
+        server.buckets["bucket"][f"backup/dir-{which % 4}/file-{which}.bin"] = data
+    objects = server.buckets["bucket"]
+    objects["backup/dir-1/file-5.bin"] = bytes(len(objects["backup/dir-1/file-5.bin"]))
+    objects["backup/dir-2/file-6.bin"] += b"!"
+    objects["backup/gone.bin"] = b"data"
+    (tmp_path / "dir-3" / "extra.bin").write_bytes(b"data")
+    objects["other/file.bin"] = b"data"
+    return tmp_path
+
+@pytest.mark.parametrize("hash_processes", [1, 2])
+def test_verify_bucket(server, local_dir, hash_processes):
+    tonic = Tonic(endpoint=server.endpoint, access_id="id", secret_key="secret")
+    checked = []
+    mismatches = list(tonic.verify_bucket("bucket", str(local_dir), prefix="backup/", max_requests=8, hash_processes=hash_processes, progress=lambda key, mismatch: checked.append(key)))
+
+    assert {(mismatch.key, mismatch.reason) for mismatch in mismatches} == {
+        ("backup/dir-1/file-5.bin", VerifyMismatch.CHECKSUM),
+        ("backup/dir-2/file-6.bin", VerifyMismatch.SIZE),
+        ("backup/gone.bin", VerifyMismatch.MISSING_LOCAL),
+        ("backup/dir-3/extra.bin", VerifyMismatch.MISSING_REMOTE)
+    }
+    assert len(checked) == 42
+    checksum_mismatch = next(mismatch for mismatch in mismatches if mismatch.reason == VerifyMismatch.CHECKSUM)
+    assert checksum_mismatch.local_checksum != checksum_mismatch.remote_checksum
+
+    # other algorithms agree too, and wrong checksums from the server flag every file but the empty one
+    mismatches = list(tonic.verify_bucket("bucket", str(local_dir / "dir-0"), algorithm=OBJECT_CHECKSUM_ALGORITHMS.SHA1, prefix="backup/dir-0/", hash_processes=hash_processes))
+    assert not mismatches
+    server.corrupt = True
+    mismatches = list(tonic.verify_bucket("bucket", str(local_dir / "dir-0"), prefix="backup/dir-0/", hash_processes=hash_processes))
+    assert len(mismatches) == 9
+    assert all(mismatch.remote_checksum == "00000000" for mismatch in mismatches)
+
+def test_verify_command(server, local_dir, capsys):
+    arguments = ["--endpoint", server.endpoint, "--access-id", "id", "--secret-key", "secret", "verify", "bucket", str(local_dir / "dir-0"), "backup/dir-0/", "--hash-processes", "1"]
+    assert main(arguments) == 0
+    assert "10 checked, 0 mismatched" in capsys.readouterr().out
+
+    server.buckets["bucket"]["backup/dir-0/file-4.bin"] = bytes(4000)
+    assert main(arguments) == 1
+    output = capsys.readouterr().out
+    assert "checksum backup/dir-0/file-4.bin" in output
+    assert "10 checked, 1 mismatched" in output
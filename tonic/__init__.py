@@ -1,5 +1,20 @@
 from .client import Tonic as Tonic
+from .async_client import AsyncTonic as AsyncTonic
 from .classes import *
 from .helpers import *
 from .types import *
-from .exceptions import *
\ No newline at end of file
+from .exceptions import *
+from .streams import *
+from .journal import *
+from .checksum import *
+from .cache import *
+from .transfer import *
+from .sync import *
+from .metrics import *
+from .retry import *
+from .endpoints import *
+from .throttle import *
+from .compression import *
+from .packing import *
+from .index import *
+from .verify import *
\ No newline at end of file
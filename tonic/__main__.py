@@ -0,0 +1,93 @@
+import os
+import sys
+import argparse
+
+from .client import Tonic
+from .types import OBJECT_CHECKSUM_ALGORITHMS
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="tonic")
+    parser.add_argument("--endpoint", default=os.environ.get("TONIC_ENDPOINT"), help="API endpoint, defaults to $TONIC_ENDPOINT")
+    parser.add_argument("--access-id", default=os.environ.get("TONIC_ACCESS_ID"), help="access id, defaults to $TONIC_ACCESS_ID")
+    parser.add_argument("--secret-key", default=os.environ.get("TONIC_SECRET_KEY"), help="secret key, defaults to $TONIC_SECRET_KEY")
+    parser.add_argument("--no-cert-check", action="store_true", help="skip certificate checks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = commands.add_parser("sync", help="upload the files in a directory that changed since the last sync")
+    sync_parser.add_argument("local_dir")
+    sync_parser.add_argument("bucket")
+    sync_parser.add_argument("prefix", nargs="?", default="")
+    sync_parser.add_argument("--delete", action="store_true", help="delete objects under the prefix with no local file")
+    sync_parser.add_argument("--index", dest="index_path", help="path of the sync index, defaults to .tonic-sync.db in the directory")
+    sync_parser.add_argument("--algorithm", choices=[algorithm.value for algorithm in OBJECT_CHECKSUM_ALGORITHMS], default=OBJECT_CHECKSUM_ALGORITHMS.CRC32.value)
+    sync_parser.add_argument("--max-requests", type=int, default=16, help="requests in flight at once")
+    sync_parser.add_argument("--hash-processes", type=int, help="processes hashing changed files, defaults to the cpu count")
+    sync_parser.add_argument("--dry-run", action="store_true", help="report what would change without changing it")
+    sync_parser.add_argument("--verbose", "-v", action="store_true", help="print every object as it's done")
+
+    verify_parser = commands.add_parser("verify", help="check every object under a prefix against the files in a directory")
+    verify_parser.add_argument("bucket")
+    verify_parser.add_argument("local_dir")
+    verify_parser.add_argument("prefix", nargs="?", default="")
+    verify_parser.add_argument("--algorithm", choices=[algorithm.value for algorithm in OBJECT_CHECKSUM_ALGORITHMS], help="defaults to crc32c, or crc32 without the crc32c package")
+    verify_parser.add_argument("--max-requests", type=int, default=32, help="checksum requests in flight at once")
+    verify_parser.add_argument("--hash-processes", type=int, help="processes hashing files, defaults to the cpu count")
+
+    args = parser.parse_args(argv)
+    if args.endpoint is None:
+        parser.error("an endpoint is required, pass --endpoint or set TONIC_ENDPOINT")
+    if args.access_id is None or args.secret_key is None:
+        parser.error("credentials are required, pass --access-id and --secret-key or set TONIC_ACCESS_ID and TONIC_SECRET_KEY")
+
+    tonic = Tonic(endpoint=args.endpoint, access_id=args.access_id, secret_key=args.secret_key, cert_check=not args.no_cert_check)
+    if args.command == "sync":
+        result = tonic.sync(
+            args.local_dir,
+            args.bucket,
+            prefix=args.prefix,
+            delete=args.delete,
+            index_path=args.index_path,
+            algorithm=OBJECT_CHECKSUM_ALGORITHMS(args.algorithm),
+            max_requests=args.max_requests,
+            hash_processes=args.hash_processes,
+            dry_run=args.dry_run,
+            progress=(lambda key, response: print(key, response.get("status_code") if isinstance(response, dict) else response)) if args.verbose else None
+        )
+        if args.dry_run:
+            for key in result.uploaded:
+                print(f"upload {key}")
+            for key in result.deleted:
+                print(f"delete {key}")
+        for key, response in result.failed.items():
+            print(f"failed {key}: {response}", file=sys.stderr)
+        print(f"{len(result.uploaded)} uploaded, {len(result.deleted)} deleted, {result.unchanged} unchanged, {len(result.failed)} failed")
+        return 1 if result.failed else 0
+    if args.command == "verify":
+        # mismatches are printed as they're found, a multi-TB audit shows its problems as it goes
+        verified = 0
+        mismatches = 0
+        def count(key: str, mismatch):
+            nonlocal verified
+            verified += 1
+        for mismatch in tonic.verify_bucket(
+            args.bucket,
+            args.local_dir,
+            algorithm=None if args.algorithm is None else OBJECT_CHECKSUM_ALGORITHMS(args.algorithm),
+            prefix=args.prefix,
+            max_requests=args.max_requests,
+            hash_processes=args.hash_processes,
+            progress=count
+        ):
+            mismatches += 1
+            if mismatch.reason == mismatch.CHECKSUM:
+                print(f"{mismatch.reason} {mismatch.key}: local {mismatch.local_checksum}, remote {mismatch.remote_checksum}", flush=True)
+            elif mismatch.reason == mismatch.ERROR:
+                print(f"{mismatch.reason} {mismatch.key}: {mismatch.error}", flush=True)
+            else:
+                print(f"{mismatch.reason} {mismatch.key}", flush=True)
+        print(f"{verified} checked, {mismatches} mismatched")
+        return 1 if mismatches else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
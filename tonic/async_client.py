@@ -0,0 +1,383 @@
+import os
+import json
+import asyncio
+from typing import AsyncIterator, BinaryIO
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .classes import *
+from .helpers import *
+from .types import *
+from .exceptions import *
+from .streams import BufferReader, open_file_reader
+from .checksum import ObjectChecksum
+from .retry import RetryPolicy
+from .client import API_ROOT
+
+class AsyncObjectStream:
+    """
+    Read-only async view over an object body, read from the connection a chunk at a time.
+    """
+    def __init__(self, response: "aiohttp.ClientResponse", chunk_size: int = STREAM_CHUNK_SIZE):
+        self._response = response
+        self._chunk_size = chunk_size
+
+    @property
+    def response(self) -> "aiohttp.ClientResponse":
+        return self._response
+
+    async def read(self, size: int = -1) -> bytes:
+        return await self._response.content.read(size)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._response.content.iter_chunked(self._chunk_size):
+            yield chunk
+
+    async def close(self):
+        self._response.release()
+
+    async def __aenter__(self) -> "AsyncObjectStream":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+class AsyncTonic:
+    def __init__(self,
+        endpoint: str,
+        access_id: str | None = None,
+        secret_key: str | None = None,
+        region: str | None = None,
+        http_client: "aiohttp.ClientSession | None" = None,
+        cert_check: bool = True,
+        max_connections: int = 100,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 10.0,
+        retry_policy: RetryPolicy | None = None):
+
+        if aiohttp is None:
+            raise ImportError("AsyncTonic requires aiohttp, install it with 'pip install aiohttp'")
+
+        # init
+        self._endpoint = endpoint
+        self._access_id = access_id
+        self._secret_key = secret_key
+        self._region = region
+        self._http_client = http_client
+        self._cert_check = cert_check
+        self._max_connections = max_connections
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._retry_policy = retry_policy or RetryPolicy()
+
+        # define headers
+        self._headers = {
+            'accept': 'application/json',
+            'auth-token': '{"id": "' + self._access_id + '", "token": "' + self._secret_key + '"}'
+        }
+
+    def _get_region(self):
+        pass
+
+    def _get_http_client(self) -> "aiohttp.ClientSession":
+        # the session has to be created inside the running event loop
+        if self._http_client is None:
+            self._http_client = aiohttp.ClientSession(
+                headers=self._headers,
+                connector=aiohttp.TCPConnector(limit=self._max_connections, ssl=None if self._cert_check else False),
+                timeout=aiohttp.ClientTimeout(sock_connect=self._connect_timeout, sock_read=self._read_timeout)
+            )
+        return self._http_client
+
+    async def close(self):
+        if self._http_client is not None:
+            await self._http_client.close()
+            self._http_client = None
+
+    async def __aenter__(self) -> "AsyncTonic":
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def _client_response(self, method: str, url: str, body: bytes | None = None, json: dict | None = None, headers: dict | None = None) -> "aiohttp.ClientResponse":
+        # build url
+        s3_url = build_url(self._endpoint, API_ROOT, url, region=self._get_region())
+
+        # get response, the caller is responsible for releasing it
+        return await self._get_http_client().request(
+            method=method,
+            url=s3_url,
+            data=body,
+            json=json,
+            headers=headers
+        )
+
+    async def _client_json(self, method: str, url: str, body: bytes | None = None, json: dict | None = None) -> tuple[int, json]:
+        async with await self._client_response(method=method, url=url, body=body, json=json) as response:
+            return response.status, await response.json(content_type=None)
+
+    async def client_response(self, method: str, url: str, body: bytes | None = None, json: dict | None = None):
+        _, result = await self._client_json(method=method, url=url, body=body, json=json)
+        return result
+
+    async def create_bucket(self, bucket: str, acl: BUCKET_ACL = BUCKET_ACL.PRIVATE, bucket_locked: bool = False) -> json:
+        _, result = await self._client_json(
+            method="POST",
+            url=f"buckets",
+            json={"name": bucket, "acl": acl.value, "locked": bucket_locked}
+            )
+        return result
+
+    async def list_buckets(self) -> list[Bucket]:
+        _, result = await self._client_json(
+            method="GET",
+            url="buckets"
+            )
+        return result
+
+    async def delete_bucket(self, bucket: str) -> json:
+        _, result = await self._client_json(
+            method="DELETE",
+            url=f"/buckets/name/{bucket}"
+            )
+        return result
+
+    async def _put_object_part(self, upload_id: str, which_part: int, part_data: bytes, part_retries: int = 3, checksum: ObjectChecksum | None = None) -> tuple[int, json]:
+        # crcs are worked out off the loop and stitched together at the end
+        if checksum is not None:
+            await asyncio.to_thread(checksum.update_part, which_part, part_data)
+
+        attempt = 0
+        while True:
+            response = None
+            try:
+                async with await self._client_response(
+                    method="PUT",
+                    url=f"/objects/stream/write/part/{upload_id}/{which_part}/{len(part_data)}",
+                    body=part_data
+                ) as response:
+                    status, result = response.status, await response.json(content_type=None)
+            except aiohttp.ClientConnectionError:
+                # connection level failure, give up once the retries are used
+                if attempt >= part_retries:
+                    raise
+            else:
+                # only throttling and server side errors are worth another try
+                if not self._retry_policy.retryable("PUT", status) or attempt >= part_retries:
+                    return status, result
+            attempt += 1
+
+            # backing off as the sync client does, or for as long as the server's Retry-After asks
+            await asyncio.sleep(self._retry_policy.delay(attempt, response))
+
+    async def _put_object_multipart(self,
+        bucket: str,
+        key: str,
+        data: BinaryIO,
+        length: int,
+        content_type: str = "application/octet-stream",
+        checksum: OBJECT_CHECKSUM_ALGORITHMS | None = None,
+        max_concurrency: int = 1,
+        part_retries: int = 3,
+        part_size: int = MULTIPART_OBJECT_SIZE,
+        memory_budget: int | None = None
+    ) -> json:
+
+        # get the part size and count
+        part_size, part_count = calc_object_parts(length, part_size=part_size, memory_budget=memory_budget, concurrency=max_concurrency)
+        object_checksum = None if checksum is None else ObjectChecksum(checksum)
+
+        # create the multipart object
+        status, result = await self._client_json(
+            method="POST",
+            url=f"/objects/stream/write/new/name/{bucket}",
+            json={
+                "object_name": key,
+                "parts": part_count,
+                "size": length,
+                "content_type": content_type
+            }
+        )
+        if status != 200:
+            return result
+
+        # get the upload id
+        upload_id = result["result"]["upload_id"]
+
+        # keep up to max_concurrency parts in flight, only reading a part when a slot is free
+        max_concurrency = max(1, max_concurrency)
+        which_part = 0
+        in_flight = set()
+        try:
+            while which_part < part_count or in_flight:
+                while which_part < part_count and len(in_flight) < max_concurrency:
+                    # file reads would block the loop, hand them to a thread
+                    part_data = await asyncio.to_thread(data.read, part_size)
+
+                    # hashes can't be combined so they're fed in order as the parts are read
+                    part_checksum = object_checksum
+                    if object_checksum is not None and not object_checksum.combinable:
+                        await asyncio.to_thread(object_checksum.update_part, which_part, part_data)
+                        part_checksum = None
+
+                    # upload the part
+                    in_flight.add(asyncio.create_task(self._put_object_part(upload_id, which_part, part_data, part_retries, part_checksum)))
+
+                    # increment the part
+                    which_part += 1
+
+                # wait for any part to finish
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    status, result = task.result()
+                    if status != 200:
+                        return result
+        finally:
+            # stop whatever is still in flight if the upload failed
+            for task in in_flight:
+                task.cancel()
+
+        # verify the object by comparing the server checksum with the one worked out while uploading
+        server_checksum = None
+        if object_checksum is not None:
+            status, cs_result = await self._client_json(
+                method="GET",
+                url=f"/objects/checksum/name/{checksum.value}/{bucket}/{key}"
+                )
+            if status != 200:
+                return cs_result
+
+            server_checksum = cs_result["result"]
+            local_checksum = object_checksum.hexdigest()
+            if server_checksum != local_checksum:
+                raise ChecksumMismatch(bucket, key, checksum.value, local_checksum, server_checksum)
+
+        # append the checksum to the response
+        result["result"]["sha256"] = None
+        if checksum is not None:
+            result["result"][checksum.value] = server_checksum
+        return result
+
+    async def put_object(self,
+        bucket: str,
+        key: str,
+        file: any = str | BinaryIO,
+        content_type: str = "application/octet-stream",
+        verify_sha256: bool = False,
+        max_concurrency: int = 1,
+        part_retries: int = 3,
+        part_size: int = MULTIPART_OBJECT_SIZE,
+        memory_budget: int | None = None,
+        checksum: OBJECT_CHECKSUM_ALGORITHMS | None = None,
+        zero_copy: bool = True
+    ) -> json:
+
+        # verify_sha256 is shorthand for a sha256 checksum
+        if verify_sha256 and checksum is None:
+            checksum = OBJECT_CHECKSUM_ALGORITHMS.SHA256
+
+        # check if file is a string, then it's a file path... otherwise it's a file data
+        file_path = None
+        file_data = None
+        if isinstance(file, str):
+            file_path = file
+        elif isinstance(file, (bytes, bytearray, memoryview)):
+            # bytes-like data is sent in slices, without copying
+            file_data = BufferReader(file)
+        else:
+            file_data = file
+
+        if file_path is not None:
+            # make sure file exists
+            if not os.path.exists(file_path):
+                raise FileNotFoundError(f"File '{file_path}' not found")
+
+            # get file size
+            file_size = os.stat(file_path).st_size
+
+            # open the file and upload it, mapped into memory where possible so parts aren't copied
+            with open_file_reader(file_path, zero_copy) as file_data:
+                result = await self._put_object_multipart(
+                    bucket=bucket,
+                    key=key,
+                    data=file_data,
+                    length=file_size,
+                    content_type=content_type,
+                    checksum=checksum,
+                    max_concurrency=max_concurrency,
+                    part_retries=part_retries,
+                    part_size=part_size,
+                    memory_budget=memory_budget
+                )
+        elif file_data is not None:
+            # get file data
+            file_data.seek(0, os.SEEK_END)
+            file_size = file_data.tell()
+            file_data.seek(0)
+
+            # upload the file
+            result = await self._put_object_multipart(
+                bucket=bucket,
+                key=key,
+                data=file_data,
+                length=file_size,
+                content_type=content_type,
+                checksum=checksum,
+                max_concurrency=max_concurrency,
+                part_retries=part_retries,
+                part_size=part_size,
+                memory_budget=memory_budget
+            )
+        else:
+            raise ValueError("File path or file data is required")
+
+        return result
+
+    async def list_objects(self, bucket: str) -> list[Object]:
+        _, result = await self._client_json(
+            method="GET",
+            url=f"/objects/bucket/name/{bucket}"
+            )
+        return result
+
+    async def get_object_checksum(self, bucket: str, key: str, algorithm: OBJECT_CHECKSUM_ALGORITHMS) -> str:
+        _, result = await self._client_json(
+            method="GET",
+            url=f"/objects/checksum/name/{algorithm.value}/{bucket}/{key}"
+            )
+        return result
+
+    async def get_object(self, bucket: str, key: str, file_path: str, chunk_size: int = STREAM_CHUNK_SIZE) -> json:
+        async with await self._client_response(
+            method="GET",
+            url=f"/objects/stream/read/name/{bucket}/{key}"
+            ) as response:
+
+            if response.status != 200:
+                return await response.json(content_type=None)
+
+            # write the file a chunk at a time, disk writes are handed to a thread so the loop keeps running
+            with open(file_path, "wb") as file:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    await asyncio.to_thread(file.write, chunk)
+
+        return {
+            "status_code": response.status,
+        }
+
+    async def get_object_stream(self, bucket: str, key: str, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncObjectStream:
+        response = await self._client_response(
+            method="GET",
+            url=f"/objects/stream/read/name/{bucket}/{key}"
+            )
+
+        if response.status != 200:
+            await response.read()
+            response.release()
+            raise PopBadResponse(response)
+
+        return AsyncObjectStream(response, chunk_size=chunk_size)
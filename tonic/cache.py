@@ -0,0 +1,270 @@
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+import contextlib
+from collections import OrderedDict
+from typing import Any, Hashable
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .types import *
+
+class MetadataCache:
+    """
+    In-process cache of bucket and object listings, with a TTL and a size-bounded LRU.
+    Object entries are keyed by bucket so writes to one bucket leave the others cached.
+    """
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "entries": len(self._entries)}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def update(self, key: Hashable, update):
+        # change a cached value in place, leaving its expiry as it was
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                update(entry[1])
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_bucket(self, bucket: str):
+        # drop every entry scoped to the bucket, keys are tuples with the bucket second
+        with self._lock:
+            for key in [key for key in self._entries if isinstance(key, tuple) and len(key) > 1 and key[1] == bucket]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class ObjectCache:
+    """
+    Read-through cache of downloaded objects in a local directory, bounded in bytes with the least
+    recently used objects evicted first. Entries are named by the checksum of their contents and
+    every change lands with an atomic rename, so several processes can share one directory.
+    """
+    # temp files older than this were left behind by a process that died mid-download
+    STALE_TEMP_AGE = 3600.0
+
+    def __init__(self,
+        directory: str,
+        max_size: int,
+        algorithm: OBJECT_CHECKSUM_ALGORITHMS = OBJECT_CHECKSUM_ALGORITHMS.CRC32,
+        ttl: float | None = None,
+        link: bool = False):
+
+        self._directory = directory
+        self._temp_directory = os.path.join(directory, "tmp")
+        self._max_size = max_size
+        self._algorithm = algorithm
+        self._ttl = ttl
+        self._link = link
+        self._hits = 0
+        self._misses = 0
+        os.makedirs(self._temp_directory, exist_ok=True)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    @property
+    def algorithm(self) -> OBJECT_CHECKSUM_ALGORITHMS:
+        return self._algorithm
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # serialises commits and eviction between processes, lookups never wait on it
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self._directory, ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _key_directory(self, bucket: str, key: str) -> str:
+        digest = hashlib.sha256(f"{bucket}\0{key}".encode()).hexdigest()
+        return os.path.join(self._directory, digest[:2], digest)
+
+    def path(self, bucket: str, key: str, checksum: str) -> str | None:
+        # checksums become file names, so anything that isn't plain hex is never cached
+        if not checksum or not checksum.isalnum():
+            return None
+        return os.path.join(self._key_directory(bucket, key), checksum)
+
+    def lookup(self, bucket: str, key: str) -> str | None:
+        # the most recently validated copy of the object, if there is one
+        try:
+            with os.scandir(self._key_directory(bucket, key)) as entries:
+                newest = max(entries, key=lambda entry: entry.stat().st_mtime, default=None)
+        except FileNotFoundError:
+            return None
+        return None if newest is None else newest.path
+
+    def fresh(self, path: str) -> bool:
+        # the modified time records when the entry was last checked against the server
+        if self._ttl is None:
+            return False
+        try:
+            return time.time() - os.stat(path).st_mtime < self._ttl
+        except FileNotFoundError:
+            return False
+
+    def _deliver(self, path: str, file_path: str, validated: bool):
+        delivered = False
+        if self._link:
+            temp_path = f"{file_path}.tonic-link"
+            try:
+                os.link(path, temp_path)
+                os.replace(temp_path, file_path)
+                delivered = True
+            except FileNotFoundError:
+                raise
+            except OSError:
+                # other file systems and devices can't be linked across, copy instead
+                pass
+        if not delivered:
+            shutil.copyfile(path, file_path)
+
+        # the access time orders eviction, the modified time is bumped only when revalidated
+        now = time.time()
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path, (now, now if validated else os.stat(path).st_mtime))
+
+    def deliver(self, path: str, file_path: str, validated: bool = False):
+        """
+        Copy or link a cached entry to file_path, raising FileNotFoundError if it was evicted meanwhile.
+        """
+        self._deliver(path, file_path, validated)
+        self._hits += 1
+
+    def temp_path(self) -> str:
+        fd, temp_path = tempfile.mkstemp(dir=self._temp_directory)
+        os.close(fd)
+        return temp_path
+
+    def commit(self, bucket: str, key: str, checksum: str, temp_path: str, file_path: str):
+        """
+        Move a downloaded object into the cache under its checksum and deliver it to file_path,
+        then evict down to max_size.
+        """
+        path = self.path(bucket, key, checksum)
+        self._misses += 1
+        if path is None or os.path.getsize(temp_path) > self._max_size:
+            # too big to ever fit, it's handed over without being kept
+            shutil.move(temp_path, file_path)
+            return
+
+        with self._locked():
+            key_directory = os.path.dirname(path)
+            os.makedirs(key_directory, exist_ok=True)
+            os.replace(temp_path, path)
+
+            # older copies of the object won't be served again
+            for name in os.listdir(key_directory):
+                if name != checksum:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.remove(os.path.join(key_directory, name))
+
+            # delivered before eviction so the entry can't be dropped from under it
+            self._deliver(path, file_path, validated=True)
+            self._evict(keep=path)
+
+    def invalidate(self, bucket: str, key: str):
+        with self._locked():
+            with contextlib.suppress(FileNotFoundError):
+                shutil.rmtree(self._key_directory(bucket, key))
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for fanout in os.scandir(self._directory):
+            if not fanout.is_dir() or fanout.path == self._temp_directory:
+                continue
+            for key_directory in os.scandir(fanout.path):
+                for entry in os.scandir(key_directory.path):
+                    with contextlib.suppress(FileNotFoundError):
+                        stat = entry.stat()
+                        entries.append((stat.st_atime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self, keep: str | None = None):
+        # drop least recently used entries until the cache fits, the entry just added always stays
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self._max_size:
+                break
+            if path == keep:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            with contextlib.suppress(OSError):
+                os.rmdir(os.path.dirname(path))
+            total -= size
+
+        # clear out downloads abandoned by processes that died
+        now = time.time()
+        for entry in os.scandir(self._temp_directory):
+            with contextlib.suppress(FileNotFoundError):
+                if now - entry.stat().st_mtime > self.STALE_TEMP_AGE:
+                    os.remove(entry.path)
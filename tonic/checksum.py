@@ -0,0 +1,157 @@
+import os
+import zlib
+import mmap
+import hashlib
+import functools
+from typing import BinaryIO
+
+try:
+    import crc32c
+except ImportError:
+    crc32c = None
+
+from .types import *
+
+CRC32_POLYNOMIAL = 0xEDB88320
+CRC32C_POLYNOMIAL = 0x82F63B78
+
+def _gf2_times(matrix: tuple[int, ...], vector: int) -> int:
+    total = 0
+    row = 0
+    while vector:
+        if vector & 1:
+            total ^= matrix[row]
+        vector >>= 1
+        row += 1
+    return total
+
+def _gf2_square(matrix: tuple[int, ...]) -> tuple[int, ...]:
+    return tuple(_gf2_times(matrix, matrix[row]) for row in range(32))
+
+@functools.lru_cache(maxsize=64)
+def _crc_shift_operator(polynomial: int, length: int) -> tuple[int, ...]:
+    # operator that moves a crc past length zero bytes, as in zlib's crc32_combine
+    odd = (polynomial,) + tuple(1 << row for row in range(31))
+    even = _gf2_square(odd)
+    odd = _gf2_square(even)
+    operator = tuple(1 << row for row in range(32))
+    while True:
+        even = _gf2_square(odd)
+        if length & 1:
+            operator = tuple(_gf2_times(even, operator[row]) for row in range(32))
+        length >>= 1
+        if not length:
+            break
+        odd = _gf2_square(even)
+        if length & 1:
+            operator = tuple(_gf2_times(odd, operator[row]) for row in range(32))
+        length >>= 1
+        if not length:
+            break
+    return operator
+
+def crc_combine(crc1: int, crc2: int, length2: int, polynomial: int = CRC32_POLYNOMIAL) -> int:
+    """
+    Combine the crc of two blocks into the crc of both, given the length of the second block.
+    """
+    if length2 <= 0:
+        return crc1
+    return _gf2_times(_crc_shift_operator(polynomial, length2), crc1) ^ crc2
+
+class ObjectChecksum:
+    """
+    Checksum of an object built up from its parts while they're being uploaded.
+    CRCs are combinable, so their parts can be added from any thread in any order.
+    Hashes are not, so their parts have to be added in order.
+    """
+    def __init__(self, algorithm: OBJECT_CHECKSUM_ALGORITHMS):
+        if algorithm == OBJECT_CHECKSUM_ALGORITHMS.CRC32C and crc32c is None:
+            raise ImportError("crc32c checksums require the crc32c package, install it with 'pip install crc32c'")
+        self._algorithm = algorithm
+        self._parts = {}
+        self._hash = None
+        self._next_part = 0
+        if not self.combinable:
+            self._hash = hashlib.new(algorithm.value)
+
+    @property
+    def algorithm(self) -> OBJECT_CHECKSUM_ALGORITHMS:
+        return self._algorithm
+
+    @property
+    def combinable(self) -> bool:
+        return self._algorithm in (OBJECT_CHECKSUM_ALGORITHMS.CRC32, OBJECT_CHECKSUM_ALGORITHMS.CRC32C)
+
+    def update_part(self, which_part: int, data: bytes):
+        if self._algorithm == OBJECT_CHECKSUM_ALGORITHMS.CRC32:
+            self._parts[which_part] = (zlib.crc32(data), len(data))
+        elif self._algorithm == OBJECT_CHECKSUM_ALGORITHMS.CRC32C:
+            self._parts[which_part] = (crc32c.crc32c(data), len(data))
+        else:
+            if which_part != self._next_part:
+                raise ValueError(f"{self._algorithm.value} parts must be added in order, expected part {self._next_part} got {which_part}")
+            self._hash.update(data)
+            self._next_part += 1
+
+    def hexdigest(self) -> str:
+        if self._hash is not None:
+            return self._hash.hexdigest()
+
+        # stitch the part crcs together in part order
+        polynomial = CRC32_POLYNOMIAL if self._algorithm == OBJECT_CHECKSUM_ALGORITHMS.CRC32 else CRC32C_POLYNOMIAL
+        value = 0
+        for which_part in sorted(self._parts):
+            part_crc, part_length = self._parts[which_part]
+            value = crc_combine(value, part_crc, part_length, polynomial)
+        return f"{value & 0xFFFFFFFF:08x}"
+
+def cheapest_checksum_algorithm() -> OBJECT_CHECKSUM_ALGORITHMS:
+    """
+    The quickest checksum to work out locally, crc32c where the crc32c package is installed and crc32 otherwise.
+    """
+    return OBJECT_CHECKSUM_ALGORITHMS.CRC32 if crc32c is None else OBJECT_CHECKSUM_ALGORITHMS.CRC32C
+
+def stream_checksum(file: BinaryIO, algorithm: OBJECT_CHECKSUM_ALGORITHMS, chunk_size: int = STREAM_CHUNK_SIZE) -> str:
+    """
+    Checksum of what's left to read in a file object, in the same form the server reports for an object.
+    """
+    checksum = ObjectChecksum(algorithm)
+    which_part = 0
+    while len(chunk := file.read(chunk_size)):
+        checksum.update_part(which_part, chunk)
+        which_part += 1
+    return checksum.hexdigest()
+
+def file_checksum(file_path: str, algorithm: OBJECT_CHECKSUM_ALGORITHMS, chunk_size: int = STREAM_CHUNK_SIZE) -> str:
+    """
+    Checksum of a local file in the same form the server reports for an object.
+    """
+    with open(file_path, "rb") as file:
+        return stream_checksum(file, algorithm, chunk_size)
+
+
+def mapped_file_checksum(file_path: str, algorithm: OBJECT_CHECKSUM_ALGORITHMS, chunk_size: int = 16 * MB_SIZE) -> str:
+    """
+    Checksum of a local file read through a memory map in large sequential slices, with the kernel told to
+    read ahead, for hashing big files at disk speed without copying them. Falls back to reads where mapping
+    isn't possible.
+    """
+    with open(file_path, "rb") as file:
+        if not os.fstat(file.fileno()).st_size:
+            return ObjectChecksum(algorithm).hexdigest()
+        try:
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return stream_checksum(file, algorithm, chunk_size)
+
+    with mapped:
+        if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        checksum = ObjectChecksum(algorithm)
+        view = memoryview(mapped)
+        try:
+            for which_part, start in enumerate(range(0, len(view), chunk_size)):
+                checksum.update_part(which_part, view[start:start + chunk_size])
+        finally:
+            view.release()
+        return checksum.hexdigest()
\ No newline at end of file
@@ -1,5 +1,16 @@
 from datetime import datetime
 
+def parse_datetime(value: str | int | float | None) -> datetime | None:
+    # the api hands dates back as iso strings, older servers as unix timestamps
+    if value is None:
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value)
+        return datetime.fromisoformat(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
 class Bucket:
     def __init__(self, name: str, creation_date: datetime | None = None):
         self._name = name
@@ -30,9 +41,20 @@ class Bucket:
         return hash(self.name)
 
 class Object:
-    def __init__(self, name: str, creation_date: datetime | None = None):
+    def __init__(self, name: str, creation_date: datetime | None = None, size: int | None = None, checksum: str | None = None):
         self._name = name
         self._creation_date = creation_date
+        self._size = size
+        self._checksum = checksum
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Object":
+        return cls(
+            name=data["name"],
+            creation_date=parse_datetime(data.get("creation_date")),
+            size=data.get("size"),
+            checksum=data.get("checksum")
+        )
 
     @property
     def name(self) -> str:
@@ -42,6 +64,14 @@ class Object:
     def creation_date(self) -> datetime | None:
         return self._creation_date
 
+    @property
+    def size(self) -> int | None:
+        return self._size
+
+    @property
+    def checksum(self) -> str | None:
+        return self._checksum
+
     def __repr__(self) -> str:
         return f"{type(self).__name__}('{self.name}')"
 
@@ -49,7 +79,7 @@ class Object:
         return self.name
 
     def __eq__(self, other) -> bool | NotImplementedError:
-        if isinstance(other, Bucket):
+        if isinstance(other, Object):
             return self.name == other.name
         if isinstance(other, str):
             return self.name == other
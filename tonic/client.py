@@ -1,23 +1,59 @@
 import os
 import json
+import time
+import shutil
+import tempfile
 import urllib3
-from typing import BinaryIO
+import functools
+import contextlib
+import threading
+from urllib.parse import quote
+from concurrent.futures import Executor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import BinaryIO, Callable, Iterator
 
 from .classes import *
 from .helpers import *
 from .types import *
 from .exceptions import *
+from .streams import ObjectStream, BufferReader, IterableReader, PartBufferPool, open_file_reader
+from .journal import UploadJournal
+from .checksum import ObjectChecksum, file_checksum, stream_checksum, cheapest_checksum_algorithm
+from .cache import MetadataCache, ObjectCache
+from .sync import SyncResult, sync_directory
+from .verify import VerifyMismatch, verify_directory
+from .metrics import RequestObserver, RequestInfo, PartInfo
+from .retry import RetryPolicy, HedgePolicy
+from .endpoints import Endpoint, EndpointSelector
+from .throttle import Throttle
+from .index import ObjectIndex
+from .compression import Decompressor, compress_stream, content_encoding_compression, detect_compression
 
 API_ROOT = "/api/v1"
 
 class Tonic:
+    """
+    Client for the API. One Tonic can be shared by any number of threads, the connection pool and the caches
+    are thread safe and every call keeps its state to itself. Give the pool at least as many connections as
+    threads making requests, otherwise connections are dropped after use and opened again.
+    """
     def __init__(self,
-        endpoint: str,
+        endpoint: str | list[str] | EndpointSelector,
         access_id: str | None = None,
         secret_key: str | None = None,
-        region: str | None = None,
+        region: str | list[str] | None = None,
         http_client: urllib3.PoolManager | None = None,
-        cert_check: bool = True):
+        cert_check: bool = True,
+        metadata_cache: MetadataCache | None = None,
+        object_cache: ObjectCache | None = None,
+        pool_maxsize: int = 32,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        connect_timeout: float = 10.0,
+        read_timeout: float = 10.0,
+        observers: list[RequestObserver] | None = None,
+        retry_policy: RetryPolicy | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        throttle: Throttle | None = None):
 
         # init
         self._endpoint = endpoint
@@ -26,41 +62,151 @@ class Tonic:
         self._region = region
         self._http_client = http_client
         self._cert_check = cert_check
+        self._metadata_cache = metadata_cache
+        self._object_cache = object_cache
+        self._object_indexes = {}
+        self._object_indexes_lock = threading.Lock()
+        self._timeout = urllib3.Timeout(connect=connect_timeout, read=read_timeout)
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._retries = self._retry_policy.urllib3_retry()
+        self._connect_retries = self._retry_policy.connect_retry()
+        self._failover_retries = self._retry_policy.failover_retry()
+        self._hedge_policy = hedge_policy
+        self._throttle = throttle
+        self._observers = tuple(observers or ())
 
         # define headers
-        headers = {
+        self._headers = {
             'accept': 'application/json',
             'auth-token': '{"id": "' + self._access_id + '", "token": "' + self._secret_key + '"}',
             'Content-Type': 'application/json'
         }
+        if not keep_alive:
+            self._headers['Connection'] = 'close'
 
-        # get client
-        self._http_client = urllib3.PoolManager(headers=headers, cert_reqs='CERT_REQUIRED' if self._cert_check else 'CERT_NONE')
+        # the endpoints, each with its base url worked out once rather than on every request
+        if isinstance(endpoint, EndpointSelector):
+            self._endpoint_selector = endpoint
+        else:
+            endpoints = [endpoint] if isinstance(endpoint, str) else list(endpoint)
+            regions = [region] if region is None or isinstance(region, str) else list(region)
+            self._endpoint_selector = EndpointSelector(endpoints, regions, api_root=API_ROOT)
 
-    def _get_region(self):
-        pass
+        # with one endpoint there's nothing to choose between or keep track of
+        endpoints = self._endpoint_selector.endpoints
+        self._single_endpoint = endpoints[0] if len(endpoints) == 1 else None
 
-    def _client_response(self, method: str, url: str, body: bytes | None = None, json: dict | None = None):
-        # build url
-        region = self._get_region()
-        if region is None:
-            s3_url = f"{self._endpoint}/{API_ROOT}/{url}"
-        else:
-            s3_url = f"{region}-{self._endpoint}/{API_ROOT}/{url}"
-
-        # make sure url is clean
-        s3_url = s3_url.replace("://", ":/_/_").replace("//", "/").replace(":/_/_", "://")
-
-        # get response
-        response = self._http_client.request(
-            method=method,
-            url=s3_url,
-            body=body,
-            json=json,
-            assert_same_host=True,
-            timeout=urllib3.Timeout(connect=10.0, read=10.0),
-            retries=urllib3.Retry(3)
-        )
+        # get client, an injected one is used as it is
+        if self._http_client is None:
+            pool_options = {"socket_options": keep_alive_socket_options()} if keep_alive else {}
+            self._http_client = urllib3.PoolManager(
+                headers=self._headers,
+                cert_reqs='CERT_REQUIRED' if self._cert_check else 'CERT_NONE',
+                maxsize=pool_maxsize,
+                block=pool_block,
+                **pool_options
+            )
+
+    @property
+    def http_client(self) -> urllib3.PoolManager:
+        return self._http_client
+
+    @property
+    def endpoint_selector(self) -> EndpointSelector:
+        return self._endpoint_selector
+
+    def _get_region(self) -> str | None:
+        return (self._single_endpoint or self._endpoint_selector.preferred()).region
+
+    def _choose_endpoint(self) -> Endpoint:
+        return self._single_endpoint or self._endpoint_selector.choose()
+
+    def add_observer(self, observer: RequestObserver):
+        # swapped rather than changed in place, so threads mid-request keep a consistent set
+        self._observers = self._observers + (observer,)
+
+    def remove_observer(self, observer: RequestObserver):
+        self._observers = tuple(registered for registered in self._observers if registered is not observer)
+
+    def _send(self, endpoint: Endpoint, method: str, url: str, body: bytes | None, json: dict | None, headers: dict | None, preload_content: bool, retries: urllib3.Retry):
+        if self._single_endpoint is not None:
+            return self._http_client.request(
+                method=method,
+                url=endpoint.request_url(url),
+                body=body,
+                json=json,
+                headers=headers,
+                assert_same_host=True,
+                timeout=self._timeout,
+                retries=retries,
+                preload_content=preload_content
+            )
+
+        # each endpoint's latency and errors decide where the next requests go
+        started = time.perf_counter()
+        try:
+            response = self._http_client.request(
+                method=method,
+                url=endpoint.request_url(url),
+                body=body,
+                json=json,
+                headers=headers,
+                assert_same_host=True,
+                timeout=self._timeout,
+                retries=retries,
+                preload_content=preload_content
+            )
+        except Exception:
+            self._endpoint_selector.record(endpoint, time.perf_counter() - started, False)
+            raise
+        self._endpoint_selector.record(endpoint, time.perf_counter() - started, response.status < 500)
+        return response
+
+    def _send_with_failover(self, method: str, url: str, body: bytes | None, json: dict | None, headers: dict | None, preload_content: bool, retries: urllib3.Retry):
+        # reads move on to the next best endpoint when one fails, the last one left gets the full retries
+        tried = []
+        while True:
+            endpoint = self._endpoint_selector.choose(tried)
+            tried.append(endpoint)
+            last = len(tried) == len(self._endpoint_selector.endpoints)
+            try:
+                response = self._send(endpoint, method, url, body, json, headers, preload_content, retries if last else self._failover_retries)
+            except urllib3.exceptions.HTTPError:
+                if last:
+                    raise
+                continue
+            if last or response.status not in self._retry_policy.retry_statuses:
+                return response
+            response.drain_conn()
+            response.release_conn()
+
+    def _client_response(self, method: str, url: str, body: bytes | None = None, json: dict | None = None, headers: dict | None = None, preload_content: bool = True, retries: urllib3.Retry | None = None, endpoint: Endpoint | None = None):
+        # with nobody watching there's nothing to time
+        observers = self._observers
+        if observers:
+            request = RequestInfo(method, url, len(body) if body is not None else 0)
+            for observer in observers:
+                observer.on_request_start(request)
+
+        # get response, from the endpoint asked for or the best one going
+        headers = self._headers if headers is None else {**self._headers, **headers}
+        retries = self._retries if retries is None else retries
+        try:
+            if endpoint is None and self._single_endpoint is None and method in ("GET", "HEAD"):
+                response = self._send_with_failover(method, url, body, json, headers, preload_content, retries)
+            else:
+                response = self._send(endpoint or self._choose_endpoint(), method, url, body, json, headers, preload_content, retries)
+        except Exception as e:
+            if observers:
+                request.finish(error=e)
+                for observer in observers:
+                    observer.on_request_end(request)
+            raise
+
+        if observers:
+            request.finish(response=response)
+            for observer in observers:
+                observer.on_request_end(request)
 
         # check response
         return response
@@ -68,134 +214,506 @@ class Tonic:
     def client_response(self, method: str, url: str, body: bytes | None = None, json: dict | None = None):
         return self._client_response(method=method, url=url, body=body, json=json).json()
 
+    def _hedged_response(self, operation: str, **kwargs):
+        # requests that run past the usual latency get a second copy when hedging is on
+        if self._hedge_policy is None:
+            return self._client_response(**kwargs)
+        return self._hedge_policy.run(operation, functools.partial(self._client_response, **kwargs))
+
+    @property
+    def metadata_cache(self) -> MetadataCache | None:
+        return self._metadata_cache
+
+    @property
+    def object_cache(self) -> ObjectCache | None:
+        return self._object_cache
+
+    @property
+    def throttle(self) -> Throttle | None:
+        return self._throttle
+
+    def object_index(self, bucket: str, refresh: bool = False) -> ObjectIndex:
+        """
+        Sorted index of the bucket's object names for prefix, delimiter and range queries, built from a listing
+        the first time it's asked for (or on refresh) and kept current by this client's uploads and deletes.
+        """
+        with self._object_indexes_lock:
+            index = None if refresh else self._object_indexes.get(bucket)
+            if index is None:
+                index = ObjectIndex.load(self, bucket)
+                self._object_indexes[bucket] = index
+            return index
+
     def create_bucket(self, bucket: str, acl: BUCKET_ACL = BUCKET_ACL.PRIVATE, bucket_locked: bool = False) -> json:
         response = self._client_response(
             method="POST",
             url=f"buckets",
             json={"name": bucket, "acl": acl.value, "locked": bucket_locked}
             )
+
+        # the bucket listing is stale, but the bucket is known to exist
+        if self._metadata_cache is not None and response.status == 200:
+            self._metadata_cache.invalidate(("buckets",))
+            self._metadata_cache.update(("bucket_names",), lambda names: names.add(bucket))
         return response.json()
 
     def list_buckets(self)-> list[Bucket]:
+        # cached listings are shared, so they shouldn't be changed
+        if self._metadata_cache is not None:
+            result = self._metadata_cache.get(("buckets",))
+            if result is not None:
+                return result
+
         response = self._client_response(
             method="GET",
             url="buckets"
             )
-        return response.json()
+        result = response.json()
+        if self._metadata_cache is not None and response.status == 200:
+            self._metadata_cache.set(("buckets",), result)
+        return result
+
+    def bucket_exists(self, bucket: str) -> bool:
+        names = None if self._metadata_cache is None else self._metadata_cache.get(("bucket_names",))
+        if names is None:
+            result = self.list_buckets()
+            if result.get("status_code") != 200:
+                raise ValueError(f"could not list buckets: {result.get('message')}")
+            names = {item["name"] for item in result["result"]}
+            if self._metadata_cache is not None:
+                self._metadata_cache.set(("bucket_names",), names)
+        return bucket in names
 
     def delete_bucket(self, bucket: str) -> json:
         response = self._client_response(
             method="DELETE",
             url=f"/buckets/name/{bucket}"
             )
+
+        # drop the bucket and everything cached under it
+        if self._metadata_cache is not None and response.status == 200:
+            self._metadata_cache.invalidate(("buckets",))
+            self._metadata_cache.update(("bucket_names",), lambda names: names.discard(bucket))
+            self._metadata_cache.invalidate_bucket(bucket)
+        if response.status == 200:
+            with self._object_indexes_lock:
+                self._object_indexes.pop(bucket, None)
         return response.json()
 
+    def _put_object_part(self, upload_id: str, which_part: int, part_data: bytes, part_retries: int = 3, checksum: ObjectChecksum | None = None, endpoint: Endpoint | None = None, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL):
+        started = time.perf_counter()
+
+        # crcs are worked out here on the upload thread and stitched together at the end
+        if checksum is not None:
+            checksum.update_part(which_part, part_data)
+
+        # parts are retried here rather than in urllib3 so each attempt can be hedged and counted
+        attempt = 0
+        while True:
+            # every attempt sends the part again, so each waits its turn for bandwidth
+            if self._throttle is not None:
+                self._throttle.acquire(len(part_data), "put_part", priority)
+            try:
+                response = self._hedged_response(
+                    "put_part",
+                    method="PUT",
+                    url=f"/objects/stream/write/part/{upload_id}/{which_part}/{len(part_data)}",
+                    body=part_data,
+                    retries=self._connect_retries,
+                    endpoint=endpoint
+                )
+            except urllib3.exceptions.HTTPError:
+                # connection level failure, give up once the retries are used
+                if attempt >= part_retries:
+                    raise
+                response = None
+            else:
+                # only throttling and server side errors are worth another try
+                if not self._retry_policy.retryable("PUT", response.status) or attempt >= part_retries:
+                    break
+            attempt += 1
+            time.sleep(self._retry_policy.delay(attempt, response))
+
+        if self._observers:
+            part = PartInfo(upload_id, which_part, len(part_data), time.perf_counter() - started, attempt + 1, response.status)
+            for observer in self._observers:
+                observer.on_part_complete(part)
+        return response
+
     def _put_object_multipart(self,
         bucket: str,
         key: str,
         data: BinaryIO,
         length: int,
         content_type: str = "application/octet-stream",
-        verify_sha256: bool = False
+        checksum: OBJECT_CHECKSUM_ALGORITHMS | None = None,
+        max_concurrency: int = 1,
+        part_retries: int = 3,
+        part_size: int = MULTIPART_OBJECT_SIZE,
+        memory_budget: int | None = None,
+        journal: UploadJournal | None = None,
+        mtime: float | None = None,
+        executor: Executor | None = None,
+        progress: Callable[[int], None] | None = None,
+        content_encoding: str | None = None,
+        priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL,
+        replace: bool = False
     ) -> json:
 
         # get the part size and count
-        part_size, part_count = calc_object_parts(length)
+        part_size, part_count = calc_object_parts(length, part_size=part_size, memory_budget=memory_budget, concurrency=max_concurrency)
         uploaded = 0
         which_part = 0
         upload_id = None
+        response = None
+        object_checksum = None if checksum is None else ObjectChecksum(checksum)
 
-        # create the multipart object
-        response = self._client_response(
-            method="POST",
-            url=f"/objects/stream/write/new/name/{bucket}",
-            json={
+        # the upload is only known where it was started, so every request for it goes to the same endpoint
+        endpoint = self._choose_endpoint()
+
+        if journal is not None and journal.matches(bucket, key, length, part_size, mtime=mtime):
+            # carry on with the interrupted upload
+            upload_id = journal.upload_id
+        else:
+            # create the multipart object, compressed objects say so the way http would
+            create_request = {
                 "object_name": key,
                 "parts": part_count,
                 "size": length,
                 "content_type": content_type
             }
-        )
-        if response.status != 200:
-            return response.json()
-
-        # get the upload id
-        upload_id = response.json()["result"]["upload_id"]
-
-        # loop for each part
-        while which_part < part_count:
-            part_data = data.read(part_size)
-            upload_size = len(part_data)
-            uploaded += len(part_data)
-
-            # upload the part
+            if content_encoding is not None:
+                create_request["content_encoding"] = content_encoding
             response = self._client_response(
-                method="PUT",
-                url=f"/objects/stream/write/part/{upload_id}/{which_part}/{upload_size}",
-                body=part_data
+                method="POST",
+                url=f"/objects/stream/write/new/name/{bucket}",
+                json=create_request,
+                endpoint=endpoint
             )
+            if response.status == 409 and replace:
+                # objects can't be overwritten, so the old one is deleted and the upload starts again in its place,
+                # nothing has been read yet, a failed upload leaves the key missing until it's uploaded again
+                deleted = self.delete_object(bucket, key)
+                if deleted.get("status_code") not in (200, 404):
+                    return deleted
+                return self._put_object_multipart(
+                    bucket=bucket,
+                    key=key,
+                    data=data,
+                    length=length,
+                    content_type=content_type,
+                    checksum=checksum,
+                    max_concurrency=max_concurrency,
+                    part_retries=part_retries,
+                    part_size=part_size,
+                    memory_budget=memory_budget,
+                    journal=journal,
+                    mtime=mtime,
+                    executor=executor,
+                    progress=progress,
+                    content_encoding=content_encoding,
+                    priority=priority
+                )
             if response.status != 200:
                 return response.json()
 
-            # increment the part
-            which_part += 1
+            # get the upload id
+            upload_id = response.json()["result"]["upload_id"]
+            if journal is not None:
+                journal.start(bucket, key, upload_id, length, part_size, mtime=mtime)
+
+        # keep up to max_concurrency parts in flight, only reading a part when a slot is free,
+        # on a shared executor when given one so parts queue alongside other transfers
+        max_concurrency = max(1, max_concurrency)
+        with contextlib.ExitStack() as stack:
+            if executor is None:
+                executor = stack.enter_context(ThreadPoolExecutor(max_workers=max_concurrency))
+
+            # parts still queued are dropped if the upload stops early, those already sent are left to finish
+            in_flight = {}
+            stack.callback(lambda: [future.cancel() for future in in_flight])
+            while which_part < part_count or in_flight:
+                while which_part < part_count and len(in_flight) < max_concurrency:
+                    # skip parts already uploaded before the upload was interrupted
+                    if journal is not None and which_part in journal.completed:
+                        # the part still counts towards the checksum
+                        if object_checksum is not None:
+                            object_checksum.update_part(which_part, data.read(part_size))
+                        which_part += 1
+                        data.seek(which_part * part_size)
+                        continue
+
+                    part_data = data.read(part_size)
+                    uploaded += len(part_data)
+                    if len(part_data) != min(part_size, length - (which_part * part_size)):
+                        raise ValueError(f"'{key}' ended after {uploaded} of {length} bytes")
 
-        # verify the file state by returning the object sha256
-        if verify_sha256:
+                    # a losing hedged copy can still be sending once its part is done, so with hedging on
+                    # parts aren't sent from buffers that go back to the pool, the buffer is reused right away
+                    if isinstance(data, PartBufferPool) and self._hedge_policy is not None:
+                        buffer, part_data = part_data, bytes(part_data)
+                        data.release(buffer)
+
+                    # hashes can't be combined so they're fed in order as the parts are read
+                    part_checksum = object_checksum
+                    if object_checksum is not None and not object_checksum.combinable:
+                        object_checksum.update_part(which_part, part_data)
+                        part_checksum = None
+
+                    # upload the part
+                    in_flight[executor.submit(self._put_object_part, upload_id, which_part, part_data, part_retries, part_checksum, endpoint, priority)] = (which_part, part_data)
+
+                    # increment the part
+                    which_part += 1
+
+                # wait for any part to finish
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    done_part, part_data = in_flight.pop(future)
+                    response = future.result()
+                    if response.status != 200:
+                        if journal is not None and response.status == 404:
+                            # the server no longer knows the upload, the next attempt starts over
+                            journal.remove()
+                        return response.json()
+                    if journal is not None:
+                        journal.complete_part(done_part)
+                    if progress is not None:
+                        progress(len(part_data))
+
+                    # the part's buffer can take the next part
+                    if isinstance(data, PartBufferPool) and self._hedge_policy is None:
+                        data.release(part_data)
+
+        # verify the object by comparing the server checksum with the one worked out while uploading
+        server_checksum = None
+        if object_checksum is not None:
             cs_response = self._client_response(
                 method="GET",
-                url=f"/objects/checksum/name/sha256/{bucket}/{key}"
+                url=f"/objects/checksum/name/{checksum.value}/{bucket}/{key}",
+                endpoint=endpoint
                 )
             if cs_response.status != 200:
                 return cs_response.json()
 
-            # get the sha256 and append it to the response
-            sha256 = cs_response.json()["result"]
+            server_checksum = cs_response.json()["result"]
+            local_checksum = object_checksum.hexdigest()
+            if server_checksum != local_checksum:
+                if journal is not None:
+                    journal.remove()
+                raise ChecksumMismatch(bucket, key, checksum.value, local_checksum, server_checksum)
+
+        if response is None:
+            # every part was already uploaded before the upload was resumed
+            result = {"status": "success", "status_code": 200, "result": {"upload_id": upload_id}}
         else:
-            sha256 = None
-        result = response.json()
-        result["result"]["sha256"] = sha256
+            result = response.json()
+
+        # append the checksum to the response
+        result["result"]["sha256"] = None
+        if checksum is not None:
+            result["result"][checksum.value] = server_checksum
+        if journal is not None:
+            journal.remove()
         return result
 
+    def _unchanged_object(self, bucket: str, key: str, file_path: str | None, data: BinaryIO | None, checksum: OBJECT_CHECKSUM_ALGORITHMS | None) -> dict | None:
+        # the result for an object that already holds these bytes, or None when it has to go up,
+        # a missing object or one the server can't give the checksum of is uploaded
+        algorithm = checksum or cheapest_checksum_algorithm()
+        response = self.get_object_checksum(bucket, key, algorithm)
+        if response.get("status_code") != 200:
+            return None
+
+        if file_path is not None:
+            local_checksum = file_checksum(file_path, algorithm)
+        else:
+            local_checksum = stream_checksum(data, algorithm)
+            data.seek(0)
+        if local_checksum != response["result"]:
+            return None
+        return {"status": "success", "status_code": 200, "result": {"unchanged": True, algorithm.value: local_checksum}, "message": None}
+
     def put_object(self,
         bucket: str,
         key: str,
         file: any = str | BinaryIO,
         content_type: str = "application/octet-stream",
-        verify_sha256: bool = False
+        verify_sha256: bool = False,
+        max_concurrency: int = 1,
+        part_retries: int = 3,
+        part_size: int = MULTIPART_OBJECT_SIZE,
+        memory_budget: int | None = None,
+        resume: bool = False,
+        journal_path: str | None = None,
+        checksum: OBJECT_CHECKSUM_ALGORITHMS | None = None,
+        length: int | None = None,
+        executor: Executor | None = None,
+        progress: Callable[[int], None] | None = None,
+        compression: OBJECT_COMPRESSION | None = None,
+        compression_level: int | None = None,
+        compression_workers: int | None = None,
+        priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL,
+        if_changed: bool = False,
+        replace: bool = False,
+        zero_copy: bool = True
     ) -> json:
 
+        # verify_sha256 is shorthand for a sha256 checksum
+        if verify_sha256 and checksum is None:
+            checksum = OBJECT_CHECKSUM_ALGORITHMS.SHA256
+
         # check if file is a string, then it's a file path... otherwise it's a file data
         file_path = None
         file_data = None
         if isinstance(file, str):
             file_path = file
+        elif isinstance(file, (bytes, bytearray, memoryview)):
+            # bytes-like data is sent in slices, without copying
+            file_data = BufferReader(file)
+        elif not hasattr(file, "read") and hasattr(file, "__iter__"):
+            # generators and other iterables of chunks are read as a stream
+            file_data = IterableReader(file)
         else:
             file_data = file
 
-        if file_path is not None:
+        # pipes, sockets and the like can only be read front to back
+        streaming = file_data is not None and not (file_data.seekable() if hasattr(file_data, "seekable") else hasattr(file_data, "seek"))
+        if streaming and resume:
+            raise ValueError("uploads from streams that can't seek can't be resumed")
+        if compression is not None and resume:
+            raise ValueError("compressed uploads can't be resumed")
+        if streaming and if_changed:
+            raise ValueError("uploads from streams that can't seek can't be checked for changes")
+        if streaming and length is not None and replace:
+            raise ValueError("uploads from streams that can't seek can't replace an object")
+
+        # an object already holding the same bytes is left as it is, compressed data is compared once it's compressed
+        if if_changed and compression is None:
+            if file_path is not None and not os.path.exists(file_path):
+                raise FileNotFoundError(f"File '{file_path}' not found")
+            if file_data is not None:
+                file_data.seek(0)
+            unchanged = self._unchanged_object(bucket, key, file_path, file_data, checksum)
+            if unchanged is not None:
+                return unchanged
+
+        # objects aren't overwritten, a changed one is replaced
+        replace = replace or if_changed
+
+        # the journal sits next to the file unless told otherwise
+        journal = None
+        if resume:
+            if journal_path is None and file_path is None:
+                raise ValueError("journal_path is required to resume an upload from file data")
+            journal = UploadJournal.load(journal_path or f"{file_path}.tonic-upload")
+
+        if compression is not None:
+            if file_path is not None and not os.path.exists(file_path):
+                raise FileNotFoundError(f"File '{file_path}' not found")
+            if file_path is None and file_data is None:
+                raise ValueError("File path or file data is required")
+
+            # the object's size is fixed when the upload is created, so parts are compressed side by side
+            # into a spool, in memory while it fits and on disk past that, and go up once it's complete
+            spool_size = memory_budget or (max(1, max_concurrency) + 1) * part_size
+            with contextlib.ExitStack() as stack:
+                if file_path is not None:
+                    file_data = stack.enter_context(open_file_reader(file_path, zero_copy))
+                elif not streaming:
+                    file_data.seek(0)
+                spool = stack.enter_context(tempfile.SpooledTemporaryFile(max_size=spool_size))
+                compress_stream(file_data, spool, compression, level=compression_level, part_size=part_size, max_workers=compression_workers)
+                file_size = spool.tell()
+                spool.seek(0)
+                if if_changed:
+                    unchanged = self._unchanged_object(bucket, key, None, spool, checksum)
+                    if unchanged is not None:
+                        return unchanged
+
+                # upload the compressed file
+                result = self._put_object_multipart(
+                    bucket=bucket,
+                    key=key,
+                    data=spool,
+                    length=file_size,
+                    content_type=content_type,
+                    checksum=checksum,
+                    max_concurrency=max_concurrency,
+                    part_retries=part_retries,
+                    part_size=part_size,
+                    memory_budget=memory_budget,
+                    executor=executor,
+                    progress=progress,
+                    content_encoding=compression.value,
+                    priority=priority,
+                    replace=replace
+                )
+        elif file_path is not None:
             # make sure file exists
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"File '{file_path}' not found")
 
-            # get file size
-            file_size = os.stat(file_path).st_size
+            # get file size, the modified time tells a resumed upload if the file changed
+            file_stat = os.stat(file_path)
+            file_size = file_stat.st_size
 
-            # open the file and upload it
-            with open(file_path, "rb") as file_data:
+            # open the file and upload it, mapped into memory where possible so parts aren't copied
+            with open_file_reader(file_path, zero_copy) as file_data:
                 result = self._put_object_multipart(
                     bucket=bucket,
                     key=key,
                     data=file_data,
                     length=file_size,
                     content_type=content_type,
-                    verify_sha256=verify_sha256
+                    checksum=checksum,
+                    max_concurrency=max_concurrency,
+                    part_retries=part_retries,
+                    part_size=part_size,
+                    memory_budget=memory_budget,
+                    journal=journal,
+                    mtime=file_stat.st_mtime,
+                    executor=executor,
+                    progress=progress,
+                    priority=priority,
+                    replace=replace
+                )
+        elif streaming and length is None:
+            # the size has to be known before the upload starts, so the stream is buffered until it ends,
+            # in memory while it fits alongside the parts in flight and on disk past that
+            spool_size = memory_budget or (max(1, max_concurrency) + 1) * part_size
+            with tempfile.SpooledTemporaryFile(max_size=spool_size) as spool:
+                shutil.copyfileobj(file_data, spool, STREAM_CHUNK_SIZE)
+                file_size = spool.tell()
+                spool.seek(0)
+
+                # upload the file
+                result = self._put_object_multipart(
+                    bucket=bucket,
+                    key=key,
+                    data=spool,
+                    length=file_size,
+                    content_type=content_type,
+                    checksum=checksum,
+                    max_concurrency=max_concurrency,
+                    part_retries=part_retries,
+                    part_size=part_size,
+                    memory_budget=memory_budget,
+                    executor=executor,
+                    progress=progress,
+                    priority=priority,
+                    replace=replace
                 )
         elif file_data is not None:
             # get file data
-            file_data.seek(0, os.SEEK_END)
-            file_size = file_data.tell()
-            file_data.seek(0)
+            if streaming:
+                # with the size given the stream goes straight out, a part at a time, through reused buffers
+                file_size = length
+                file_data = PartBufferPool(file_data)
+            else:
+                file_data.seek(0, os.SEEK_END)
+                file_size = file_data.tell()
+                file_data.seek(0)
 
             # upload the file
             result = self._put_object_multipart(
@@ -204,20 +722,124 @@ class Tonic:
                 data=file_data,
                 length=file_size,
                 content_type=content_type,
-                verify_sha256=verify_sha256
+                checksum=checksum,
+                max_concurrency=max_concurrency,
+                part_retries=part_retries,
+                part_size=part_size,
+                memory_budget=memory_budget,
+                journal=journal,
+                executor=executor,
+                progress=progress,
+                priority=priority,
+                replace=replace
             )
         else:
             raise ValueError("File path or file data is required")
 
+        # the object listing is stale, but the object is known to exist
+        if self._metadata_cache is not None and result.get("status_code") == 200:
+            self._metadata_cache.invalidate(("objects", bucket))
+            self._metadata_cache.update(("object_names", bucket), lambda names: names.add(key))
+        if self._object_cache is not None and result.get("status_code") == 200:
+            self._object_cache.invalidate(bucket, key)
+        index = self._object_indexes.get(bucket)
+        if index is not None and result.get("status_code") == 200:
+            index.add(Object(key, size=file_size))
         return result
 
     def list_objects(self, bucket: str) -> list[Object]:
+        # cached listings are shared, so they shouldn't be changed
+        if self._metadata_cache is not None:
+            result = self._metadata_cache.get(("objects", bucket))
+            if result is not None:
+                return result
+
         response = self._client_response(
             method="GET",
             url=f"/objects/bucket/name/{bucket}"
             )
+        result = response.json()
+        if self._metadata_cache is not None and response.status == 200:
+            self._metadata_cache.set(("objects", bucket), result)
+        return result
+
+    def object_exists(self, bucket: str, key: str) -> bool:
+        names = None if self._metadata_cache is None else self._metadata_cache.get(("object_names", bucket))
+        if names is None:
+            result = self.list_objects(bucket)
+            if result.get("status_code") != 200:
+                raise ValueError(f"could not list objects in '{bucket}': {result.get('message')}")
+            names = {item["name"] for item in result["result"]}
+            if self._metadata_cache is not None:
+                self._metadata_cache.set(("object_names", bucket), names)
+        return key in names
+
+    def delete_object(self, bucket: str, key: str) -> json:
+        response = self._client_response(
+            method="DELETE",
+            url=f"/objects/name/{bucket}/{key}"
+            )
+
+        # the object is gone from the listing and the local copy
+        if response.status == 200:
+            if self._metadata_cache is not None:
+                self._metadata_cache.invalidate(("objects", bucket))
+                self._metadata_cache.update(("object_names", bucket), lambda names: names.discard(key))
+            if self._object_cache is not None:
+                self._object_cache.invalidate(bucket, key)
+            index = self._object_indexes.get(bucket)
+            if index is not None:
+                index.remove(key)
         return response.json()
 
+    def iter_objects(self, bucket: str, prefix: str | None = None, page_size: int | None = None, chunk_size: int = 64 * KB_SIZE) -> Iterator[Object]:
+        offset = 0
+        first_name = None
+        while True:
+            # ask for a page at a time when paging, otherwise the whole listing in one stream, and only
+            # names under the prefix from servers that filter on it, the rest are filtered here
+            query = []
+            if prefix:
+                query.append(f"prefix={quote(prefix, safe='')}")
+            if page_size is not None:
+                query.append(f"offset={offset}&limit={page_size}")
+            url = f"/objects/bucket/name/{bucket}"
+            if query:
+                url += "?" + "&".join(query)
+            response = self._client_response(
+                method="GET",
+                url=url,
+                preload_content=False
+                )
+
+            count = 0
+            try:
+                if response.status != 200:
+                    response.read(cache_content=True)
+                    raise PopBadResponse(response)
+
+                # objects are yielded as they're parsed, before the rest of the listing has arrived
+                for item in iter_json_array(response.stream(chunk_size), "result"):
+                    obj = Object.from_json(item)
+                    if count == 0:
+                        # a server that ignores paging sends the same first page again
+                        if offset > 0 and obj.name == first_name:
+                            return
+                        first_name = obj.name
+                    count += 1
+                    if prefix is None or obj.name.startswith(prefix):
+                        yield obj
+            finally:
+                if not response.isclosed():
+                    # stopped part way, the connection can't be reused with the rest of the body unread
+                    response.close()
+                response.release_conn()
+
+            # a short page is the last one, and a long one means the server doesn't page
+            if page_size is None or count != page_size:
+                return
+            offset += page_size
+
     def get_object_checksum(self, bucket: str, key: str, algorithm: OBJECT_CHECKSUM_ALGORITHMS) -> str:
         response = self._client_response(
             method="GET",
@@ -225,19 +847,315 @@ class Tonic:
             )
         return response.json()
 
-    def get_object(self, bucket: str, key: str, file_path: str) -> json:
-        response = self._client_response(
+    def _stream_response(self, response, chunk_size: int, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL) -> Iterator[bytes]:
+        # the body a chunk at a time as it arrives, no faster than the throttle allows
+        chunks = response.stream(chunk_size, decode_content=False)
+        if self._throttle is None:
+            return chunks
+        return self._throttle.limit(chunks, "get_object", priority)
+
+    def _write_object_range(self, fd: int, response, offset: int, chunk_size: int, progress: Callable[[int], None] | None = None, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL) -> int:
+        # write the body at its offset, pwrite lets every range share the one file descriptor
+        for chunk in self._stream_response(response, chunk_size, priority):
+            view = memoryview(chunk)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                view = view[written:]
+                offset += written
+            if progress is not None:
+                progress(len(chunk))
+        return offset
+
+    def _get_object_range(self, bucket: str, key: str, fd: int, start: int, end: int, chunk_size: int, progress: Callable[[int], None] | None = None, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL):
+        response = self._hedged_response(
+            "get_object",
             method="GET",
-            url=f"/objects/stream/read/name/{bucket}/{key}"
+            url=f"/objects/stream/read/name/{bucket}/{key}",
+            headers={"Range": f"bytes={start}-{end}"},
+            preload_content=False
             )
 
-        if response.status != 200:
-            return response.json()
+        try:
+            if response.status == 200:
+                # the whole object from a server that ignored the range, nothing to keep
+                response.drain_conn()
+                return response
+            if response.status != 206:
+                response.read(cache_content=True)
+                return response
+            self._write_object_range(fd, response, start, chunk_size, progress, priority)
+        finally:
+            response.release_conn()
+        return response
+
+    def get_object_bytes(self, bucket: str, key: str, start: int = 0, end: int | None = None) -> bytes:
+        # a byte range when asked for one, end is inclusive as it is in http
+        headers = None
+        if start or end is not None:
+            headers = {"Range": f"bytes={start}-{'' if end is None else end}"}
+
+        response = self._hedged_response(
+            "get_object",
+            method="GET",
+            url=f"/objects/stream/read/name/{bucket}/{key}",
+            headers=headers,
+            preload_content=False
+            )
+        try:
+            if response.status not in (200, 206):
+                response.read(cache_content=True)
+                raise PopBadResponse(response)
 
-        # write the file
-        with open(file_path, "wb") as file:
-            file.write(response.data)
+            # the bytes as stored, ranges of compressed objects can't be decoded on their own
+            data = response.read(decode_content=False)
+        finally:
+            response.release_conn()
+
+        # servers that ignore the range send the whole object
+        if response.status == 200 and headers is not None:
+            data = data[start:None if end is None else end + 1]
+        return data
+
+    def _get_object_ranges(self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        response,
+        content_range: tuple[int, int, int],
+        chunk_size: int,
+        max_concurrency: int,
+        range_size: int,
+        progress: Callable[[int], None] | None = None,
+        priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL
+    ) -> json:
+
+        # the first range tells us the object size
+        _, first_end, size = content_range
+        ranges = [(start, min(start + range_size, size) - 1) for start in range(first_end + 1, size, range_size)]
+
+        fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        completed = False
+        try:
+            preallocate_file(fd, size)
+
+            # fetch the remaining ranges on the pool while this thread writes the first one
+            with ThreadPoolExecutor(max_workers=max_concurrency - 1) as executor:
+                futures = [executor.submit(self._get_object_range, bucket, key, fd, start, end, chunk_size, progress, priority) for start, end in ranges]
+                try:
+                    self._write_object_range(fd, response, 0, chunk_size, progress, priority)
+                    for future in futures:
+                        range_response = future.result()
+                        if range_response.status == 200:
+                            # an endpoint that doesn't do ranges, its body is the object rather than an error
+                            return {"status": "error", "status_code": 502, "result": None, "message": "range request answered with the whole object"}
+                        if range_response.status != 206:
+                            try:
+                                return range_response.json()
+                            except ValueError:
+                                return {"status": "error", "status_code": range_response.status, "result": None, "message": range_response.reason}
+                    completed = True
+                finally:
+                    for future in futures:
+                        future.cancel()
+        finally:
+            os.close(fd)
+            # a full size file with holes where ranges failed isn't left behind
+            if not completed:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(file_path)
 
         return {
+            "status_code": 200,
+        }
+
+    def _get_cached_object(self, bucket: str, key: str, file_path: str, chunk_size: int, max_concurrency: int, range_size: int, progress: Callable[[int], None] | None = None, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL) -> json:
+        cache = self._object_cache
+
+        # entries checked recently enough are served without asking the server
+        path = cache.lookup(bucket, key)
+        if path is not None and cache.fresh(path):
+            with contextlib.suppress(FileNotFoundError):
+                cache.deliver(path, file_path)
+                if progress is not None:
+                    progress(os.path.getsize(file_path))
+                return {"status_code": 200}
+
+        # otherwise the cached copy is good if its checksum still matches the object's
+        result = self.get_object_checksum(bucket, key, cache.algorithm)
+        if result.get("status_code") != 200:
+            return result
+        path = cache.path(bucket, key, result["result"])
+        if path is not None:
+            with contextlib.suppress(FileNotFoundError):
+                cache.deliver(path, file_path, validated=True)
+                if progress is not None:
+                    progress(os.path.getsize(file_path))
+                return {"status_code": 200}
+
+        # download into the cache, named by the checksum of what actually arrived
+        # in case the object changed since the checksum was asked for
+        temp_path = cache.temp_path()
+        try:
+            result = self._get_object_file(bucket, key, temp_path, chunk_size, max_concurrency, range_size, progress, priority=priority)
+            if result.get("status_code") != 200:
+                return result
+            if result.get("content_encoding") is not None:
+                # the cache holds objects as they're stored, a decompressed one is handed over without being kept
+                shutil.move(temp_path, file_path)
+                return result
+            cache.commit(bucket, key, file_checksum(temp_path, cache.algorithm), temp_path, file_path)
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+        return result
+
+    def get_object(self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        max_concurrency: int = 1,
+        range_size: int = MULTIPART_OBJECT_SIZE,
+        progress: Callable[[int], None] | None = None,
+        decompress: bool | None = None,
+        priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL
+    ) -> json:
+
+        # repeat downloads come from the local cache when there is one, unless told whether to
+        # decompress, as the cache can't tell a compressed object from one that just looks it
+        if self._object_cache is not None and decompress is None:
+            return self._get_cached_object(bucket, key, file_path, chunk_size, max_concurrency, range_size, progress, priority)
+        return self._get_object_file(bucket, key, file_path, chunk_size, max_concurrency, range_size, progress, decompress, priority)
+
+    def _get_object_file(self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        max_concurrency: int = 1,
+        range_size: int = MULTIPART_OBJECT_SIZE,
+        progress: Callable[[int], None] | None = None,
+        decompress: bool | None = None,
+        priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL
+    ) -> json:
+
+        # ask for the first range only when the object may be fetched in parallel, compressed
+        # objects can't be unpacked a range at a time so one that may be is read whole
+        headers = None
+        if max_concurrency > 1 and hasattr(os, "pwrite") and not decompress:
+            headers = {"Range": f"bytes=0-{range_size - 1}"}
+
+        response = self._hedged_response(
+            "get_object",
+            method="GET",
+            url=f"/objects/stream/read/name/{bucket}/{key}",
+            headers=headers,
+            preload_content=False
+            )
+
+        try:
+            # objects stored compressed are unpacked unless told not to
+            codec = None if decompress is False else content_encoding_compression(response.headers.get("Content-Encoding"))
+
+            # the server honoured the range, fetch the rest in parallel
+            content_range = parse_content_range(response.headers.get("Content-Range"))
+            if response.status == 206 and content_range is not None and codec is None:
+                return self._get_object_ranges(bucket, key, file_path, response, content_range, chunk_size, max_concurrency, range_size, progress, priority)
+
+            # nothing to range over (empty object or unknown size) or a compressed object, read it as a single stream
+            if response.status in (206, 416):
+                response.drain_conn()
+                return self._get_object_file(bucket, key, file_path, chunk_size=chunk_size, progress=progress, decompress=decompress, priority=priority)
+
+            if response.status != 200:
+                return response.json()
+
+            # write the file a chunk at a time so memory stays flat whatever the object size,
+            # this is also the fallback when the server ignores the range
+            decoder = None if codec is None else Decompressor(codec)
+            detect = decompress and codec is None
+            with open(file_path, "wb") as file:
+                for chunk in self._stream_response(response, chunk_size, priority):
+                    # objects not marked as compressed are unpacked when asked to, going by their first bytes
+                    if detect:
+                        detect = False
+                        codec = detect_compression(chunk)
+                        decoder = None if codec is None else Decompressor(codec)
+                    file.write(chunk if decoder is None else decoder.decompress(chunk))
+                    if progress is not None:
+                        progress(len(chunk))
+            if decoder is not None:
+                decoder.flush()
+        finally:
+            response.release_conn()
+
+        result = {
             "status_code": response.status,
         }
+        if codec is not None:
+            result["content_encoding"] = codec.value
+        return result
+
+    def sync(self,
+        local_dir: str,
+        bucket: str,
+        prefix: str = "",
+        delete: bool = False,
+        index_path: str | None = None,
+        algorithm: OBJECT_CHECKSUM_ALGORITHMS = OBJECT_CHECKSUM_ALGORITHMS.CRC32,
+        max_requests: int = 16,
+        hash_processes: int | None = None,
+        dry_run: bool = False,
+        progress: Callable[[str, any], None] | None = None,
+        zero_copy: bool = False
+    ) -> SyncResult:
+
+        return sync_directory(
+            self,
+            local_dir,
+            bucket,
+            prefix=prefix,
+            delete=delete,
+            index_path=index_path,
+            algorithm=algorithm,
+            max_requests=max_requests,
+            hash_processes=hash_processes,
+            dry_run=dry_run,
+            progress=progress,
+            zero_copy=zero_copy
+        )
+
+    def verify_bucket(self,
+        bucket: str,
+        local_root: str,
+        algorithm: OBJECT_CHECKSUM_ALGORITHMS | None = None,
+        prefix: str = "",
+        max_requests: int = 32,
+        hash_processes: int | None = None,
+        progress: Callable[[str, VerifyMismatch | None], None] | None = None
+    ) -> Iterator[VerifyMismatch]:
+
+        return verify_directory(
+            self,
+            bucket,
+            local_root,
+            algorithm=algorithm,
+            prefix=prefix,
+            max_requests=max_requests,
+            hash_processes=hash_processes,
+            progress=progress
+        )
+
+    def get_object_stream(self, bucket: str, key: str, chunk_size: int = STREAM_CHUNK_SIZE, read_ahead: int = 0, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL) -> ObjectStream:
+        response = self._client_response(
+            method="GET",
+            url=f"/objects/stream/read/name/{bucket}/{key}",
+            preload_content=False
+            )
+
+        if response.status != 200:
+            response.read(cache_content=True)
+            response.release_conn()
+            raise PopBadResponse(response)
+
+        return ObjectStream(response, chunk_size=chunk_size, read_ahead=read_ahead, throttle=self._throttle, priority=priority)
@@ -0,0 +1,125 @@
+import os
+import gzip
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from .types import *
+
+# first bytes of a gzip member and of a zstd frame
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+DEFAULT_COMPRESSION_LEVELS = {
+    OBJECT_COMPRESSION.GZIP: 6,
+    OBJECT_COMPRESSION.ZSTD: 3
+}
+
+def _check_codec(codec: OBJECT_COMPRESSION):
+    if codec == OBJECT_COMPRESSION.ZSTD and zstandard is None:
+        raise ImportError("zstd compression requires the zstandard package, install it with 'pip install zstandard'")
+
+def detect_compression(data: bytes) -> OBJECT_COMPRESSION | None:
+    """
+    The codec an object was compressed with, going by its first bytes.
+    """
+    if data[:2] == GZIP_MAGIC:
+        return OBJECT_COMPRESSION.GZIP
+    if data[:4] == ZSTD_MAGIC:
+        return OBJECT_COMPRESSION.ZSTD
+    return None
+
+def content_encoding_compression(content_encoding: str | None) -> OBJECT_COMPRESSION | None:
+    if not content_encoding:
+        return None
+    try:
+        return OBJECT_COMPRESSION(content_encoding.strip().lower())
+    except ValueError:
+        return None
+
+def compress_part(data: bytes, codec: OBJECT_COMPRESSION, level: int | None = None) -> bytes:
+    """
+    Compress one part into a whole gzip member or zstd frame, so compressed parts can be joined end to end.
+    """
+    if level is None:
+        level = DEFAULT_COMPRESSION_LEVELS[codec]
+    if codec == OBJECT_COMPRESSION.GZIP:
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+def compress_stream(
+    source: BinaryIO,
+    target: BinaryIO,
+    codec: OBJECT_COMPRESSION,
+    level: int | None = None,
+    part_size: int = MULTIPART_OBJECT_SIZE,
+    max_workers: int | None = None
+) -> tuple[int, int]:
+    """
+    Compress source into target a part at a time on max_workers threads, zlib and zstd let go of the GIL
+    while they work. Parts are written in order. Returns the bytes read and written.
+    """
+    _check_codec(codec)
+    max_workers = max_workers or os.cpu_count() or 1
+    read = 0
+    written = 0
+    pending = deque()
+    eof = False
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tonic-compress") as executor:
+        while not eof or pending:
+            # a couple of parts queued per worker, without reading far ahead of what's written
+            while not eof and len(pending) < 2 * max_workers:
+                data = source.read(part_size)
+                if not len(data):
+                    eof = True
+                    break
+                read += len(data)
+                pending.append(executor.submit(compress_part, data, codec, level))
+
+            if pending:
+                compressed = pending.popleft().result()
+                target.write(compressed)
+                written += len(compressed)
+    return read, written
+
+class Decompressor:
+    """
+    Streaming decoder for objects stored as gzip members or zstd frames one after another, fed in order.
+    """
+    def __init__(self, codec: OBJECT_COMPRESSION):
+        _check_codec(codec)
+        self._codec = codec
+        self._decoder = self._new_decoder()
+        self._in_frame = False
+
+    @property
+    def codec(self) -> OBJECT_COMPRESSION:
+        return self._codec
+
+    def _new_decoder(self):
+        if self._codec == OBJECT_COMPRESSION.GZIP:
+            return zlib.decompressobj(zlib.MAX_WBITS | 16)
+        return zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        output = []
+        while len(data):
+            output.append(self._decoder.decompress(data))
+            self._in_frame = not self._decoder.eof
+            if self._in_frame:
+                break
+            # a member or frame ended, whatever followed it starts the next one
+            data = self._decoder.unused_data
+            self._decoder = self._new_decoder()
+        return b"".join(output)
+
+    def flush(self):
+        # everything has been fed, so a member or frame still open was cut short
+        if self._in_frame:
+            raise ValueError(f"{self._codec.value} data ended part way through")
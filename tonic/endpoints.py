@@ -0,0 +1,143 @@
+import time
+import random
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+def region_endpoint(endpoint: str, region: str | None) -> str:
+    """
+    The endpoint for a region, with the region put in front of the host, https://eu-west-api.example.com
+    for https://api.example.com in eu-west.
+    """
+    if region is None:
+        return endpoint
+    parts = urlsplit(endpoint)
+    if not parts.netloc:
+        return f"{region}-{endpoint}"
+    return urlunsplit(parts._replace(netloc=f"{region}-{parts.netloc}"))
+
+class Endpoint:
+    """
+    One endpoint with its base url worked out once, and what recent requests to it have shown,
+    latency and errors as moving averages and a circuit breaker.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, url: str, api_root: str, region: str | None = None):
+        self.url = url.rstrip("/")
+        self.region = region
+        self.base_url = f"{self.url}/{api_root.strip('/')}/"
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self.requests = 0
+
+    def request_url(self, url: str) -> str:
+        return self.base_url + url.lstrip("/")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.url!r}, state={self.state!r}, latency={self.latency}, error_rate={round(self.error_rate, 3)})"
+
+class EndpointSelector:
+    """
+    Picks the endpoint for each request from several, by an exponentially weighted moving average of latency
+    with errors weighing against it. failure_threshold failures in a row open an endpoint's circuit, taking it
+    out of rotation, and once reset_timeout has passed a single request probes it and closes the circuit again
+    if it succeeds. A small share of requests explore the others so a recovered endpoint is noticed.
+    """
+    def __init__(self,
+        endpoints: list[str],
+        regions: list[str | None] | None = None,
+        api_root: str = "/api/v1",
+        alpha: float = 0.2,
+        error_penalty: float = 1.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        explore: float = 0.02):
+
+        # every endpoint in every region
+        regions = regions or [None]
+        self._endpoints = [Endpoint(region_endpoint(endpoint, region), api_root, region) for endpoint in endpoints for region in regions]
+        if not self._endpoints:
+            raise ValueError("at least one endpoint is required")
+        self._alpha = alpha
+        self._error_penalty = error_penalty
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._explore = explore
+        self._lock = threading.Lock()
+
+    @property
+    def endpoints(self) -> list[Endpoint]:
+        return list(self._endpoints)
+
+    def _score(self, endpoint: Endpoint) -> float:
+        # endpoints not heard from yet go first, so every one is measured
+        return (endpoint.latency or 0.0) + self._error_penalty * endpoint.error_rate
+
+    def choose(self, exclude: tuple[Endpoint, ...] | list[Endpoint] = ()) -> Endpoint | None:
+        """
+        The endpoint for the next request, leaving out those in exclude, or None once every one has been.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [endpoint for endpoint in self._endpoints if endpoint not in exclude]
+            if not candidates:
+                return None
+
+            closed = [endpoint for endpoint in candidates if endpoint.state == Endpoint.CLOSED]
+
+            # an open circuit lets one request through once it has waited out the reset timeout
+            for endpoint in candidates:
+                if endpoint.state == Endpoint.OPEN and now - endpoint.opened_at >= self._reset_timeout:
+                    endpoint.state = Endpoint.HALF_OPEN
+                    return endpoint
+
+            if not closed:
+                # nothing healthy, the endpoint that failed longest ago is the best bet
+                endpoint = min(candidates, key=lambda endpoint: endpoint.opened_at)
+            elif len(closed) > 1 and random.random() < self._explore:
+                endpoint = random.choice(closed)
+            else:
+                endpoint = min(closed, key=self._score)
+            return endpoint
+
+    def preferred(self) -> Endpoint:
+        # the endpoint requests are going to for now, without probing or exploring
+        with self._lock:
+            closed = [endpoint for endpoint in self._endpoints if endpoint.state == Endpoint.CLOSED]
+            return min(closed, key=self._score) if closed else self._endpoints[0]
+
+    def record(self, endpoint: Endpoint, seconds: float, ok: bool):
+        with self._lock:
+            endpoint.requests += 1
+            alpha = self._alpha
+            endpoint.error_rate = alpha * (not ok) + (1 - alpha) * endpoint.error_rate
+            if ok:
+                endpoint.latency = seconds if endpoint.latency is None else alpha * seconds + (1 - alpha) * endpoint.latency
+                endpoint.failures = 0
+                endpoint.state = Endpoint.CLOSED
+                return
+
+            endpoint.failures += 1
+            # a failed probe, or too many failures in a row, takes the endpoint out of rotation
+            if endpoint.state == Endpoint.HALF_OPEN or endpoint.failures >= self._failure_threshold:
+                endpoint.state = Endpoint.OPEN
+                endpoint.opened_at = time.monotonic()
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "url": endpoint.url,
+                    "region": endpoint.region,
+                    "state": endpoint.state,
+                    "latency": endpoint.latency,
+                    "error_rate": endpoint.error_rate,
+                    "requests": endpoint.requests
+                }
+                for endpoint in self._endpoints
+            ]
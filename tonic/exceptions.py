@@ -7,4 +7,33 @@ class PopBadResponse(Exception):
 
     @property
     def response(self) -> BaseHTTPResponse:
-        return self._response
\ No newline at end of file
+        return self._response
+
+class ChecksumMismatch(Exception):
+    def __init__(self, bucket: str, key: str, algorithm: str, local_checksum: str, server_checksum: str) -> None:
+        self._bucket = bucket
+        self._key = key
+        self._algorithm = algorithm
+        self._local_checksum = local_checksum
+        self._server_checksum = server_checksum
+        super().__init__(f"{bucket}/{key}: {algorithm} {server_checksum} on the server, {local_checksum} uploaded")
+
+    @property
+    def bucket(self) -> str:
+        return self._bucket
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    @property
+    def algorithm(self) -> str:
+        return self._algorithm
+
+    @property
+    def local_checksum(self) -> str:
+        return self._local_checksum
+
+    @property
+    def server_checksum(self) -> str:
+        return self._server_checksum
@@ -1,15 +1,172 @@
+import os
+import json
 import math
+import codecs
+import socket
+from typing import Iterable, Iterator
+from urllib3.connection import HTTPConnection
 
 from .types import *
 
-def calc_object_parts(object_size: int) -> tuple[int, int, int]:
+def calc_object_parts(
+    object_size: int,
+    part_size: int = MULTIPART_OBJECT_SIZE,
+    memory_budget: int | None = None,
+    concurrency: int = 1
+) -> tuple[int, int]:
     """
     Calculate the part size, part count of an object.
+    Parts start at part_size and grow with the object so the count stays near PREFERRED_MULTIPART_COUNT,
+    never going over MAX_MULTIPART_COUNT. A memory_budget caps the part size so concurrency parts fit in it.
     """
+    if part_size <= 0:
+        raise ValueError("part_size must be positive")
     if object_size <= 0:
         return 0, 0
-    if object_size <= MULTIPART_OBJECT_SIZE:
+
+    # smallest part that keeps the count within the limit
+    min_part_size = math.ceil(object_size / MAX_MULTIPART_COUNT)
+
+    # grow the parts with the object once it outgrows the target, in whole MB
+    grown_part_size = math.ceil(object_size / PREFERRED_MULTIPART_COUNT)
+    if grown_part_size > part_size:
+        part_size = math.ceil(grown_part_size / MB_SIZE) * MB_SIZE
+
+    # keep every part in flight within the memory budget
+    if memory_budget is not None:
+        max_part_size = memory_budget // max(1, concurrency)
+        if max_part_size < min_part_size:
+            raise ValueError(f"memory budget of {memory_budget} bytes can't hold {concurrency} parts of {min_part_size} bytes")
+        part_size = min(part_size, max_part_size)
+
+    part_size = max(part_size, min_part_size)
+    if object_size <= part_size:
         return object_size, 1
-    part_size = MULTIPART_OBJECT_SIZE
-    count = math.ceil(object_size / MULTIPART_OBJECT_SIZE)
-    return part_size, count
\ No newline at end of file
+    count = math.ceil(object_size / part_size)
+    return part_size, count
+
+def build_url(endpoint: str, api_root: str, url: str, region: str | None = None) -> str:
+    """
+    Join the endpoint, api root and request url into a clean url.
+    """
+    if region is None:
+        s3_url = f"{endpoint}/{api_root}/{url}"
+    else:
+        s3_url = f"{region}-{endpoint}/{api_root}/{url}"
+
+    # make sure url is clean
+    return s3_url.replace("://", ":/_/_").replace("//", "/").replace(":/_/_", "://")
+
+def keep_alive_socket_options(idle: int = 60, interval: int = 15, count: int = 4) -> list[tuple[int, int, int]]:
+    """
+    urllib3 socket options with TCP keepalive on, so pooled connections left idle aren't dropped by firewalls and load balancers.
+    """
+    options = list(HTTPConnection.default_socket_options) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # the probe timings can only be tuned where the platform has them
+    for name, value in (("TCP_KEEPIDLE", idle), ("TCP_KEEPINTVL", interval), ("TCP_KEEPCNT", count)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
+
+def parse_content_range(content_range: str | None) -> tuple[int, int, int] | None:
+    """
+    Parse a 'bytes start-end/size' Content-Range header into its start, end and size.
+    """
+    if not content_range or not content_range.startswith("bytes "):
+        return None
+    span, _, size = content_range[6:].partition("/")
+    start, _, end = span.partition("-")
+    try:
+        return int(start), int(end), int(size)
+    except ValueError:
+        return None
+
+def preallocate_file(fd: int, size: int):
+    """
+    Reserve size bytes for an open file, falling back to a sparse file where allocation isn't supported.
+    """
+    if size > 0 and hasattr(os, "posix_fallocate"):
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass
+    os.ftruncate(fd, size)
+
+def iter_json_array(chunks: Iterable[bytes], key: str = "result") -> Iterator:
+    """
+    Yield the items of the array under key in a top-level json object as the chunks arrive,
+    without holding the whole document in memory.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    position = 0
+    ended = False
+
+    def more() -> bool:
+        nonlocal buffer, position, ended
+        if ended:
+            return False
+        chunk = next(chunks, None)
+        if chunk is None:
+            ended = True
+            buffer = buffer[position:] + text_decoder.decode(b"", final=True)
+        else:
+            buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        return True
+
+    def skip() -> str:
+        # move past whitespace and return the next character, or "" at the end of the document
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n":
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not more():
+                return ""
+
+    def value():
+        # a value only counts as complete once something follows it, a number could still be growing
+        nonlocal position
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                if end < len(buffer) or ended:
+                    position = end
+                    return item
+            except json.JSONDecodeError:
+                if ended:
+                    raise
+            more()
+
+    def next_character() -> str:
+        # like skip, but the document must carry on
+        character = skip()
+        if not character:
+            raise ValueError("json document ended early")
+        return character
+
+    if skip() != "{":
+        raise ValueError("expected a json object")
+    position += 1
+    while next_character() != "}":
+        name = value()
+        if next_character() != ":":
+            raise ValueError(f"expected ':' after '{name}'")
+        position += 1
+        if next_character() == "[" and name == key:
+            # stream the items of the array
+            position += 1
+            while next_character() != "]":
+                yield value()
+                if next_character() == ",":
+                    position += 1
+            position += 1
+        else:
+            value()
+        if next_character() == ",":
+            position += 1
\ No newline at end of file
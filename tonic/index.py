@@ -0,0 +1,110 @@
+import bisect
+import threading
+from typing import Iterable, Iterator
+
+from .classes import Object
+
+def prefix_end(prefix: str) -> str | None:
+    """
+    The first name after every name starting with prefix, or None if there is no such name.
+    """
+    while prefix:
+        last = ord(prefix[-1])
+        if last < 0x10FFFF:
+            return prefix[:-1] + chr(last + 1)
+        prefix = prefix[:-1]
+    return None
+
+class ObjectIndex:
+    """
+    Sorted index of a bucket's object names, built from a listing and kept current by adds and removes.
+    Prefix, delimiter and range queries find their first name by binary search and then read only what they
+    return, O(log n + k) for k results, with each common prefix skipped over in one more search.
+    """
+    def __init__(self, objects: Iterable[Object | str] = ()):
+        self._objects = {}
+        for obj in objects:
+            obj = Object(obj) if isinstance(obj, str) else obj
+            self._objects[obj.name] = obj
+        self._names = sorted(self._objects)
+        self._lock = threading.RLock()
+
+    @classmethod
+    def load(cls, tonic, bucket: str, prefix: str | None = None, page_size: int | None = None) -> "ObjectIndex":
+        # a snapshot of the listing, narrowed by the server when it filters on prefix
+        return cls(tonic.iter_objects(bucket, prefix=prefix, page_size=page_size))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[Object]:
+        # in name order, as the index stood when iteration started
+        return iter(self.range())
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._objects
+
+    def get(self, name: str) -> Object | None:
+        return self._objects.get(name)
+
+    def add(self, obj: Object | str):
+        obj = Object(obj) if isinstance(obj, str) else obj
+        with self._lock:
+            if obj.name not in self._objects:
+                bisect.insort(self._names, obj.name)
+            self._objects[obj.name] = obj
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            if self._objects.pop(name, None) is None:
+                return False
+            del self._names[bisect.bisect_left(self._names, name)]
+            return True
+
+    def range(self, start: str | None = None, end: str | None = None, start_after: str | None = None, limit: int | None = None) -> list[Object]:
+        """
+        Objects with start <= name < end in name order, after start_after when given.
+        """
+        with self._lock:
+            names = self._names
+            first = 0 if start is None else bisect.bisect_left(names, start)
+            if start_after is not None:
+                first = max(first, bisect.bisect_right(names, start_after))
+            last = len(names) if end is None else bisect.bisect_left(names, end)
+            if limit is not None:
+                last = min(last, first + limit)
+            return [self._objects[name] for name in names[first:last]]
+
+    def list(self, prefix: str = "", delimiter: str | None = None, start_after: str | None = None, limit: int | None = None) -> tuple[list[Object], list[str]]:
+        """
+        Objects under prefix and, with a delimiter, the common prefixes ("directories") up to the next delimiter
+        after prefix in place of the objects beneath them, like an s3 listing. Returns (objects, common_prefixes),
+        with limit counting both.
+        """
+        if delimiter is None:
+            return self.range(prefix or None, prefix_end(prefix), start_after=start_after, limit=limit), []
+
+        objects = []
+        common_prefixes = []
+        with self._lock:
+            names = self._names
+            position = bisect.bisect_left(names, prefix)
+            if start_after is not None:
+                position = max(position, bisect.bisect_right(names, start_after))
+            while position < len(names) and (limit is None or len(objects) + len(common_prefixes) < limit):
+                name = names[position]
+                if not name.startswith(prefix):
+                    break
+                found = name.find(delimiter, len(prefix))
+                if found < 0:
+                    objects.append(self._objects[name])
+                    position += 1
+                    continue
+
+                # everything under the common prefix is skipped in one search
+                common_prefix = name[:found + len(delimiter)]
+                if start_after is None or common_prefix > start_after:
+                    common_prefixes.append(common_prefix)
+                end = prefix_end(common_prefix)
+                position = len(names) if end is None else bisect.bisect_left(names, end, position)
+        return objects, common_prefixes
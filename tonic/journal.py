@@ -0,0 +1,83 @@
+import os
+import json
+
+class UploadJournal:
+    """
+    Local record of a multipart upload so an interrupted upload can carry on where it stopped.
+    The first line holds the upload details, every line after it is a completed part number.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._upload = None
+        self._completed = set()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def upload_id(self) -> str | None:
+        return None if self._upload is None else self._upload["upload_id"]
+
+    @property
+    def completed(self) -> set[int]:
+        return self._completed
+
+    @classmethod
+    def load(cls, path: str) -> "UploadJournal":
+        journal = cls(path)
+        if not os.path.exists(path):
+            return journal
+
+        # only lines that end in a newline were written whole, a crash mid-write can leave the last
+        # one cut short ("1" of "12") and the part it names is simply redone
+        with open(path, "r") as file:
+            lines = file.read().split("\n")[:-1]
+        try:
+            journal._upload = json.loads(lines[0])
+        except (IndexError, ValueError):
+            # unreadable journal, treat it as a fresh upload
+            return journal
+
+        for line in lines[1:]:
+            if line.isdigit():
+                journal._completed.add(int(line))
+        return journal
+
+    def matches(self, bucket: str, key: str, size: int, part_size: int, mtime: float | None = None) -> bool:
+        return self._upload is not None and self._upload == {
+            "bucket": bucket,
+            "key": key,
+            "upload_id": self._upload["upload_id"],
+            "size": size,
+            "part_size": part_size,
+            "mtime": mtime
+        }
+
+    def start(self, bucket: str, key: str, upload_id: str, size: int, part_size: int, mtime: float | None = None):
+        self._upload = {
+            "bucket": bucket,
+            "key": key,
+            "upload_id": upload_id,
+            "size": size,
+            "part_size": part_size,
+            "mtime": mtime
+        }
+        self._completed = set()
+
+        # write to a temp file first so a crash never leaves a half written header
+        temp_path = f"{self._path}.tmp"
+        with open(temp_path, "w") as file:
+            file.write(json.dumps(self._upload) + "\n")
+        os.replace(temp_path, self._path)
+
+    def complete_part(self, which_part: int):
+        self._completed.add(which_part)
+        with open(self._path, "a") as file:
+            file.write(f"{which_part}\n")
+
+    def remove(self):
+        self._upload = None
+        self._completed = set()
+        if os.path.exists(self._path):
+            os.remove(self._path)
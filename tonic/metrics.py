@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from typing import Callable
+
+# upper bounds in seconds, wide enough for a small listing through to a large part on a slow link
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_OPERATIONS = (
+    ("PUT", re.compile(r"^/?objects/stream/write/part/"), "put_part"),
+    ("POST", re.compile(r"^/?objects/stream/write/new/"), "create_upload"),
+    ("GET", re.compile(r"^/?objects/stream/read/"), "get_object"),
+    ("GET", re.compile(r"^/?objects/checksum/"), "get_checksum"),
+    ("GET", re.compile(r"^/?objects/bucket/"), "list_objects"),
+    ("DELETE", re.compile(r"^/?objects/name/"), "delete_object"),
+    ("GET", re.compile(r"^/?buckets$"), "list_buckets"),
+    ("POST", re.compile(r"^/?buckets$"), "create_bucket"),
+    ("DELETE", re.compile(r"^/?buckets/"), "delete_bucket"),
+)
+
+def request_operation(method: str, url: str) -> str:
+    """
+    Name of the API operation a request is for, such as put_part or list_objects, used to group metrics.
+    """
+    path = url.split("?", 1)[0]
+    for operation_method, pattern, name in _OPERATIONS:
+        if method == operation_method and pattern.match(path):
+            return name
+    return "other"
+
+class RequestInfo:
+    """
+    One request as seen by observers, filled in with the outcome once it ends.
+    """
+    __slots__ = ("method", "url", "operation", "request_bytes", "start_time", "started", "seconds", "status", "response_bytes", "retries", "error")
+
+    def __init__(self, method: str, url: str, request_bytes: int):
+        self.method = method
+        self.url = url
+        self.operation = request_operation(method, url)
+        self.request_bytes = request_bytes
+        self.start_time = time.time_ns()
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.status = None
+        self.response_bytes = None
+        self.retries = 0
+        self.error = None
+
+    def finish(self, response=None, error: BaseException | None = None):
+        self.seconds = time.perf_counter() - self.started
+        self.error = error
+        if response is not None:
+            self.status = response.status
+            # streamed bodies haven't been read yet, the length header stands in for them
+            length = response.headers.get("Content-Length")
+            self.response_bytes = int(length) if length is not None and length.isdigit() else None
+            if response.retries is not None:
+                self.retries = len(response.retries.history)
+
+class PartInfo:
+    """
+    One uploaded part, timed across all of its attempts.
+    """
+    __slots__ = ("upload_id", "which_part", "size", "seconds", "attempts", "status")
+
+    def __init__(self, upload_id: str, which_part: int, size: int, seconds: float, attempts: int, status: int | None):
+        self.upload_id = upload_id
+        self.which_part = which_part
+        self.size = size
+        self.seconds = seconds
+        self.attempts = attempts
+        self.status = status
+
+class RequestObserver:
+    """
+    Base for objects registered with Tonic to watch its requests. The hooks are called on the thread making
+    the request, so observers shared by several threads have to be thread safe.
+    """
+    def on_request_start(self, request: RequestInfo):
+        pass
+
+    def on_request_end(self, request: RequestInfo):
+        pass
+
+    def on_part_complete(self, part: PartInfo):
+        pass
+
+class _OperationStats:
+    __slots__ = ("requests", "errors", "statuses", "retries", "request_bytes", "response_bytes", "seconds", "buckets")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.statuses = {}
+        self.retries = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, seconds: float, request_bytes: int, response_bytes: int, retries: int, status: int | None, error: bool):
+        self.requests += 1
+        self.errors += error
+        self.retries += retries
+        self.request_bytes += request_bytes
+        self.response_bytes += response_bytes
+        self.seconds += seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if status is not None:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def quantile(self, q: float) -> float | None:
+        # upper bound of the bucket the quantile falls in, the overflow bucket has none
+        rank = q * self.requests
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            total += count
+            if total >= rank and total:
+                return bound
+        return None if not self.requests else float("inf")
+
+class MetricsCollector(RequestObserver):
+    """
+    Counts, latency histograms, bytes and retries per operation, with parts of multipart uploads kept as
+    their own operation. Recording is a lock and a few additions, so it can stay on in production.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = {}
+        self._started = time.monotonic()
+
+    def _stats(self, operation: str) -> _OperationStats:
+        stats = self._operations.get(operation)
+        if stats is None:
+            stats = self._operations[operation] = _OperationStats()
+        return stats
+
+    def on_request_end(self, request: RequestInfo):
+        error = request.error is not None or (request.status is not None and request.status >= 500)
+        with self._lock:
+            self._stats(request.operation).add(request.seconds, request.request_bytes, request.response_bytes or 0, request.retries, request.status, error)
+
+    def on_part_complete(self, part: PartInfo):
+        with self._lock:
+            self._stats("upload_part").add(part.seconds, part.size, 0, part.attempts - 1, part.status, part.status != 200)
+
+    def reset(self):
+        with self._lock:
+            self._operations = {}
+            self._started = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            return {
+                operation: {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "statuses": dict(stats.statuses),
+                    "retries": stats.retries,
+                    "request_bytes": stats.request_bytes,
+                    "response_bytes": stats.response_bytes,
+                    "mean_seconds": stats.seconds / stats.requests if stats.requests else None,
+                    "p50_seconds": stats.quantile(0.5),
+                    "p95_seconds": stats.quantile(0.95),
+                    "p99_seconds": stats.quantile(0.99),
+                    "bytes_per_second": (stats.request_bytes + stats.response_bytes) / elapsed
+                }
+                for operation, stats in self._operations.items()
+            }
+
+    def to_prometheus(self, prefix: str = "tonic") -> str:
+        """
+        The metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            f"# TYPE {prefix}_requests_total counter",
+            f"# TYPE {prefix}_request_errors_total counter",
+            f"# TYPE {prefix}_request_retries_total counter",
+            f"# TYPE {prefix}_request_bytes_total counter",
+            f"# TYPE {prefix}_request_duration_seconds histogram"
+        ]
+        with self._lock:
+            for operation, stats in sorted(self._operations.items()):
+                label = f'operation="{operation}"'
+                for status, count in sorted(stats.statuses.items()):
+                    lines.append(f'{prefix}_requests_total{{{label},status="{status}"}} {count}')
+                lines.append(f"{prefix}_request_errors_total{{{label}}} {stats.errors}")
+                lines.append(f"{prefix}_request_retries_total{{{label}}} {stats.retries}")
+                lines.append(f'{prefix}_request_bytes_total{{{label},direction="sent"}} {stats.request_bytes}')
+                lines.append(f'{prefix}_request_bytes_total{{{label},direction="received"}} {stats.response_bytes}')
+                total = 0
+                for bound, count in zip(LATENCY_BUCKETS, stats.buckets):
+                    total += count
+                    lines.append(f'{prefix}_request_duration_seconds_bucket{{{label},le="{bound}"}} {total}')
+                lines.append(f'{prefix}_request_duration_seconds_bucket{{{label},le="+Inf"}} {stats.requests}')
+                lines.append(f"{prefix}_request_duration_seconds_sum{{{label}}} {stats.seconds}")
+                lines.append(f"{prefix}_request_duration_seconds_count{{{label}}} {stats.requests}")
+        return "\n".join(lines) + "\n"
+
+class SpanRecorder(RequestObserver):
+    """
+    Records every request as a span with OpenTelemetry's field and attribute names, keeping the latest max_spans.
+    Spans can also be handed to an exporter as they end, without depending on the OpenTelemetry packages.
+    """
+    def __init__(self, max_spans: int = 10000, exporter: Callable[[dict], None] | None = None, service_name: str = "tonic"):
+        self._spans = deque(maxlen=max_spans)
+        self._exporter = exporter
+        self._service_name = service_name
+        self._trace_id = os.urandom(16).hex()
+
+    def on_request_end(self, request: RequestInfo):
+        attributes = {
+            "http.request.method": request.method,
+            "url.path": request.url,
+            "tonic.operation": request.operation,
+            "http.request.body.size": request.request_bytes,
+            "http.request.resend_count": request.retries
+        }
+        if request.status is not None:
+            attributes["http.response.status_code"] = request.status
+        if request.response_bytes is not None:
+            attributes["http.response.body.size"] = request.response_bytes
+        if request.error is not None:
+            attributes["error.type"] = type(request.error).__name__
+
+        failed = request.error is not None or (request.status is not None and request.status >= 500)
+        span = {
+            "trace_id": self._trace_id,
+            "span_id": os.urandom(8).hex(),
+            "name": f"{request.method} {request.operation}",
+            "kind": "SPAN_KIND_CLIENT",
+            "start_time_unix_nano": request.start_time,
+            "end_time_unix_nano": request.start_time + int(request.seconds * 1e9),
+            "attributes": attributes,
+            "status": {"code": "STATUS_CODE_ERROR" if failed else "STATUS_CODE_OK"},
+            "resource": {"service.name": self._service_name}
+        }
+        self._spans.append(span)
+        if self._exporter is not None:
+            self._exporter(span)
+
+    def spans(self) -> list[dict]:
+        return list(self._spans)
+
+    def to_json(self) -> str:
+        return json.dumps(self.spans())
+
+    def clear(self):
+        self._spans.clear()
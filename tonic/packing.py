@@ -0,0 +1,237 @@
+import json
+import time
+import uuid
+import zlib
+import threading
+from collections import OrderedDict
+
+from .types import *
+from .exceptions import ChecksumMismatch
+
+PACK_SUFFIX = ".pack"
+INDEX_SUFFIX = ".index"
+
+class PackWriter:
+    """
+    Batches small objects into packs, so a million tiny writes cost a few requests per pack instead of two each.
+    Every pack goes up as one object with an index object beside it recording each member's offset, length and
+    crc32, the index last so a pack is only seen once it's complete. A pack is sent once it reaches max_pack_size
+    or once its first member has waited flush_interval seconds, and on flush or close.
+    """
+    def __init__(self,
+        tonic,
+        bucket: str,
+        prefix: str = "packs/",
+        max_pack_size: int = 8 * MB_SIZE,
+        flush_interval: float | None = 5.0,
+        **put_kwargs):
+
+        self._tonic = tonic
+        self._bucket = bucket
+        self._prefix = prefix
+        self._max_pack_size = max_pack_size
+        self._flush_interval = flush_interval
+        self._put_kwargs = put_kwargs
+        self._buffer = bytearray()
+        self._members = {}
+        self._started = None
+        self._error = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._timer = None
+        if flush_interval is not None:
+            self._timer = threading.Thread(target=self._flush_on_time, daemon=True, name="tonic-pack-flush")
+            self._timer.start()
+
+    @property
+    def bucket(self) -> str:
+        return self._bucket
+
+    @property
+    def prefix(self) -> str:
+        return self._prefix
+
+    def _raise_error(self):
+        # a pack sent from the timer thread that failed is reported to the next caller
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _seal(self) -> tuple[str, bytes, dict] | None:
+        # take the buffered members as a pack, named so packs sort in the order they were sealed
+        if not self._members:
+            return None
+        pack_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        pack = (pack_id, bytes(self._buffer), self._members)
+        self._buffer = bytearray()
+        self._members = {}
+        self._started = None
+        return pack
+
+    def _send(self, pack: tuple[str, bytes, dict] | None) -> str | None:
+        if pack is None:
+            return None
+        pack_id, data, members = pack
+        pack_key = f"{self._prefix}{pack_id}{PACK_SUFFIX}"
+        result = self._tonic.put_object(self._bucket, pack_key, data, **self._put_kwargs)
+        if result.get("status_code") != 200:
+            raise RuntimeError(f"pack {pack_key} failed to upload: {result}")
+
+        index = json.dumps({"pack": pack_key, "size": len(data), "members": members}, separators=(",", ":")).encode()
+        result = self._tonic.put_object(self._bucket, f"{self._prefix}{pack_id}{INDEX_SUFFIX}", index, content_type="application/json")
+        if result.get("status_code") != 200:
+            raise RuntimeError(f"index for pack {pack_key} failed to upload: {result}")
+        return pack_key
+
+    def _flush_on_time(self):
+        while True:
+            with self._condition:
+                # sleep until the oldest buffered member is due, or something is buffered
+                while not self._closed and (self._started is None or time.monotonic() - self._started < self._flush_interval):
+                    self._condition.wait(None if self._started is None else self._started + self._flush_interval - time.monotonic())
+                if self._closed:
+                    return
+                pack = self._seal()
+            try:
+                self._send(pack)
+            except Exception as e:
+                self._error = e
+
+    def add(self, key: str, data: bytes) -> None:
+        """
+        Buffer an object for the next pack, a key added again replaces the earlier one for readers.
+        """
+        self._raise_error()
+        packs = []
+        with self._condition:
+            if self._closed:
+                raise ValueError("add on a closed PackWriter")
+            if key in self._members:
+                # a pack holds a key once, the earlier write goes in the pack before it
+                packs.append(self._seal())
+            if self._started is None:
+                self._started = time.monotonic()
+                self._condition.notify()
+            self._members[key] = [len(self._buffer), len(data), zlib.crc32(data)]
+            self._buffer += data
+            if len(self._buffer) >= self._max_pack_size:
+                packs.append(self._seal())
+
+        # packs go up outside the lock so other threads can keep adding
+        for pack in packs:
+            self._send(pack)
+
+    def flush(self) -> str | None:
+        """
+        Send whatever is buffered as a pack now, returns the pack's key or None when nothing was buffered.
+        """
+        self._raise_error()
+        with self._condition:
+            pack = self._seal()
+        return self._send(pack)
+
+    def close(self):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+
+    def __enter__(self) -> "PackWriter":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class PackReader:
+    """
+    Reads members of the packs a PackWriter wrote, each with one range request for just its bytes, or from
+    whole packs kept in memory up to cache_size bytes when members of the same pack are read together.
+    refresh loads the indexes of packs written since it was last called.
+    """
+    def __init__(self, tonic, bucket: str, prefix: str = "packs/", cache_size: int = 0):
+        self._tonic = tonic
+        self._bucket = bucket
+        self._prefix = prefix
+        self._cache_size = cache_size
+        self._members = {}
+        self._pack_sizes = {}
+        self._indexes = set()
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self) -> int:
+        """
+        Load the indexes of new packs, returns how many were found.
+        """
+        index_keys = sorted(
+            obj.name for obj in self._tonic.iter_objects(self._bucket, prefix=self._prefix or None)
+            if obj.name.startswith(self._prefix) and obj.name.endswith(INDEX_SUFFIX) and obj.name not in self._indexes
+        )
+
+        # packs are named in the order they were written, so later ones win for keys written twice
+        for index_key in index_keys:
+            index = json.loads(self._tonic.get_object_bytes(self._bucket, index_key))
+            with self._lock:
+                for key, (offset, length, crc) in index["members"].items():
+                    self._members[key] = (index["pack"], offset, length, crc)
+                self._pack_sizes[index["pack"]] = index["size"]
+                self._indexes.add(index_key)
+        return len(index_keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def keys(self) -> list[str]:
+        return list(self._members)
+
+    def _cached_pack(self, pack_key: str) -> bytes | None:
+        with self._lock:
+            data = self._cache.get(pack_key)
+            if data is not None:
+                self._cache.move_to_end(pack_key)
+            return data
+
+    def _cache_pack(self, pack_key: str, data: bytes):
+        with self._lock:
+            if pack_key in self._cache:
+                return
+            self._cache[pack_key] = data
+            self._cached_bytes += len(data)
+            # least recently read packs go first
+            while self._cached_bytes > self._cache_size:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= len(evicted)
+
+    def get(self, key: str) -> bytes:
+        """
+        A member's bytes, raises KeyError for keys in no known pack and ChecksumMismatch if they arrive damaged.
+        """
+        pack_key, offset, length, crc = self._members[key]
+        if not length:
+            return b""
+
+        # packs that fit the cache come whole, their other members are likely read next,
+        # bigger ones would only be thrown away so their members are read on their own
+        cacheable = self._pack_sizes[pack_key] <= self._cache_size
+        data = self._cached_pack(pack_key) if cacheable else None
+        if data is not None:
+            member = data[offset:offset + length]
+        elif cacheable:
+            data = self._tonic.get_object_bytes(self._bucket, pack_key)
+            self._cache_pack(pack_key, data)
+            member = data[offset:offset + length]
+        else:
+            member = self._tonic.get_object_bytes(self._bucket, pack_key, offset, offset + length - 1)
+
+        if zlib.crc32(member) != crc:
+            raise ChecksumMismatch(self._bucket, key, "crc32", f"{crc:08x}", f"{zlib.crc32(member):08x}")
+        return member
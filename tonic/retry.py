@@ -0,0 +1,225 @@
+import time
+import random
+import threading
+import urllib3
+from itertools import takewhile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable
+
+class JitteredRetry(urllib3.Retry):
+    """
+    urllib3 Retry that waits a random time up to the exponential backoff (full jitter), from the first
+    retry on, so clients that failed together don't retry together.
+    """
+    def get_backoff_time(self) -> float:
+        # only the latest run of errors counts, redirects in between start it over
+        errors = len(list(takewhile(lambda history: history.redirect_location is None, reversed(self.history))))
+        if not errors:
+            return 0
+        return random.uniform(0, min(self.backoff_max, self.backoff_factor * (2 ** (errors - 1))))
+
+class RetryPolicy:
+    """
+    How failed requests are retried. Connection failures are always retried as the request never reached
+    the server, timeouts and retry_statuses only for idempotent methods unless retry_non_idempotent is set.
+    Waits double from backoff up to max_backoff with full jitter, or follow the server's Retry-After up to
+    max_retry_after.
+    """
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+    def __init__(self,
+        max_retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 10.0,
+        jitter: bool = True,
+        retry_statuses: tuple[int, ...] = (429, 500, 502, 503, 504),
+        retry_non_idempotent: bool = False,
+        respect_retry_after: bool = True,
+        max_retry_after: float = 60.0):
+
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_non_idempotent = retry_non_idempotent
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+    def _retry(self, **kwargs) -> urllib3.Retry:
+        retry_class = JitteredRetry if self.jitter else urllib3.Retry
+        return retry_class(
+            backoff_factor=self.backoff,
+            backoff_max=self.max_backoff,
+            respect_retry_after_header=self.respect_retry_after,
+            retry_after_max=int(self.max_retry_after),
+            # the last response is handed back rather than raised, callers check the status
+            raise_on_status=False,
+            **kwargs
+        )
+
+    def urllib3_retry(self) -> urllib3.Retry:
+        return self._retry(
+            total=self.max_retries,
+            allowed_methods=None if self.retry_non_idempotent else self.IDEMPOTENT_METHODS,
+            status_forcelist=self.retry_statuses
+        )
+
+    def connect_retry(self) -> urllib3.Retry:
+        # for requests the caller retries itself, only failures to connect are left to urllib3
+        return self._retry(total=self.max_retries, read=0, status=0, other=0)
+
+    def failover_retry(self) -> urllib3.Retry:
+        # another endpoint takes over at the first failure, only redirects are followed
+        return self._retry(total=None, connect=0, read=0, status=0, other=0, redirect=3)
+
+    def retryable(self, method: str, status: int | None = None) -> bool:
+        # a status of None is a failure after the request went out
+        if method not in self.IDEMPOTENT_METHODS and not self.retry_non_idempotent:
+            return False
+        return status is None or status in self.retry_statuses
+
+    def delay(self, attempt: int, response=None) -> float:
+        """
+        Seconds to wait before retry number attempt, counting from 1, after the given response if there was one.
+        """
+        if self.respect_retry_after and response is not None and response.status in urllib3.Retry.RETRY_AFTER_STATUS_CODES:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return self._retry().parse_retry_after(retry_after)
+                except urllib3.exceptions.InvalidHeader:
+                    pass
+
+        backoff = min(self.max_backoff, self.backoff * (2 ** (attempt - 1)))
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+def _close_response(future: Future):
+    # the slower copy of a hedged request is closed rather than handed back to the pool half read
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+class HedgePolicy:
+    """
+    Sends a second copy of a part upload or a download request once the first has taken longer than the
+    quantile of recent ones for the operation, and takes whichever answers first. Hedges are capped at
+    max_ratio of requests so a slow server isn't sent twice the load. First copies run on threads that
+    grow with the callers waiting on them, so hedging never caps a client's concurrency, and hedge copies
+    on max_workers threads of their own so they never queue behind first copies.
+    """
+    # first copies are bounded by the callers blocked on them, not by this
+    MAX_CALLERS = 1 << 16
+
+    def __init__(self,
+        quantile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+        max_ratio: float = 0.05,
+        max_workers: int = 64):
+
+        self._quantile = quantile
+        self._min_samples = min_samples
+        self._window = window
+        self._max_ratio = max_ratio
+        self._max_workers = max_workers
+        self._latencies = {}
+        self._requests = 0
+        self._hedges = 0
+        self._executor = None
+        self._hedge_executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def requests(self) -> int:
+        return self._requests
+
+    @property
+    def hedges(self) -> int:
+        return self._hedges
+
+    def record(self, operation: str, seconds: float):
+        with self._lock:
+            latencies = self._latencies.get(operation)
+            if latencies is None:
+                latencies = self._latencies[operation] = deque(maxlen=self._window)
+            latencies.append(seconds)
+
+    def delay(self, operation: str) -> float | None:
+        """
+        Seconds after which a request for the operation is hedged, None until enough have been seen.
+        """
+        with self._lock:
+            latencies = self._latencies.get(operation)
+            if latencies is None or len(latencies) < self._min_samples:
+                return None
+            latencies = sorted(latencies)
+        return latencies[min(len(latencies) - 1, int(self._quantile * len(latencies)))]
+
+    def _timed(self, operation: str, send: Callable, started: threading.Event):
+        started.set()
+        start = time.perf_counter()
+        response = send()
+        self.record(operation, time.perf_counter() - start)
+        return response
+
+    def _submit(self, operation: str, send: Callable, started: threading.Event, hedge: bool = False) -> Future:
+        with self._lock:
+            if self._executor is None:
+                # idle threads are reused, so there are only ever as many as callers (and losing copies) at once
+                self._executor = ThreadPoolExecutor(max_workers=self.MAX_CALLERS, thread_name_prefix="tonic-request")
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="tonic-hedge")
+            executor = self._hedge_executor if hedge else self._executor
+            return executor.submit(self._timed, operation, send, started)
+
+    def run(self, operation: str, send: Callable):
+        """
+        Call send, a function making the request and returning its response, hedging it if it runs long.
+        """
+        delay = self.delay(operation)
+        with self._lock:
+            self._requests += 1
+        if delay is None:
+            return self._timed(operation, send, threading.Event())
+
+        # the clock starts once the request is sent, not while it waits for a worker
+        started = threading.Event()
+        first = self._submit(operation, send, started)
+        started.wait()
+        done, _ = wait([first], timeout=delay)
+        with self._lock:
+            hedge = not done and self._hedges < self._max_ratio * self._requests
+            if hedge:
+                self._hedges += 1
+        if not hedge:
+            return first.result()
+
+        # the first success wins, an error only counts once both copies have failed, since the
+        # copy that loses a race to finish an upload is refused by the server
+        pending = {first, self._submit(operation, send, threading.Event(), hedge=True)}
+        failed = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = None
+            for future in done:
+                if winner is None and future.exception() is None and future.result().status < 300:
+                    winner = future
+                elif failed is None:
+                    failed = future
+                else:
+                    _close_response(future)
+            if winner is not None:
+                for future in pending:
+                    future.add_done_callback(_close_response)
+                if failed is not None:
+                    _close_response(failed)
+                return winner.result()
+        return failed.result()
+
+    def shutdown(self):
+        with self._lock:
+            executors = (self._executor, self._hedge_executor)
+            self._executor = self._hedge_executor = None
+        for executor in executors:
+            if executor is not None:
+                executor.shutdown(wait=False)
@@ -0,0 +1,234 @@
+import io
+import mmap
+import queue
+import threading
+import contextlib
+from typing import BinaryIO, Iterator
+from urllib3 import BaseHTTPResponse
+
+from .types import *
+from .throttle import Throttle
+
+class ObjectStream(io.RawIOBase):
+    """
+    Read-only file-like view over an object body, read from the connection a chunk at a time.
+    With read_ahead > 0 a background thread keeps up to that many chunks buffered ahead of the reader.
+    Chunks are read no faster than throttle allows.
+    """
+    def __init__(self, response: BaseHTTPResponse, chunk_size: int = STREAM_CHUNK_SIZE, read_ahead: int = 0, throttle: Throttle | None = None, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL):
+        super().__init__()
+        self._response = response
+        self._chunks = response.stream(chunk_size)
+        if throttle is not None:
+            self._chunks = throttle.limit(self._chunks, "get_object", priority)
+        self._buffer = memoryview(b"")
+        self._eof = False
+        self._queue = None
+        self._thread = None
+        self._stop = threading.Event()
+
+        # start filling the read-ahead buffer
+        if read_ahead > 0:
+            self._queue = queue.Queue(maxsize=read_ahead)
+            self._thread = threading.Thread(target=self._prefetch, daemon=True)
+            self._thread.start()
+
+    @property
+    def response(self) -> BaseHTTPResponse:
+        return self._response
+
+    def _prefetch(self):
+        try:
+            for chunk in self._chunks:
+                self._queue.put(chunk)
+                if self._stop.is_set():
+                    return
+        except Exception as e:
+            if not self._stop.is_set():
+                self._queue.put(e)
+            return
+        self._queue.put(None)
+
+    def _next_chunk(self) -> bytes | None:
+        if self._eof:
+            return None
+        if self._queue is None:
+            chunk = next(self._chunks, None)
+        else:
+            chunk = self._queue.get()
+            if isinstance(chunk, Exception):
+                self._eof = True
+                raise chunk
+        if chunk is None:
+            self._eof = True
+            self._response.release_conn()
+        return chunk
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self.closed:
+            raise ValueError("I/O operation on closed stream")
+
+        # refill from the next chunk once the current one is used up
+        while not self._buffer:
+            chunk = self._next_chunk()
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk)
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if self.closed:
+            return
+        self._stop.set()
+        if not self._eof:
+            # the body was not fully read so the connection can't be reused
+            self._response.close()
+        if self._thread is not None:
+            # unblock the prefetch thread if it is waiting on a full queue
+            while self._thread.is_alive():
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    self._thread.join(0.01)
+        self._response.release_conn()
+        super().close()
+
+class BufferReader:
+    """
+    Reader over an in-memory or memory-mapped buffer whose read() hands back memoryview slices
+    instead of copies, so part bodies go to the socket without being copied first.
+    """
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def __len__(self) -> int:
+        return self._buffer.nbytes
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> memoryview:
+        end = len(self._buffer) if size is None or size < 0 else min(self._position + size, len(self._buffer))
+        view = self._buffer[self._position:end]
+        self._position = max(self._position, end)
+        return view
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._buffer)
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self):
+        self._buffer.release()
+
+
+@contextlib.contextmanager
+def open_file_reader(file_path: str, zero_copy: bool = True) -> Iterator["BinaryIO | BufferReader"]:
+    """
+    Open a file for uploading, memory-mapped behind a BufferReader where the file can be mapped and zero_copy
+    is set. Another process truncating a mapped file kills this one with SIGBUS on the next read of the lost
+    pages, so files that may change while they're read should be opened without zero_copy.
+    """
+    with open(file_path, "rb") as file:
+        mapped = None
+        if zero_copy:
+            try:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # empty files and things like pipes can't be mapped, they're read as usual
+                pass
+
+        if mapped is None:
+            yield file
+            return
+
+        # parts are read front to back
+        if hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        reader = BufferReader(mapped)
+        try:
+            yield reader
+        finally:
+            reader.close()
+            try:
+                mapped.close()
+            except BufferError:
+                # a part body is still referenced somewhere, the map is closed once it's collected
+                pass
+
+class IterableReader(io.RawIOBase):
+    """
+    File-like reader over an iterable of bytes-like chunks, such as a generator.
+    """
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._buffer = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._buffer = memoryview(chunk).cast("B")
+
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+def read_into(source, buffer: memoryview) -> int:
+    """
+    Fill buffer from source, looping over short reads from pipes and sockets, until it's full or the source ends.
+    """
+    filled = 0
+    while filled < len(buffer):
+        if hasattr(source, "readinto"):
+            size = source.readinto(buffer[filled:])
+        else:
+            chunk = source.read(len(buffer) - filled)
+            size = len(chunk)
+            buffer[filled:filled + size] = chunk
+        if not size:
+            break
+        filled += size
+    return filled
+
+class PartBufferPool:
+    """
+    Reader for streams that can't seek, each part is read into a reusable buffer that goes back
+    to the pool once the part is uploaded, so only the parts in flight are ever held in memory.
+    """
+    def __init__(self, source):
+        self._source = source
+        self._free = []
+
+    def read(self, size: int) -> memoryview:
+        buffer = self._free.pop() if self._free else None
+        if buffer is None or len(buffer) < size:
+            buffer = bytearray(size)
+        view = memoryview(buffer)[:size]
+        return view[:read_into(self._source, view)]
+
+    def release(self, part_data: memoryview):
+        self._free.append(part_data.obj)
@@ -0,0 +1,237 @@
+import os
+import sqlite3
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+
+from .types import *
+from .checksum import file_checksum
+from .transfer import TransferManager
+
+SYNC_INDEX_NAME = ".tonic-sync.db"
+
+class SyncIndex:
+    """
+    Local record of every file's size, modified time and checksum, and of the checksum last uploaded
+    to each key, kept in sqlite so only files whose size or modified time moved are hashed again.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                algorithm TEXT NOT NULL,
+                checksum TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS synced (
+                bucket TEXT NOT NULL,
+                key TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                PRIMARY KEY (bucket, key)
+            );
+        """)
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def files(self, algorithm: OBJECT_CHECKSUM_ALGORITHMS) -> dict[str, tuple[int, int, str]]:
+        # read in one pass, a row at a time lookup would dominate a sync of many files
+        rows = self._connection.execute("SELECT path, size, mtime_ns, checksum FROM files WHERE algorithm = ?", (algorithm.value,))
+        return {path: (size, mtime_ns, checksum) for path, size, mtime_ns, checksum in rows}
+
+    def synced(self, bucket: str) -> dict[str, str]:
+        rows = self._connection.execute("SELECT key, checksum FROM synced WHERE bucket = ?", (bucket,))
+        return dict(rows)
+
+    def update_files(self, algorithm: OBJECT_CHECKSUM_ALGORITHMS, files: list[tuple[str, int, int, str]]):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, algorithm, checksum) VALUES (?, ?, ?, ?, ?)",
+                [(path, size, mtime_ns, algorithm.value, checksum) for path, size, mtime_ns, checksum in files]
+            )
+
+    def remove_files(self, paths: list[str]):
+        with self._connection:
+            self._connection.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in paths])
+
+    def update_synced(self, bucket: str, synced: list[tuple[str, str]]):
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO synced (bucket, key, checksum) VALUES (?, ?, ?)",
+                [(bucket, key, checksum) for key, checksum in synced]
+            )
+
+    def remove_synced(self, bucket: str, keys: list[str]):
+        with self._connection:
+            self._connection.executemany("DELETE FROM synced WHERE bucket = ? AND key = ?", [(bucket, key) for key in keys])
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self) -> "SyncIndex":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+class SyncResult:
+    def __init__(self, uploaded: list[str], deleted: list[str], unchanged: int, failed: dict[str, any]):
+        self._uploaded = uploaded
+        self._deleted = deleted
+        self._unchanged = unchanged
+        self._failed = failed
+
+    @property
+    def uploaded(self) -> list[str]:
+        return self._uploaded
+
+    @property
+    def deleted(self) -> list[str]:
+        return self._deleted
+
+    @property
+    def unchanged(self) -> int:
+        return self._unchanged
+
+    @property
+    def failed(self) -> dict[str, any]:
+        return self._failed
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(uploaded={len(self._uploaded)}, deleted={len(self._deleted)}, unchanged={self._unchanged}, failed={len(self._failed)})"
+
+def walk_files(local_dir: str) -> Iterator[tuple[str, os.stat_result]]:
+    """
+    Every regular file under local_dir as its path relative to local_dir, with its stat, leaving out the sync index.
+    """
+    pending = [""]
+    while pending:
+        relative_dir = pending.pop()
+        with os.scandir(os.path.join(local_dir, relative_dir)) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    pending.append(relative_path)
+                elif entry.is_file() and not entry.name.startswith(SYNC_INDEX_NAME):
+                    yield relative_path, entry.stat()
+
+def _hash_files(local_dir: str, paths: list[str], algorithm: OBJECT_CHECKSUM_ALGORITHMS, hash_processes: int | None) -> list[str]:
+    hash_file = functools.partial(file_checksum, algorithm=algorithm)
+    full_paths = [os.path.join(local_dir, path) for path in paths]
+
+    # starting processes costs more than hashing a handful of files
+    hash_processes = hash_processes or os.cpu_count() or 1
+    if hash_processes == 1 or len(full_paths) < 2:
+        return list(map(hash_file, full_paths))
+
+    # files go out in batches so a million small files aren't a million round trips to the workers,
+    # the workers are spawned rather than forked from a process that may have threads mid-request
+    with ProcessPoolExecutor(max_workers=hash_processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return list(executor.map(hash_file, full_paths, chunksize=max(1, len(full_paths) // (4 * hash_processes))))
+
+def sync_directory(
+    tonic,
+    local_dir: str,
+    bucket: str,
+    prefix: str = "",
+    delete: bool = False,
+    index_path: str | None = None,
+    algorithm: OBJECT_CHECKSUM_ALGORITHMS = OBJECT_CHECKSUM_ALGORITHMS.CRC32,
+    max_requests: int = 16,
+    hash_processes: int | None = None,
+    dry_run: bool = False,
+    progress: Callable[[str, any], None] | None = None,
+    zero_copy: bool = False
+) -> SyncResult:
+
+    with SyncIndex(index_path or os.path.join(local_dir, SYNC_INDEX_NAME)) as index:
+        known_files = index.files(algorithm)
+        synced = index.synced(bucket)
+
+        # the bucket as it stands, only what's under the prefix
+        remote = {obj.name: obj.size for obj in tonic.iter_objects(bucket, prefix=prefix or None) if obj.name.startswith(prefix)}
+
+        # files that kept their size and modified time keep their checksum, the rest are hashed again
+        local = {}
+        to_hash = []
+        for path, stat in walk_files(local_dir):
+            key = prefix + path.replace(os.sep, "/")
+            known = known_files.pop(path, None)
+            if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+                local[key] = (path, stat.st_size, known[2])
+            else:
+                local[key] = (path, stat.st_size, None)
+                to_hash.append((key, path, stat.st_size, stat.st_mtime_ns))
+
+        checksums = _hash_files(local_dir, [path for _, path, _, _ in to_hash], algorithm, hash_processes)
+        hashed = []
+        for (key, path, size, mtime_ns), checksum in zip(to_hash, checksums):
+            local[key] = (path, size, checksum)
+            hashed.append((path, size, mtime_ns, checksum))
+        if not dry_run:
+            index.update_files(algorithm, hashed)
+            index.remove_files(list(known_files))
+
+        # upload whatever the bucket doesn't have, or has in a different form than last uploaded
+        uploads = []
+        unchanged = 0
+        for key, (path, size, checksum) in local.items():
+            if remote.get(key) == size and synced.get(key) == checksum:
+                unchanged += 1
+            else:
+                uploads.append((key, path, checksum))
+        deletes = [key for key in remote if key not in local] if delete else []
+
+        with TransferManager(tonic, max_requests=max_requests) as manager:
+            failed = {}
+
+            # an object of the same size the index has no record of (a new or moved index, or a mirror synced
+            # from elsewhere) may already hold the file, the server's checksum settles it before anything is sent
+            to_check = [(key, path, checksum) for key, path, checksum in uploads if key in remote and remote[key] in (local[key][1], None)]
+            checks = [(key, manager.scheduler.submit(("checksum", bucket, key), 0, tonic.get_object_checksum, bucket, key, algorithm)) for key, _, _ in to_check]
+            matched = []
+            for (key, path, checksum), (_, future) in zip(to_check, checks):
+                try:
+                    response = future.result()
+                except Exception:
+                    response = None
+                if isinstance(response, dict) and response.get("status_code") == 200 and response["result"] == checksum:
+                    matched.append((key, checksum))
+            unchanged += len(matched)
+            matched_keys = {key for key, _ in matched}
+            uploads = [(key, path, checksum) for key, path, checksum in uploads if key not in matched_keys]
+            if dry_run:
+                return SyncResult([key for key, _, _ in uploads], deletes, unchanged, {})
+            index.update_synced(bucket, matched)
+
+            def finished(futures: list) -> list[str]:
+                # the keys whose request succeeded, the rest are reported as failed
+                succeeded = []
+                for key, future in futures:
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        response = e
+                    if isinstance(response, dict) and response.get("status_code") == 200:
+                        succeeded.append(key)
+                    else:
+                        failed[key] = response
+                    if progress is not None:
+                        progress(key, response)
+                return succeeded
+
+            # objects aren't overwritten in place, changed ones are deleted and uploaded again, the local
+            # file is the source of truth so a failed upload leaves the key missing until the next sync
+            checksums = {key: checksum for key, _, checksum in uploads}
+            uploaded = finished([(key, manager.upload(bucket, key, os.path.join(local_dir, path), replace=True, zero_copy=zero_copy)) for key, path, _ in uploads])
+            index.update_synced(bucket, [(key, checksums[key]) for key in uploaded])
+
+            deleted = finished([(key, manager.delete(bucket, key)) for key in deletes])
+            index.remove_synced(bucket, deleted)
+
+    return SyncResult(uploaded, deleted, unchanged, failed)
@@ -0,0 +1,292 @@
+import re
+import json
+import time
+import zlib
+import uuid
+import socket
+import hashlib
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+try:
+    import crc32c
+except ImportError:
+    crc32c = None
+
+from .types import *
+
+def _checksum(algorithm: str, data: bytes) -> str | None:
+    if algorithm == OBJECT_CHECKSUM_ALGORITHMS.SHA256.value:
+        return hashlib.sha256(data).hexdigest()
+    if algorithm == OBJECT_CHECKSUM_ALGORITHMS.SHA1.value:
+        return hashlib.sha1(data).hexdigest()
+    if algorithm == OBJECT_CHECKSUM_ALGORITHMS.CRC32.value:
+        return f"{zlib.crc32(data) & 0xFFFFFFFF:08x}"
+    if algorithm == OBJECT_CHECKSUM_ALGORITHMS.CRC32C.value and crc32c is not None:
+        return f"{crc32c.crc32c(data) & 0xFFFFFFFF:08x}"
+    return None
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        # headers and body go out as separate writes, don't let them wait on each other
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _respond(self, method: str):
+        fake = self.server.fake
+        body = self._read_body()
+
+        # everything is served under the api root
+        path = self.path[len("/api/v1"):] if self.path.startswith("/api/v1/") else ""
+
+        # a stalled part arrives late, after any copy of it sent meanwhile
+        match = re.match(r"/objects/stream/write/part/[^/]+/(\d+)/", path)
+        if match:
+            with fake.lock:
+                stall = fake.stall_parts.pop(int(match[1]), 0.0)
+            time.sleep(stall)
+
+        with fake.lock:
+            fake.requests += 1
+            status, result, headers = getattr(self, f"_{method.lower()}")(fake, path, body)
+
+        if isinstance(result, (bytes, bytearray)):
+            response_body = result
+        else:
+            response_body = json.dumps({
+                "status": "success" if status == 200 else "error",
+                "status_code": status,
+                "result": result,
+                "message": None if status == 200 else self.responses.get(status, ("",))[0]
+            }).encode()
+
+        # every request waits out the latency, bodies take as long as the bandwidth allows,
+        # outside the lock so requests overlap as they would on a real server
+        delay = fake.latency
+        if fake.bandwidth:
+            delay += (len(body) + len(response_body)) / fake.bandwidth
+        if delay:
+            time.sleep(delay)
+
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json" if not isinstance(result, (bytes, bytearray)) else "application/octet-stream")
+        self.send_header("Content-Length", str(len(response_body)))
+        self.end_headers()
+        self.wfile.write(response_body)
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        self._respond("POST")
+
+    def do_PUT(self):
+        self._respond("PUT")
+
+    def do_DELETE(self):
+        self._respond("DELETE")
+
+    def _post(self, fake: "FakeTonicServer", path: str, body: bytes) -> tuple:
+        if path == "/buckets":
+            request = json.loads(body)
+            if request["name"] in fake.buckets:
+                return 409, None, None
+            fake.buckets[request["name"]] = {}
+            if request.get("locked"):
+                fake.locked.add(request["name"])
+            return 200, {"name": request["name"]}, None
+
+        match = re.match(r"/objects/stream/write/new/name/([^/]+)$", path)
+        if match:
+            request = json.loads(body)
+            objects = fake.buckets.get(match[1])
+            if objects is None:
+                return 404, None, None
+            if request["object_name"] in objects and not fake.allow_overwrite:
+                return 409, None, None
+            upload_id = uuid.uuid4().hex
+            fake.uploads[upload_id] = {"bucket": match[1], "key": request["object_name"], "parts": {}, "count": request["parts"], "content_encoding": request.get("content_encoding")}
+            if request["parts"] == 0:
+                fake._store(match[1], request["object_name"], b"", request.get("content_encoding"))
+            return 200, {"upload_id": upload_id}, None
+        return 404, None, None
+
+    def _put(self, fake: "FakeTonicServer", path: str, body: bytes) -> tuple:
+        match = re.match(r"/objects/stream/write/part/([^/]+)/(\d+)/(\d+)$", path)
+        if not match:
+            return 404, None, None
+
+        which_part = int(match[2])
+        if fake.fail_parts.get(which_part, 0) > 0:
+            fake.fail_parts[which_part] -= 1
+            return 503, None, None if fake.retry_after is None else {"Retry-After": str(fake.retry_after)}
+        upload = fake.uploads.get(match[1])
+        if upload is None:
+            return 404, None, None
+        if len(body) != int(match[3]):
+            return 400, None, None
+
+        # the object appears once its last part is in
+        upload["parts"][which_part] = body
+        if len(upload["parts"]) == upload["count"]:
+            fake._store(upload["bucket"], upload["key"], b"".join(upload["parts"][part] for part in range(upload["count"])), upload["content_encoding"])
+            del fake.uploads[match[1]]
+        return 200, {"part": which_part}, None
+
+    def _get(self, fake: "FakeTonicServer", path: str, body: bytes) -> tuple:
+        if path.startswith("/status"):
+            return 200, None, None
+        if path == "/buckets":
+            return 200, [{"name": name} for name in fake.buckets], None
+
+        match = re.match(r"/objects/bucket/name/([^/?]+)(?:\?(.*))?$", path)
+        if match:
+            objects = fake.buckets.get(match[1])
+            if objects is None:
+                return 404, None, None
+            query = parse_qs(match[2] or "")
+            prefix = query["prefix"][0] if "prefix" in query and fake.prefix_listing else ""
+            listing = [{"name": name, "size": len(data), "creation_date": "2026-01-01T00:00:00"} for name, data in sorted(objects.items()) if name.startswith(prefix)]
+            if "offset" in query and fake.page_listing:
+                offset = int(query["offset"][0])
+                listing = listing[offset:offset + int(query["limit"][0])]
+            return 200, listing, None
+
+        match = re.match(r"/objects/checksum/name/([^/]+)/([^/]+)/(.+)$", path)
+        if match:
+            data = fake.buckets.get(match[2], {}).get(match[3])
+            if data is None:
+                return 404, None, None
+            checksum = _checksum(match[1], data)
+            if checksum is None:
+                return 400, None, None
+            if fake.corrupt:
+                checksum = "0" * len(checksum)
+            return 200, checksum, None
+
+        match = re.match(r"/objects/stream/read/name/([^/]+)/(.+)$", path)
+        data = None if not match else fake.buckets.get(match[1], {}).get(match[2])
+        if data is None:
+            return 404, None, None
+
+        # the encoding the object was uploaded with comes back the way http would send it
+        content_encoding = fake.encodings.get((match[1], match[2]))
+        headers = {} if content_encoding is None else {"Content-Encoding": content_encoding}
+
+        range_header = self.headers.get("Range")
+        if range_header and fake.honor_ranges and data:
+            start, end = range_header.split("=", 1)[1].split("-")
+            start, end = int(start), min(int(end), len(data) - 1)
+            if start >= len(data):
+                return 416, None, {"Content-Range": f"bytes */{len(data)}"}
+            return 206, data[start:end + 1], {**headers, "Content-Range": f"bytes {start}-{end}/{len(data)}"}
+        return 200, data, headers
+
+    def _delete(self, fake: "FakeTonicServer", path: str, body: bytes) -> tuple:
+        match = re.match(r"/buckets/name/(.+)$", path)
+        if match:
+            if match[1] in fake.locked:
+                return 403, None, None
+            if fake.buckets.pop(match[1], None) is None:
+                return 404, None, None
+            return 200, None, None
+
+        match = re.match(r"/objects/name/([^/]+)/(.+)$", path)
+        if match:
+            if fake.buckets.get(match[1], {}).pop(match[2], None) is None:
+                return 404, None, None
+            fake.encodings.pop((match[1], match[2]), None)
+            return 200, None, None
+        return 404, None, None
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def handle_error(self, request, client_address):
+        # clients hanging up mid-response are expected, timeouts in tests for one
+        pass
+
+class FakeTonicServer:
+    """
+    In-process stand-in for the /api/v1 endpoints Tonic uses, buckets, multipart writes, reads with ranges,
+    checksums and listings, kept in memory. Latency is added to every request and bandwidth (bytes per
+    second) paces request and response bodies, so benchmarks and tests can run without a real server.
+    """
+    def __init__(self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        bandwidth: int | None = None,
+        honor_ranges: bool = True,
+        page_listing: bool = True,
+        allow_overwrite: bool = False,
+        prefix_listing: bool = False):
+
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.honor_ranges = honor_ranges
+        self.page_listing = page_listing
+        self.allow_overwrite = allow_overwrite
+        self.prefix_listing = prefix_listing
+
+        # failures to hand out, part number to the number of 503s left (with a Retry-After if set),
+        # part number to seconds its next upload stalls for, and bad checksums
+        self.fail_parts = {}
+        self.retry_after = None
+        self.stall_parts = {}
+        self.corrupt = False
+
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.encodings = {}
+        self.locked = set()
+        self.uploads = {}
+        self.requests = 0
+
+        self._server = _FakeHTTPServer((host, port), _FakeHandler, bind_and_activate=False)
+        self._server.fake = self
+        self._thread = None
+
+    def _store(self, bucket: str, key: str, data: bytes, content_encoding: str | None):
+        self.buckets[bucket][key] = data
+        if content_encoding is None:
+            self.encodings.pop((bucket, key), None)
+        else:
+            self.encodings[(bucket, key)] = content_encoding
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeTonicServer":
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeTonicServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -0,0 +1,117 @@
+import time
+import threading
+from collections import Counter
+from typing import Iterable, Iterator
+
+from .types import *
+
+class _TokenBucket:
+    # rate bytes a second, saved up to burst, None is unlimited. Guarded by the Throttle's lock
+    def __init__(self, rate: float | None, burst: int | None = None):
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.rate = None
+        self.burst = None
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate: float | None, burst: int | None = None):
+        # a new limit starts full, a changed one keeps what was saved up, to the new burst
+        self._refill(time.monotonic())
+        unlimited = self.rate is None
+        self.rate = rate
+        self.burst = None if rate is None else max(1, int(burst or rate))
+        if rate is None:
+            self._tokens = 0.0
+        elif unlimited:
+            self._tokens = float(self.burst)
+        else:
+            self._tokens = min(self._tokens, self.burst)
+
+    def _refill(self, now: float):
+        if self.rate is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, nbytes: int, now: float) -> float:
+        # a chunk bigger than the burst goes once the bucket is full and leaves it owing the rest
+        if self.rate is None:
+            return 0.0
+        self._refill(now)
+        need = min(nbytes, self.burst)
+        return 0.0 if self._tokens >= need else (need - self._tokens) / self.rate
+
+    def take(self, nbytes: int):
+        if self.rate is not None:
+            self._tokens -= nbytes
+
+class Throttle:
+    """
+    Token bucket limits on the bytes a Tonic sends and receives, one over everything and one per operation
+    ("put_part" for uploaded parts, "get_object" for downloaded chunks). A request waiting for bandwidth goes
+    ahead of any waiting at a lower TRANSFER_PRIORITY. Limits can be changed with set_rate while transfers run.
+    """
+    def __init__(self,
+        rate: float | None = None,
+        burst: int | None = None,
+        operation_rates: dict[str, float | None] | None = None):
+
+        self._bucket = _TokenBucket(rate, burst)
+        self._operations = {operation: _TokenBucket(operation_rate) for operation, operation_rate in (operation_rates or {}).items()}
+        self._waiting = Counter()
+        self._condition = threading.Condition()
+
+    def rate(self, operation: str | None = None) -> float | None:
+        bucket = self._bucket if operation is None else self._operations.get(operation)
+        return None if bucket is None else bucket.rate
+
+    def set_rate(self, rate: float | None, burst: int | None = None, operation: str | None = None):
+        """
+        Change the limit in bytes a second, over everything or for one operation, None lifts it.
+        Transfers waiting for bandwidth pick the new limit up straight away.
+        """
+        with self._condition:
+            if operation is None:
+                self._bucket.set_rate(rate, burst)
+            elif operation in self._operations:
+                self._operations[operation].set_rate(rate, burst)
+            else:
+                self._operations[operation] = _TokenBucket(rate, burst)
+            self._condition.notify_all()
+
+    def acquire(self, nbytes: int, operation: str | None = None, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL):
+        """
+        Wait until nbytes can be sent or received.
+        """
+        buckets = [self._bucket]
+        if operation in self._operations:
+            buckets.append(self._operations[operation])
+
+        # without limits there's nothing to wait for, or to wait behind
+        if all(bucket.rate is None for bucket in buckets):
+            return
+
+        with self._condition:
+            self._waiting[priority.value] += 1
+            try:
+                while True:
+                    # nothing goes while a more urgent request is waiting, it's woken when that one goes
+                    timeout = None
+                    if not any(count for waiting, count in self._waiting.items() if waiting < priority.value):
+                        now = time.monotonic()
+                        timeout = max(bucket.wait_time(nbytes, now) for bucket in buckets)
+                        if timeout <= 0:
+                            for bucket in buckets:
+                                bucket.take(nbytes)
+                            return
+                    self._condition.wait(timeout)
+            finally:
+                self._waiting[priority.value] -= 1
+                self._condition.notify_all()
+
+    def limit(self, chunks: Iterable[bytes], operation: str | None = None, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL) -> Iterator[bytes]:
+        """
+        Pass chunks on no faster than the limits allow.
+        """
+        for chunk in chunks:
+            self.acquire(len(chunk), operation, priority)
+            yield chunk
@@ -0,0 +1,228 @@
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Iterable
+
+from .types import *
+
+class TransferScheduler:
+    """
+    Worker pool shared by every transfer, with one limit on requests in flight and an optional one on
+    the request body bytes they hold. Tasks are queued per group and the workers take from the groups
+    in turn, so a large object's parts can't hold up the groups queued behind them. Groups at a higher
+    TRANSFER_PRIORITY are taken from before any at a lower one.
+    """
+    def __init__(self, max_requests: int = 16, max_bytes: int | None = None):
+        self._max_bytes = max_bytes
+        self._queues = {priority: OrderedDict() for priority in sorted(TRANSFER_PRIORITY, key=lambda priority: priority.value)}
+        self._in_flight_bytes = 0
+        self._shutdown = False
+        self._condition = threading.Condition()
+        self._threads = [threading.Thread(target=self._work, daemon=True) for _ in range(max(1, max_requests))]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def in_flight_bytes(self) -> int:
+        return self._in_flight_bytes
+
+    def submit(self, group: Hashable, size: int, fn: Callable, *args, **kwargs) -> Future:
+        return self._enqueue(group, TRANSFER_PRIORITY.NORMAL, size, fn, args, kwargs)
+
+    def _enqueue(self, group: Hashable, priority: TRANSFER_PRIORITY, size: int, fn: Callable, args: tuple, kwargs: dict) -> Future:
+        future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new transfers after shutdown")
+            self._queues[priority].setdefault(group, deque()).append((future, size, fn, args, kwargs))
+            self._condition.notify()
+        return future
+
+    def _queued(self) -> bool:
+        return any(self._queues.values())
+
+    def _next_task(self):
+        # the first group in turn whose next task fits the byte budget, most urgent first, a task bigger
+        # than the whole budget still runs once nothing else is in flight
+        for queues in self._queues.values():
+            for group, tasks in queues.items():
+                size = tasks[0][1]
+                if self._max_bytes is None or not self._in_flight_bytes or self._in_flight_bytes + size <= self._max_bytes:
+                    task = tasks.popleft()
+                    if tasks:
+                        queues.move_to_end(group)
+                    else:
+                        del queues[group]
+                    return task
+        return None
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while (task := self._next_task()) is None:
+                    if self._shutdown and not self._queued():
+                        return
+                    self._condition.wait()
+                future, size, fn, args, kwargs = task
+                self._in_flight_bytes += size
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self._condition:
+                    self._in_flight_bytes -= size
+                    self._condition.notify_all()
+
+    def executor(self, group: Hashable, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL) -> "GroupExecutor":
+        return GroupExecutor(self, group, priority)
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                for queues in self._queues.values():
+                    for tasks in queues.values():
+                        for future, *_ in tasks:
+                            future.cancel()
+            self._condition.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+class GroupExecutor:
+    """
+    Executor view of a TransferScheduler that puts every task in one group, sized by its bytes-like arguments.
+    Passed to put_object so the parts of one object share the scheduler with everything else.
+    """
+    def __init__(self, scheduler: TransferScheduler, group: Hashable, priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL):
+        self._scheduler = scheduler
+        self._group = group
+        self._priority = priority
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        size = sum(len(arg) for arg in args if isinstance(arg, (bytes, bytearray, memoryview)))
+        return self._scheduler._enqueue(self._group, self._priority, size, fn, args, kwargs)
+
+class TransferProgress:
+    """
+    Running total for one transfer, handed to the progress callback as (transferred, total) after every step.
+    """
+    def __init__(self, callback: Callable[[int, int | None], None] | None, total: int | None):
+        self._callback = callback
+        self._total = total
+        self._transferred = 0
+        self._lock = threading.Lock()
+
+    @property
+    def transferred(self) -> int:
+        return self._transferred
+
+    @property
+    def total(self) -> int | None:
+        return self._total
+
+    def __call__(self, size: int):
+        # ranges and parts report from several threads
+        with self._lock:
+            self._transferred += size
+            transferred = self._transferred
+        if self._callback is not None:
+            self._callback(transferred, self._total)
+
+class TransferManager:
+    """
+    Runs batches of uploads, downloads and deletes through one Tonic client on a shared TransferScheduler.
+    Each job gets its own future. Uploads are driven from a separate pool of max_jobs threads that read the
+    parts and hand them to the scheduler, so parts of large objects and whole small objects take turns.
+    The short requests that open and verify an upload are made from those threads, outside max_requests.
+    """
+    def __init__(self,
+        tonic,
+        max_requests: int = 16,
+        max_bytes: int | None = None,
+        max_jobs: int | None = None,
+        part_concurrency: int | None = None):
+
+        self._tonic = tonic
+        self._scheduler = TransferScheduler(max_requests=max_requests, max_bytes=max_bytes)
+        self._jobs = ThreadPoolExecutor(max_workers=max_jobs or max_requests, thread_name_prefix="tonic-transfer")
+        self._part_concurrency = part_concurrency or max_requests
+
+    @property
+    def scheduler(self) -> TransferScheduler:
+        return self._scheduler
+
+    def upload(self,
+        bucket: str,
+        key: str,
+        file: any,
+        progress: Callable[[int, int | None], None] | None = None,
+        priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL,
+        **kwargs
+    ) -> Future:
+
+        # the total is known up front for files and in-memory data, streams report without one
+        total = None
+        if isinstance(file, str) and os.path.exists(file):
+            total = os.stat(file).st_size
+        elif isinstance(file, (bytes, bytearray, memoryview)):
+            total = memoryview(file).nbytes
+
+        kwargs.setdefault("max_concurrency", self._part_concurrency)
+        return self._jobs.submit(
+            self._tonic.put_object,
+            bucket,
+            key,
+            file,
+            executor=self._scheduler.executor(("upload", bucket, key), priority),
+            progress=TransferProgress(progress, total),
+            priority=priority,
+            **kwargs
+        )
+
+    def download(self,
+        bucket: str,
+        key: str,
+        file_path: str,
+        progress: Callable[[int, int | None], None] | None = None,
+        priority: TRANSFER_PRIORITY = TRANSFER_PRIORITY.NORMAL,
+        **kwargs
+    ) -> Future:
+
+        # a download is a single request, so it goes straight on the scheduler
+        return self._scheduler._enqueue(
+            ("download", bucket, key),
+            priority,
+            0,
+            self._tonic.get_object,
+            (bucket, key, file_path),
+            {"progress": TransferProgress(progress, None), "priority": priority, **kwargs}
+        )
+
+    def delete(self, bucket: str, key: str) -> Future:
+        return self._scheduler.submit(("delete", bucket, key), 0, self._tonic.delete_object, bucket, key)
+
+    def upload_many(self, bucket: str, files: Iterable[tuple[str, any]], **kwargs) -> list[Future]:
+        return [self.upload(bucket, key, file, **kwargs) for key, file in files]
+
+    def download_many(self, bucket: str, files: Iterable[tuple[str, str]], **kwargs) -> list[Future]:
+        return [self.download(bucket, key, file_path, **kwargs) for key, file_path in files]
+
+    def delete_many(self, bucket: str, keys: Iterable[str]) -> list[Future]:
+        return [self.delete(bucket, key) for key in keys]
+
+    def shutdown(self, cancel_futures: bool = False):
+        # uploads go first, they may still be handing parts to the scheduler
+        self._jobs.shutdown(cancel_futures=cancel_futures)
+        self._scheduler.shutdown(cancel_futures=cancel_futures)
+
+    def __enter__(self) -> "TransferManager":
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
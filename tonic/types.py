@@ -6,7 +6,9 @@ GB_SIZE = 1024 * MB_SIZE
 TB_SIZE = 1024 * GB_SIZE
 
 MAX_MULTIPART_COUNT = 9999
+PREFERRED_MULTIPART_COUNT = 1000
 MULTIPART_OBJECT_SIZE = 5 * MB_SIZE
+STREAM_CHUNK_SIZE = 1 * MB_SIZE
 
 class BUCKET_ACL(Enum):
     PRIVATE = "private"
@@ -18,4 +20,13 @@ class OBJECT_CHECKSUM_ALGORITHMS(Enum):
     CRC32 = "crc32"
     CRC32C = "crc32c"
     SHA1 = "sha1"
-    SHA256 = "sha256"
\ No newline at end of file
+    SHA256 = "sha256"
+
+class OBJECT_COMPRESSION(Enum):
+    GZIP = "gzip"
+    ZSTD = "zstd"
+
+class TRANSFER_PRIORITY(Enum):
+    INTERACTIVE = 0
+    NORMAL = 1
+    BULK = 2
\ No newline at end of file
@@ -0,0 +1,174 @@
+import os
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterator
+
+from .types import *
+from .checksum import mapped_file_checksum, cheapest_checksum_algorithm
+from .sync import walk_files
+
+class VerifyMismatch:
+    """
+    One key whose local file and object don't agree, and why.
+    """
+    CHECKSUM = "checksum"
+    SIZE = "size"
+    MISSING_LOCAL = "missing_local"
+    MISSING_REMOTE = "missing_remote"
+    ERROR = "error"
+
+    def __init__(self, key: str, reason: str, local_checksum: str | None = None, remote_checksum: str | None = None, error: any = None):
+        self._key = key
+        self._reason = reason
+        self._local_checksum = local_checksum
+        self._remote_checksum = remote_checksum
+        self._error = error
+
+    @property
+    def key(self) -> str:
+        return self._key
+
+    @property
+    def reason(self) -> str:
+        return self._reason
+
+    @property
+    def local_checksum(self) -> str | None:
+        return self._local_checksum
+
+    @property
+    def remote_checksum(self) -> str | None:
+        return self._remote_checksum
+
+    @property
+    def error(self) -> any:
+        return self._error
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._key!r}, {self._reason!r}, local={self._local_checksum}, remote={self._remote_checksum})"
+
+def _hash_batch(paths: list[str], algorithm: OBJECT_CHECKSUM_ALGORITHMS) -> list[tuple[str | None, str | None]]:
+    # (checksum, error) per file, a file that vanished or can't be read is reported rather than ending the batch
+    results = []
+    for path in paths:
+        try:
+            results.append((mapped_file_checksum(path, algorithm), None))
+        except OSError as e:
+            results.append((None, str(e)))
+    return results
+
+def _batches(files: list[tuple[str, str, int]], batch_bytes: int, batch_files: int) -> Iterator[list[tuple[str, str]]]:
+    # small files go to the workers together so a million of them aren't a million round trips, big ones alone
+    batch = []
+    size = 0
+    for key, path, file_size in files:
+        batch.append((key, path))
+        size += file_size
+        if size >= batch_bytes or len(batch) >= batch_files:
+            yield batch
+            batch = []
+            size = 0
+    if batch:
+        yield batch
+
+def verify_directory(
+    tonic,
+    bucket: str,
+    local_root: str,
+    algorithm: OBJECT_CHECKSUM_ALGORITHMS | None = None,
+    prefix: str = "",
+    max_requests: int = 32,
+    hash_processes: int | None = None,
+    batch_bytes: int = 64 * MB_SIZE,
+    progress: Callable[[str, VerifyMismatch | None], None] | None = None
+) -> Iterator[VerifyMismatch]:
+
+    algorithm = algorithm or cheapest_checksum_algorithm()
+
+    # the bucket as it stands and the files on disk, keys missing from either side need no hashing
+    remote = {obj.name: obj.size for obj in tonic.iter_objects(bucket, prefix=prefix or None) if obj.name.startswith(prefix)}
+    local = {prefix + path.replace(os.sep, "/"): (os.path.join(local_root, path), stat.st_size) for path, stat in walk_files(local_root)}
+    settled = [VerifyMismatch(key, VerifyMismatch.MISSING_LOCAL) for key in sorted(remote.keys() - local.keys())]
+    settled += [VerifyMismatch(key, VerifyMismatch.MISSING_REMOTE) for key in sorted(local.keys() - remote.keys())]
+
+    # a different size settles it without either checksum
+    files = []
+    for key in sorted(local.keys() & remote.keys()):
+        path, size = local[key]
+        if remote[key] is not None and remote[key] != size:
+            settled.append(VerifyMismatch(key, VerifyMismatch.SIZE))
+        else:
+            files.append((key, path, size))
+    for mismatch in settled:
+        if progress is not None:
+            progress(mismatch.key, mismatch)
+        yield mismatch
+
+    # checksum requests on a thread pool and hashing on a process pool, both kept busy while results
+    # are compared as they arrive, a key is reported once both its checksums are in
+    hash_processes = hash_processes or os.cpu_count() or 1
+    keys = iter([key for key, _, _ in files])
+    batches = _batches(files, batch_bytes, max(1, len(files) // (4 * hash_processes)))
+    hash_files = functools.partial(_hash_batch, algorithm=algorithm)
+    requests_in_flight = {}
+    hashes_in_flight = {}
+    found = {}
+
+    def compare(key: str, local: tuple[str | None, any], remote: tuple[str | None, any]) -> VerifyMismatch | None:
+        (local_checksum, local_error), (remote_checksum, remote_error) = local, remote
+        if local_error is not None or remote_error is not None:
+            return VerifyMismatch(key, VerifyMismatch.ERROR, local_checksum, remote_checksum, local_error or remote_error)
+        if local_checksum != remote_checksum:
+            return VerifyMismatch(key, VerifyMismatch.CHECKSUM, local_checksum, remote_checksum)
+        return None
+
+    # hashing processes are spawned, forking once request threads are running could copy a lock mid-use
+    if hash_processes == 1:
+        hashers = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tonic-verify-hash")
+    else:
+        hashers = ProcessPoolExecutor(max_workers=hash_processes, mp_context=multiprocessing.get_context("spawn"))
+    with hashers, ThreadPoolExecutor(max_workers=max_requests, thread_name_prefix="tonic-verify") as requests:
+        try:
+            while True:
+                # a couple of tasks queued per worker on both sides
+                while len(requests_in_flight) < 2 * max_requests and (key := next(keys, None)) is not None:
+                    requests_in_flight[requests.submit(tonic.get_object_checksum, bucket, key, algorithm)] = key
+                while len(hashes_in_flight) < 2 * hash_processes and (batch := next(batches, None)) is not None:
+                    hashes_in_flight[hashers.submit(hash_files, [path for _, path in batch])] = batch
+                if not requests_in_flight and not hashes_in_flight:
+                    return
+
+                arrived = []
+                done, _ = wait([*requests_in_flight, *hashes_in_flight], return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in requests_in_flight:
+                        key = requests_in_flight.pop(future)
+                        try:
+                            result = future.result()
+                            checksum = (result["result"], None) if result.get("status_code") == 200 else (None, result)
+                        except Exception as e:
+                            checksum = (None, e)
+                        arrived.append((key, "remote", checksum))
+                    else:
+                        batch = hashes_in_flight.pop(future)
+                        try:
+                            hashed = future.result()
+                        except Exception as e:
+                            hashed = [(None, e)] * len(batch)
+                        arrived += [(key, "local", checksum) for (key, _), checksum in zip(batch, hashed)]
+
+                for key, side, checksum in arrived:
+                    other = found.pop(key, None)
+                    if other is None:
+                        found[key] = checksum
+                        continue
+                    mismatch = compare(key, checksum, other) if side == "local" else compare(key, other, checksum)
+                    if progress is not None:
+                        progress(key, mismatch)
+                    if mismatch is not None:
+                        yield mismatch
+        finally:
+            # stopped early, what's still queued is dropped
+            for future in [*requests_in_flight, *hashes_in_flight]:
+                future.cancel()